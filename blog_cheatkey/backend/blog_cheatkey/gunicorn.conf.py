@@ -1,2 +1,13 @@
+import os
+
 bind = "0.0.0.0:8000"
-workers = 3
\ No newline at end of file
+workers = 3
+# 기본값은 기존과 같은 동기(sync) 워커입니다.
+# 생성 진행 SSE 스트림(/api/content/generate-stream/)은 연결마다 요청 스레드 하나를 오래 점유하므로
+# 동기 워커에서는 열지 않고 503과 함께 /status/ 폴링으로 안내합니다.
+# 스트림을 쓰려면 GUNICORN_WORKER_CLASS=gthread로 스레드 워커를 사용하세요.
+# (스트림 수는 GENERATION_STREAM_MAX_CONNECTIONS로 threads보다 작게 제한)
+# 워커가 여러 개이므로 작업 상태를 공유하려면 settings의 CACHE_BACKEND도 공유 캐시로 지정해야 합니다.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+# gthread 워커의 프로세스당 스레드 수 (sync 워커는 1, gunicorn은 2 이상이면 sync를 gthread로 바꿔 실행)
+threads = int(os.environ.get("GUNICORN_THREADS", "4" if worker_class == "gthread" else "1"))
@@ -50,10 +50,14 @@ else:
     }
 
 # 캐시 설정
+# 생성/최적화/파이프라인 작업 상태와 생성 진행 버퍼(SSE)는 캐시에 저장됩니다.
+# LocMemCache는 프로세스별이므로 워커가 여러 개면 다른 워커에서 상태를 볼 수 없습니다.
+# 여러 워커로 운영할 때는 공유 캐시를 지정하세요.
+# (예: CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache, CACHE_LOCATION=cache_table + createcachetable)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'unique-snowflake'),
     }
 }
 
@@ -62,6 +66,66 @@ OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY', '')
 PERPLEXITY_API_KEY = os.environ.get('PERPLEXITY_API_KEY','')
 
+# 형태소 분석기(Okt) 설정
+# 워커 시작 시 공유 토크나이저를 미리 로딩할지 여부 (관리 명령 실행 시와 TOKENIZER_SOCKET 사용 시에는 건너뜀)
+TOKENIZER_WARMUP = os.environ.get('TOKENIZER_WARMUP', 'True') == 'True'
+# 설정 시 워커마다 JVM을 띄우지 않고 토크나이저 서버(manage.py run_tokenizer_server)의 Unix 소켓을 사용
+TOKENIZER_SOCKET = os.environ.get('TOKENIZER_SOCKET', '')
+
+# 콘텐츠 최적화 설정
+# 형태소 축소 대상 문장들을 한 번의 LLM 호출로 묶어서 처리할지 여부
+OPTIMIZER_BATCH_REDUCTION = os.environ.get('OPTIMIZER_BATCH_REDUCTION', 'True') == 'True'
+# LLM 반복 수정 전에 로컬 제약 솔버(문장 삭제/치환/삽입 계획)로 목표를 맞출지 여부
+OPTIMIZER_USE_CONSTRAINT_SOLVER = os.environ.get('OPTIMIZER_USE_CONSTRAINT_SOLVER', 'True') == 'True'
+# 최적화 프롬프트 전략 실행 방식: 'speculative'(동시 실행 후 최상의 결과 선택) 또는 'sequential'(순차 개선, 호출 수 절감)
+# - speculative: 전략 3개를 한 번에 요청하므로 응답은 가장 빠르지만, 첫 결과가 목표를 달성해도 이미 호출 중인 요청은
+#   비용이 발생합니다. (작업당 Gemini 2.5 Pro 호출이 최대 3배, meta_data['perf']['counters']['llm_abandoned_calls']로 확인)
+# - sequential: 앞 전략이 목표를 달성하면 다음 전략을 호출하지 않으므로 비용에 민감한 환경에서는 이 값을 사용하세요.
+OPTIMIZER_PROMPT_MODE = os.environ.get('OPTIMIZER_PROMPT_MODE', 'speculative')
+# 최적화 작업 1건당 예산 (0이면 제한 없음). 다 쓰면 그때까지의 최상의 결과를 저장합니다.
+OPTIMIZER_MAX_SECONDS = int(os.environ.get('OPTIMIZER_MAX_SECONDS', '600'))
+OPTIMIZER_MAX_LLM_CALLS = int(os.environ.get('OPTIMIZER_MAX_LLM_CALLS', '200'))
+OPTIMIZER_MAX_TOKENS = int(os.environ.get('OPTIMIZER_MAX_TOKENS', '1000000'))
+# LLM 문장 수정 결과 캐시(SentenceRewriteMemo) 최대 저장 건수
+REWRITE_MEMO_MAX_ENTRIES = int(os.environ.get('REWRITE_MEMO_MAX_ENTRIES', '50000'))
+# 콘텐츠 생성 시 Claude 응답을 스트리밍으로 받아 부분 텍스트를 SSE 엔드포인트(generate-stream)로 전달
+CONTENT_STREAMING = os.environ.get('CONTENT_STREAMING', 'True') == 'True'
+# 워커 프로세스당 동시에 열 수 있는 SSE 스트림 수 (gunicorn threads보다 작아야 일반 요청을 처리할 스레드가 남음)
+# 스트림은 스레드 워커와 공유 캐시(CACHE_BACKEND)가 있어야 열리며, 그렇지 않으면 /status/ 폴링으로 안내합니다.
+GENERATION_STREAM_MAX_CONNECTIONS = int(os.environ.get('GENERATION_STREAM_MAX_CONNECTIONS', '2'))
+# 고정 지시문을 제공자 프롬프트 캐시로 전송 (Claude cache_control, Gemini 컨텍스트 캐시)
+PROMPT_CACHE_ENABLED = os.environ.get('PROMPT_CACHE_ENABLED', 'True') == 'True'
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get('GEMINI_CONTEXT_CACHE_TTL_SECONDS', '3600'))
+# 전체 파이프라인(분석→수집→생성→최적화/제목/요약) 작업 1건이 동시에 실행할 수 있는 최대 단계 수
+PIPELINE_MAX_WORKERS = int(os.environ.get('PIPELINE_MAX_WORKERS', '4'))
+
+# 콘텐츠 생성 시 동시에 요청할 초안 수 (1이면 초안 1개 + 필요 시 검증 재작성, 2 이상이면 형태소 분석 점수로 최선의 초안 선택)
+CONTENT_GENERATION_CANDIDATES = int(os.environ.get('CONTENT_GENERATION_CANDIDATES', '1'))
+
+# LLM 제공자별 호출 제한 (워커 프로세스 단위: 동시 호출 수, 분당 요청 수, 0이면 제한 없음)
+LLM_PROVIDER_LIMITS = {
+    'gemini': {
+        'max_concurrency': int(os.environ.get('GEMINI_MAX_CONCURRENCY', '4')),
+        'requests_per_minute': int(os.environ.get('GEMINI_REQUESTS_PER_MINUTE', '60')),
+    },
+    'anthropic': {
+        'max_concurrency': int(os.environ.get('ANTHROPIC_MAX_CONCURRENCY', '2')),
+        'requests_per_minute': int(os.environ.get('ANTHROPIC_REQUESTS_PER_MINUTE', '50')),
+    },
+    'openai': {
+        'max_concurrency': int(os.environ.get('OPENAI_MAX_CONCURRENCY', '4')),
+        'requests_per_minute': int(os.environ.get('OPENAI_REQUESTS_PER_MINUTE', '60')),
+    },
+    'perplexity': {
+        'max_concurrency': int(os.environ.get('PERPLEXITY_MAX_CONCURRENCY', '2')),
+        'requests_per_minute': int(os.environ.get('PERPLEXITY_REQUESTS_PER_MINUTE', '30')),
+    },
+}
+
+# 대량 생성(/api/content/batch/) 작업 하나에서 동시에 처리하는 키워드 수와 한 번에 받을 수 있는 키워드 수
+BATCH_MAX_CONCURRENT_ITEMS = int(os.environ.get('BATCH_MAX_CONCURRENT_ITEMS', '3'))
+BATCH_MAX_KEYWORDS = int(os.environ.get('BATCH_MAX_KEYWORDS', '50'))
+
 # Application definition
 INSTALLED_APPS = [
     # Django 기본 앱
@@ -1,6 +1,31 @@
+import os
+import sys
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def _is_management_command():
+    """manage.py/django-admin 명령(runserver 제외)으로 실행 중인지 확인합니다."""
+    program = os.path.basename(sys.argv[0]) if sys.argv else ''
+    if program not in ('manage.py', 'django-admin', 'django-admin.py'):
+        return False
+    return len(sys.argv) < 2 or sys.argv[1] != 'runserver'
 
 
 class ContentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "backend.content"
+
+    def ready(self):
+        # 워커 시작 시 공유 형태소 분석기(Okt)를 미리 로딩합니다.
+        # JVM 로딩이 요청 처리를 막지 않도록 별도 스레드에서 수행합니다.
+        # - migrate 등 관리 명령에서는 JVM을 띄울 필요가 없으므로 건너뜁니다.
+        # - 토크나이저 서버(TOKENIZER_SOCKET)를 쓰면 JVM은 서버 프로세스에만 로딩되므로 건너뜁니다.
+        if not getattr(settings, 'TOKENIZER_WARMUP', False):
+            return
+        if getattr(settings, 'TOKENIZER_SOCKET', '') or _is_management_command():
+            return
+        from .services.tokenizer import get_tokenizer
+        threading.Thread(target=get_tokenizer().warm_up, daemon=True).start()
@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.content.services.blog_document import BlogDocument
+from backend.content.services.optimizer import ContentOptimizer
+
+
+class _OfflineSubstitutions:
+    """벤치마크 중 대체어 API를 호출하지 않도록 빈 대체어 목록을 반환"""
+
+    def get_substitutions(self, keyword, morpheme=None):
+        return []
+
+
+SENTENCE_TEMPLATES = [
+    "{keyword}는 정기적으로 점검하는 것이 좋습니다.",
+    "많은 운전자들이 {keyword} 교체 주기를 놓치곤 합니다.",
+    "전문가들은 차량 상태에 맞는 제품을 고르라고 조언합니다.",
+    "주행 환경에 따라 관리 방법이 달라질 수 있습니다.",
+    "특히 여름철에는 온도 변화에 주의해야 합니다.",
+    "작은 습관이 차량 수명을 크게 늘려 줍니다.",
+]
+
+
+def build_post(keyword, target_chars, rng):
+    """소제목과 문단으로 이루어진 target_chars(공백 제외) 내외의 합성 블로그 글"""
+    blocks = []
+    chars = 0
+    section = 1
+    while chars < target_chars:
+        heading = f"## {keyword} 관리 포인트 {section}"
+        blocks.append(heading)
+        chars += len(heading.replace(" ", ""))
+        for _ in range(3):
+            paragraph = " ".join(
+                rng.choice(SENTENCE_TEMPLATES).format(keyword=keyword) for _ in range(rng.randint(4, 8))
+            )
+            blocks.append(paragraph)
+            chars += len(paragraph.replace(" ", ""))
+        section += 1
+    return "\n\n".join(blocks)
+
+
+class Command(BaseCommand):
+    help = "글자수 조정 단계(_enforce_exact_char_count_v2)의 실행 시간을 합성 글(5,000~20,000자)로 측정합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='5000,10000,20000', help='측정할 글 길이(공백 제외 글자수), 쉼표로 구분')
+        parser.add_argument('--repeat', type=int, default=5, help='길이별 반복 횟수')
+        parser.add_argument('--keyword', default='엔진오일', help='합성 글에 사용할 키워드')
+        parser.add_argument('--seed', type=int, default=42, help='난수 시드')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        keyword = options['keyword']
+        rng = random.Random(options['seed'])
+
+        optimizer = ContentOptimizer(substitution_generator=_OfflineSubstitutions())
+        analyzer = optimizer.morpheme_analyzer
+        target_set = analyzer.get_target_set(keyword)
+        target_center = (analyzer.target_min_chars + analyzer.target_max_chars) // 2
+
+        for size in sizes:
+            post = build_post(keyword, size, rng)
+            for mode, target_chars in (('reduce', target_center), ('expand', size + size // 5)):
+                timings = []
+                result_chars = None
+                for _ in range(options['repeat']):
+                    random.seed(options['seed'])
+                    started = time.perf_counter()
+                    document = BlogDocument(post, target_set.counter)
+                    analysis = analyzer.analyze_document(document, keyword)
+                    optimizer._enforce_exact_char_count_v2(
+                        document,
+                        target_chars,
+                        tolerance=100,
+                        all_target_morphemes=analysis['morpheme_analysis']['target_morphemes'],
+                        current_morpheme_counts=analysis['morpheme_analysis']['counts']
+                    )
+                    timings.append((time.perf_counter() - started) * 1000)
+                    result_chars = document.char_count
+
+                self.stdout.write(
+                    f"{size:>6}자 {mode:<6} 목표 {target_chars:>6}자 -> {result_chars:>6}자 | "
+                    f"평균 {statistics.mean(timings):8.2f}ms, 최소 {min(timings):8.2f}ms ({options['repeat']}회)"
+                )
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.content.services.tokenizer_server import TokenizerServer
+
+
+class Command(BaseCommand):
+    help = "gunicorn 워커들이 Unix 소켓으로 공유하는 형태소 분석(Okt) 서버를 실행합니다. (TOKENIZER_SOCKET 설정 필요)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=None, help='Unix 소켓 경로 (기본값: settings.TOKENIZER_SOCKET)')
+        parser.add_argument('--cache-size', type=int, default=20000, help='결과 캐시 크기')
+
+    def handle(self, *args, **options):
+        socket_path = options['socket'] or getattr(settings, 'TOKENIZER_SOCKET', '')
+        if not socket_path:
+            raise CommandError("소켓 경로가 없습니다. --socket 옵션이나 TOKENIZER_SOCKET 환경변수를 지정하세요.")
+
+        server = TokenizerServer(socket_path, cache_size=options['cache_size'])
+        server.tokenizer.warm_up()
+        self.stdout.write(self.style.SUCCESS(f"토크나이저 서버 시작: {socket_path}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write("토크나이저 서버 종료")
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0002_alter_blogcontent_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentenceRewriteMemo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('morpheme', models.CharField(max_length=100)),
+                ('sentence', models.TextField()),
+                ('rewritten', models.TextField(blank=True)),
+                ('model_name', models.CharField(max_length=50)),
+                ('prompt_version', models.CharField(max_length=20)),
+                ('hits', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': '문장 수정 캐시',
+                'verbose_name_plural': '문장 수정 캐시',
+            },
+        ),
+    ]
@@ -40,3 +40,24 @@ class MorphemeAnalysis(models.Model):
     def __str__(self):
         return f"{self.content.keyword.keyword} - {self.morpheme}: {self.count}회 ({'유효' if self.is_valid else '무효'})"
 
+
+class SentenceRewriteMemo(models.Model):
+    """
+    LLM 문장 수정 결과 캐시 (문장, 형태소, 모델, 프롬프트 버전의 해시로 조회)
+    """
+    key = models.CharField(max_length=64, unique=True)
+    morpheme = models.CharField(max_length=100)
+    sentence = models.TextField()
+    rewritten = models.TextField(blank=True)
+    model_name = models.CharField(max_length=50)
+    prompt_version = models.CharField(max_length=20)
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = '문장 수정 캐시'
+        verbose_name_plural = '문장 수정 캐시'
+
+    def __str__(self):
+        return f"{self.morpheme}: {self.sentence[:30]}"
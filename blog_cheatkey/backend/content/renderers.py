@@ -0,0 +1,20 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    text/event-stream 요청(EventSource)이 콘텐츠 협상을 통과하도록 하는 렌더러
+
+    정상 응답은 StreamingHttpResponse로 직접 보내므로, 이 렌더러는 오류 응답(dict)만
+    error 이벤트 한 개로 바꿔서 보냅니다.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return f"event: error\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode(self.charset)
@@ -0,0 +1,51 @@
+import logging
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _analysis_model(blog_content):
+    # 아직 저장되지 않은 BlogContent에서도 쓸 수 있도록 관계 필드에서 모델을 찾습니다.
+    return blog_content._meta.get_field('morpheme_analyses').related_model
+
+
+def morpheme_rows(blog_content, analysis):
+    """analyze() 결과의 형태소별 카운트로 저장하지 않은 MorphemeAnalysis 객체 목록을 만듭니다."""
+    MorphemeAnalysis = _analysis_model(blog_content)
+    counts = analysis.get('morpheme_analysis', {}).get('counts', {})
+    return [
+        MorphemeAnalysis(
+            content=blog_content,
+            morpheme=morpheme,
+            count=info.get('count', 0),
+            is_valid=info.get('is_valid', False),
+            morpheme_type=info.get('type', 'unknown')
+        )
+        for morpheme, info in counts.items()
+    ]
+
+
+def save_content_with_analysis(blog_content, analysis, update_fields=None):
+    """
+    BlogContent 저장과 형태소 분석 결과 교체를 하나의 트랜잭션으로 처리합니다.
+
+    - 형태소 행은 (content, morpheme) 고유 키 기준 bulk upsert 한 번으로 저장합니다.
+    - 이번 분석에 없는 이전 형태소 행만 삭제합니다.
+    - 중간에 실패하면 콘텐츠와 분석 결과 모두 이전 상태로 남습니다.
+    - update_fields를 주면 그 필드만 저장합니다. (제목 생성 등 같은 행을 동시에 수정하는 작업의 변경을 덮어쓰지 않도록)
+    """
+    MorphemeAnalysis = _analysis_model(blog_content)
+    with transaction.atomic():
+        blog_content.save(update_fields=update_fields)
+        rows = morpheme_rows(blog_content, analysis)
+        blog_content.morpheme_analyses.exclude(morpheme__in=[row.morpheme for row in rows]).delete()
+        if rows:
+            MorphemeAnalysis.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['content', 'morpheme'],
+                update_fields=['count', 'is_valid', 'morpheme_type']
+            )
+    logger.debug(f"형태소 분석 결과 {len(rows)}건 저장: content_id={blog_content.pk}")
+    return blog_content
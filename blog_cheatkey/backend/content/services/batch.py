@@ -0,0 +1,213 @@
+import logging
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+BATCH_CACHE_TIMEOUT = 3600 * 12
+BATCH_MODES = ('generate', 'pipeline')
+
+
+def batch_cache_key(batch_id):
+    return f"content_batch_{batch_id}"
+
+
+def get_batch_status(batch_id):
+    return cache.get(batch_cache_key(batch_id))
+
+
+class BatchGeneration:
+    """
+    여러 키워드의 콘텐츠를 한 작업으로 생성하는 대량 생성 실행기
+
+    - 키워드는 최대 BATCH_MAX_CONCURRENT_ITEMS개씩 동시에 처리합니다.
+    - 실제 API 호출 수는 제공자별 공유 제한기(llm_executor.get_limiter)가 워커 전체 기준으로 제한하므로,
+      동시에 처리하는 키워드 수를 늘려도 제공자별 동시 호출 수는 넘지 않습니다.
+    - mode='generate'는 콘텐츠 생성만, mode='pipeline'은 ContentPipeline 전체 단계를 키워드마다 실행합니다.
+    - 콘텐츠는 항목이 끝날 때마다 저장되고, 항목별 상태와 전체 처리량은 캐시(content_batch_<batch_id>)에 기록됩니다.
+    """
+
+    def __init__(self, keyword_ids, user_id, options=None, mode='generate', batch_id=None):
+        self.batch_id = batch_id or uuid.uuid4().hex
+        self.keyword_ids = list(dict.fromkeys(keyword_ids)) # 중복 제거 (순서 유지)
+        self.user_id = user_id
+        self.options = options or {}
+        self.mode = mode
+        self.max_workers = max(1, getattr(settings, 'BATCH_MAX_CONCURRENT_ITEMS', 3))
+        self._lock = threading.Lock()
+        self._started = None
+        self.state = {
+            'batch_id': self.batch_id,
+            'user_id': user_id,
+            'mode': mode,
+            'status': 'pending',
+            'progress': 0,
+            'max_concurrent_items': self.max_workers,
+            'items': {
+                str(keyword_id): {'keyword_id': keyword_id, 'status': 'pending'}
+                for keyword_id in self.keyword_ids
+            },
+            'summary': self._empty_summary(),
+        }
+
+    def _empty_summary(self):
+        return {
+            'total': len(self.keyword_ids),
+            'completed': 0,
+            'failed': 0,
+            'running': 0,
+            'elapsed_seconds': 0.0,
+            'items_per_minute': 0.0,
+            'avg_item_seconds': 0.0,
+            'llm_calls': 0,
+            'llm_tokens': 0,
+        }
+
+    # ---- 실행 ----
+
+    def start(self):
+        """상태를 기록하고 백그라운드 스레드에서 대량 생성을 실행합니다. batch_id를 반환합니다."""
+        self._save()
+        thread = threading.Thread(target=self.run)
+        thread.daemon = True
+        thread.start()
+        return self.batch_id
+
+    def run(self):
+        self._started = time.monotonic()
+        self._update(status='running')
+        logger.info(
+            f"대량 생성 시작: batch_id={self.batch_id}, 키워드 {len(self.keyword_ids)}개, "
+            f"mode={self.mode}, 동시 처리 {self.max_workers}개"
+        )
+
+        self._prefetch_target_sets()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(self._run_item, self.keyword_ids))
+
+        summary = self.state['summary']
+        if summary['failed'] == 0:
+            final_status = 'completed'
+        elif summary['completed'] > 0:
+            final_status = 'partial'
+        else:
+            final_status = 'failed'
+        self._update(status=final_status)
+        logger.info(
+            f"대량 생성 종료: batch_id={self.batch_id}, 상태={final_status}, "
+            f"성공 {summary['completed']}/{summary['total']}, 소요 {summary['elapsed_seconds']:.1f}초, "
+            f"처리량 {summary['items_per_minute']:.2f}건/분"
+        )
+
+    def _prefetch_target_sets(self):
+        """모든 키워드의 목표 형태소 분해를 한 번에 요청해 둡니다. (항목마다 토크나이저를 따로 호출하지 않도록)"""
+        from backend.key_word.models import Keyword
+        from .morpheme_analyzer import MorphemeAnalyzer
+
+        try:
+            keywords = list(Keyword.objects.filter(id__in=self.keyword_ids).values_list('keyword', flat=True))
+            MorphemeAnalyzer().get_target_sets(keywords, self.options.get('custom_morphemes'))
+        except Exception as e:
+            # 미리 받아 두지 못해도 각 항목에서 다시 분해하므로 작업은 계속합니다.
+            logger.warning(f"목표 형태소 일괄 분해 실패 (batch_id={self.batch_id}): {e}")
+
+    def _run_item(self, keyword_id):
+        started = time.monotonic()
+        self._update_item(keyword_id, status='running', started_at=time.time())
+        try:
+            if self.mode == 'pipeline':
+                result = self._run_pipeline(keyword_id)
+            else:
+                result = self._run_generate(keyword_id)
+        except Exception as e:
+            logger.error(f"대량 생성 항목 실패 (batch_id={self.batch_id}, keyword_id={keyword_id}): {e}")
+            logger.error(traceback.format_exc())
+            self._update_item(keyword_id, status='failed', error=str(e), seconds=round(time.monotonic() - started, 2))
+            return
+        self._update_item(keyword_id, status='completed', seconds=round(time.monotonic() - started, 2), **result)
+
+    def _run_generate(self, keyword_id):
+        from .generator import ContentGenerator
+
+        # 단건 생성과 같은 상태 키를 사용하므로 /status/ 엔드포인트로도 항목별 진행을 볼 수 있습니다.
+        status_key = f"content_generation_{keyword_id}_{self.user_id}"
+        cache.set(status_key, {"status": "running", "progress": 50, "message": "AI가 콘텐츠 작성 중..."}, timeout=3600)
+        generator = ContentGenerator()
+        content_id = generator.generate_content(
+            keyword_id=keyword_id,
+            user_id=self.user_id,
+            target_audience=self.options.get('target_audience'),
+            business_info=self.options.get('business_info'),
+            custom_morphemes=self.options.get('custom_morphemes'),
+            candidates=self.options.get('candidates')
+        )
+        if not content_id:
+            cache.set(status_key, {"status": "failed", "error": "콘텐츠 생성에 실패했습니다."}, timeout=3600)
+            raise RuntimeError("콘텐츠 생성에 실패했습니다.")
+        cache.set(status_key, {
+            "status": "completed", "progress": 100, "content_id": content_id,
+            "message": "콘텐츠가 성공적으로 생성되었습니다."
+        }, timeout=3600)
+
+        counters = generator.perf.to_dict().get('counters', {})
+        return {
+            'content_id': content_id,
+            'llm_calls': counters.get('llm_calls', 0),
+            'llm_tokens': counters.get('llm_tokens', 0),
+        }
+
+    def _run_pipeline(self, keyword_id):
+        from .pipeline import ContentPipeline
+
+        pipeline = ContentPipeline(keyword_id, self.user_id, self.options)
+        # 항목별 단계 상태는 /pipeline/<job_id>/ 로 확인할 수 있습니다.
+        self._update_item(keyword_id, job_id=pipeline.job_id)
+        pipeline.run()
+        if not pipeline.state.get('content_id'):
+            raise RuntimeError("콘텐츠 생성에 실패했습니다.")
+        return {'content_id': pipeline.state['content_id'], 'pipeline_status': pipeline.state['status']}
+
+    # ---- 상태 ----
+
+    def _update(self, **fields):
+        with self._lock:
+            self.state.update(fields)
+            self._refresh_summary()
+            self._save()
+
+    def _update_item(self, keyword_id, **fields):
+        with self._lock:
+            self.state['items'][str(keyword_id)].update(fields)
+            self._refresh_summary()
+            self._save()
+
+    def _refresh_summary(self):
+        items = self.state['items'].values()
+        summary = self._empty_summary()
+        finished_seconds = []
+        for item in items:
+            if item['status'] in ('completed', 'failed', 'running'):
+                summary[item['status']] += 1
+            if item['status'] in ('completed', 'failed'):
+                finished_seconds.append(item.get('seconds', 0.0))
+            summary['llm_calls'] += item.get('llm_calls', 0)
+            summary['llm_tokens'] += item.get('llm_tokens', 0)
+
+        finished = summary['completed'] + summary['failed']
+        elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        summary['elapsed_seconds'] = round(elapsed, 2)
+        if elapsed > 0:
+            summary['items_per_minute'] = round(summary['completed'] * 60 / elapsed, 2)
+        if finished_seconds:
+            summary['avg_item_seconds'] = round(sum(finished_seconds) / len(finished_seconds), 2)
+        self.state['summary'] = summary
+        self.state['progress'] = int(finished * 100 / summary['total']) if summary['total'] else 100
+
+    def _save(self):
+        cache.set(batch_cache_key(self.batch_id), self.state, timeout=BATCH_CACHE_TIMEOUT)
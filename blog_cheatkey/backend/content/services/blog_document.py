@@ -0,0 +1,124 @@
+import re
+
+from .incremental_analysis import IncrementalAnalysis
+
+REFS_PATTERN = re.compile(r"(## 참고자료[\s\S]*)", re.MULTILINE)
+
+
+def split_refs(content):
+    """본문과 참고자료 섹션(## 참고자료 이후)을 나눕니다. 참고자료가 없으면 None"""
+    refs_match = REFS_PATTERN.search(content)
+    if refs_match:
+        return content[:refs_match.start()].strip(), refs_match.group(1)
+    return content.strip(), None
+
+
+class BlogDocument:
+    """
+    최적화 작업 동안 모든 단계가 공유하는 구조화된 블로그 문서
+
+    - 본문은 문장 단위로 한 번만 나누어 IncrementalAnalysis로 보관합니다.
+      (문장/문단별 글자수와 목표 형태소 카운트를 유지하고, 수정된 부분만 다시 카운트)
+    - 문단은 빈 줄로 구분되며 '#'으로 시작하는 문단은 소제목으로 취급합니다.
+    - 참고자료 섹션은 최적화 대상에서 제외하고 to_text()에서만 다시 붙입니다.
+    """
+
+    def __init__(self, content, counter):
+        body, self.refs_section = split_refs(content)
+        self.body = IncrementalAnalysis(body, counter)
+
+    # ----- 조회 -----
+
+    @property
+    def counter(self):
+        return self.body.counter
+
+    @property
+    def text(self):
+        """참고자료를 제외한 본문"""
+        return self.body.text
+
+    @property
+    def char_count(self):
+        return self.body.char_count
+
+    @property
+    def counts(self):
+        return self.body.counts
+
+    @property
+    def revision(self):
+        return self.body.revision
+
+    def count(self, kind, morpheme):
+        return self.body.count(kind, morpheme)
+
+    def paragraphs(self):
+        """
+        문단 목록을 반환합니다.
+        각 항목: {'index', 'sentences', 'start', 'end', 'text', 'chars', 'counts', 'is_heading'}
+        """
+        body = self.body
+        result = []
+        for index, paragraph in enumerate(body.paragraphs()):
+            sentence_indices = paragraph['sentences']
+            start = body.sentence_span(sentence_indices[0])[0]
+            end = body.sentence_span(sentence_indices[-1])[1]
+            text = ''.join(
+                body.sentence(i) + (body.separator(i) if i != sentence_indices[-1] else '')
+                for i in sentence_indices
+            )
+            result.append({
+                'index': index,
+                'sentences': sentence_indices,
+                'start': start,
+                'end': end,
+                'text': text,
+                'chars': paragraph['chars'],
+                'counts': paragraph['counts'],
+                'is_heading': text.strip().startswith('#'),
+            })
+        return result
+
+    # ----- 편집 -----
+
+    def replace_paragraph(self, paragraph, new_text):
+        """paragraphs()가 반환한 문단을 new_text로 교체합니다. (문단 구분 빈 줄은 유지)"""
+        if new_text == paragraph['text']:
+            return
+        self.body.replace_span(paragraph['start'], paragraph['end'], new_text)
+
+    def replace_paragraphs(self, replacements, paragraphs=None):
+        """
+        {문단 항목 index: 새 텍스트} 를 한 번에 적용합니다.
+        뒤쪽 문단부터 교체하므로 교체 전에 얻은 paragraphs() 결과의 오프셋을 그대로 쓸 수 있습니다.
+        """
+        if paragraphs is None:
+            paragraphs = self.paragraphs()
+        for index in sorted(replacements, reverse=True):
+            self.replace_paragraph(paragraphs[index], replacements[index])
+
+    def append_paragraph(self, text):
+        """본문 끝에 새 문단을 추가합니다."""
+        end = self.body.text_length
+        self.body.replace_span(end, end, ("\n\n" if end else "") + text)
+
+    def set_text(self, content):
+        """본문 전체를 교체합니다. (참고자료 섹션은 유지)"""
+        body, _ = split_refs(content)
+        self.body.replace_span(0, self.body.text_length, body)
+
+    def snapshot(self):
+        return self.body.snapshot()
+
+    def restore(self, snapshot):
+        self.body.restore(snapshot)
+
+    # ----- 직렬화 -----
+
+    def to_text(self):
+        """본문과 참고자료를 합친 최종 텍스트"""
+        text = self.body.text
+        if self.refs_section and "## 참고자료" not in text:
+            text = text + "\n\n" + self.refs_section
+        return text
@@ -0,0 +1,404 @@
+import logging
+
+from .incremental_analysis import split_sentence_units, _char_count
+from .morpheme_counter import _is_hangul
+
+logger = logging.getLogger(__name__)
+
+# 부족한 형태소를 채울 때 사용하는 문장 템플릿 (순서대로 시도하므로 결과가 항상 같습니다)
+INSERTION_TEMPLATES = [
+    "또한, {morpheme}의 중요성을 간과해서는 안 됩니다.",
+    "이러한 맥락에서 {morpheme}은 핵심적인 역할을 합니다.",
+    "결과적으로 {morpheme}의 활용이 중요합니다.",
+    "많은 전문가들이 {morpheme}의 가치를 강조합니다.",
+    "특히 {morpheme}에 대한 이해가 필요합니다.",
+]
+
+# 글자수가 부족할 때 덧붙이는 문장 (목표 형태소를 포함하지 않는 일반 문장)
+FILLER_SENTENCES = [
+    "실제 상황에 따라 세부 내용은 달라질 수 있으므로 꼼꼼히 확인하는 것이 좋습니다.",
+    "처음에는 어렵게 느껴질 수 있지만 하나씩 점검해 보면 생각보다 간단합니다.",
+    "궁금한 점이 있다면 전문가와 상담해 보는 것도 좋은 방법입니다.",
+    "작은 차이가 장기적으로는 큰 결과의 차이로 이어질 수 있습니다.",
+    "무엇보다 자신의 상황에 맞는 방법을 선택하는 것이 가장 중요합니다.",
+]
+
+# 연산 우선순위 (변경 폭이 작은 연산 우선)
+_OP_PRIORITY = {'substitute': 0, 'insert': 1, 'delete': 2}
+
+
+class _Slot:
+    """원문 문장 하나와 그 문장에 적용된 연산 상태"""
+    __slots__ = ('text', 'separator', 'vector', 'protected', 'deleted', 'inserts', 'substitutions', 'paragraph')
+
+    def __init__(self, text, separator, vector, paragraph):
+        self.text = text
+        self.separator = separator
+        self.vector = vector
+        self.paragraph = paragraph
+        # 제목(#)이 포함된 문장은 수정/삭제하지 않습니다.
+        self.protected = any(line.lstrip().startswith('#') for line in text.split('\n'))
+        self.deleted = False
+        self.inserts = []        # [(문장, 카운트 벡터)]
+        self.substitutions = 0
+
+    @property
+    def ends_paragraph(self):
+        return self.separator.count('\n') >= 2
+
+
+class SolverResult:
+    def __init__(self, text, operations, feasible, violation_before, violation_after):
+        self.text = text
+        self.operations = operations
+        self.feasible = feasible
+        self.violation_before = violation_before
+        self.violation_after = violation_after
+
+    def __repr__(self):
+        return (f"SolverResult(operations={len(self.operations)}, feasible={self.feasible}, "
+                f"violation={self.violation_before:.2f}->{self.violation_after:.2f})")
+
+
+class ConstraintSolver:
+    """
+    문장 단위 출현 행렬을 바탕으로 형태소 횟수/글자수 목표를 한 번에 만족시키는 편집 계획을 세우는 로컬 솔버
+
+    - 연산: 문장 삭제, 형태소 대체어 치환(SubstitutionGenerator), 템플릿 문장 삽입
+    - 탐욕법으로 위반량을 가장 많이 줄이는 연산을 반복 선택한 뒤,
+      없어도 목표를 만족하는 연산은 되돌리는 지역 탐색으로 연산 수를 줄입니다.
+    - 난수를 쓰지 않으므로 같은 입력에는 항상 같은 결과를 냅니다.
+
+    Args:
+        counter (MorphemeCounter): 목표 형태소 카운팅 엔진 (TargetSet.counter)
+        key_ranges (dict): {(종류, 형태소): (최소, 최대)}
+        char_range (tuple): (최소 글자수, 최대 글자수) - 공백 제외
+        substitutions_for (callable, optional): 형태소 -> 대체어 목록
+    """
+
+    CHAR_WEIGHT = 100        # 글자수 100자 부족/초과를 형태소 1회 위반과 같은 무게로 취급
+    MAX_SUBSTITUTES = 5      # 형태소별로 시도할 대체어 수
+    MAX_OPERATIONS = 200
+
+    def __init__(self, counter, key_ranges, char_range, substitutions_for=None):
+        self.counter = counter
+        self.key_ranges = key_ranges
+        self.char_range = char_range
+        self.substitutions_for = substitutions_for
+        self._substitute_cache = {}
+        self._ranges = [key_ranges.get(key, (0, float('inf'))) for key in counter.keys]
+
+    @classmethod
+    def for_targets(cls, target_set, analyzer, substitutions_for=None):
+        """TargetSet과 MorphemeAnalyzer의 목표 범위로 솔버를 만듭니다."""
+        key_ranges = {}
+        for morpheme in target_set.base:
+            key_ranges[('base', morpheme)] = (analyzer.target_min_base_count, analyzer.target_max_base_count)
+        for morpheme in target_set.compound:
+            key_ranges[('compound', morpheme)] = (analyzer.target_min_compound_count, analyzer.target_max_compound_count)
+        return cls(
+            target_set.counter,
+            key_ranges,
+            (analyzer.target_min_chars, analyzer.target_max_chars),
+            substitutions_for=substitutions_for
+        )
+
+    # ----- 공개 API -----
+
+    def solve(self, text):
+        slots = self._build_slots(text)
+        totals, chars = self._totals(slots), _char_count(text)
+        violation_before = self._violation(totals, chars)
+
+        operations = []
+        while len(operations) < self.MAX_OPERATIONS:
+            current = self._violation(totals, chars)
+            if current == 0:
+                break
+            move = self._best_move(slots, totals, chars, current)
+            if move is None:
+                break
+            self._apply(slots, move)
+            totals = [t + d for t, d in zip(totals, move['delta'])]
+            chars += move['chars']
+            operations.append(move)
+
+        operations = self._prune(text, operations)
+        slots = self._build_slots(text)
+        for move in operations:
+            self._apply(slots, move)
+
+        solved_text = self._render(slots)
+        final_totals = self.counter.count_vector(solved_text)
+        violation_after = self._violation(final_totals, _char_count(solved_text))
+
+        result = SolverResult(
+            solved_text,
+            [self._describe(move) for move in operations],
+            violation_after == 0,
+            violation_before,
+            violation_after
+        )
+        logger.info(f"로컬 솔버 결과: {result}")
+        return result
+
+    # ----- 상태 -----
+
+    def _build_slots(self, text):
+        slots = []
+        paragraph = 0
+        for sentence, separator in split_sentence_units(text):
+            slot = _Slot(sentence, separator, self.counter.count_vector(sentence), paragraph)
+            slots.append(slot)
+            if slot.ends_paragraph:
+                paragraph += 1
+        return slots
+
+    def _totals(self, slots):
+        totals = [0] * len(self.counter.keys)
+        for slot in slots:
+            if not slot.deleted:
+                totals = [t + v for t, v in zip(totals, slot.vector)]
+            for _, vector in slot.inserts:
+                totals = [t + v for t, v in zip(totals, vector)]
+        return totals
+
+    def _violation(self, totals, chars):
+        violation = 0.0
+        for total, (low, high) in zip(totals, self._ranges):
+            if total < low:
+                violation += low - total
+            elif total > high:
+                violation += total - high
+        low, high = self.char_range
+        if chars < low:
+            violation += (low - chars) / self.CHAR_WEIGHT
+        elif chars > high:
+            violation += (chars - high) / self.CHAR_WEIGHT
+        return violation
+
+    # ----- 연산 후보 -----
+
+    def _best_move(self, slots, totals, chars, current):
+        best, best_key = None, None
+        for move in self._candidate_moves(slots, totals, chars):
+            new_totals = [t + d for t, d in zip(totals, move['delta'])]
+            gain = current - self._violation(new_totals, chars + move['chars'])
+            if gain <= 0:
+                continue
+            key = (-gain, _OP_PRIORITY[move['op']], abs(move['chars']), move['slot'])
+            if best_key is None or key < best_key:
+                best, best_key = move, key
+        return best
+
+    def _candidate_moves(self, slots, totals, chars):
+        keys = self.counter.keys
+        over = [i for i, (t, (_, high)) in enumerate(zip(totals, self._ranges)) if t > high]
+        under = [i for i, (t, (low, _)) in enumerate(zip(totals, self._ranges)) if t < low]
+        low_chars, high_chars = self.char_range
+        editable = [i for i, slot in enumerate(slots) if not slot.protected and not slot.deleted]
+
+        # 과다 형태소: 해당 문장의 대체어 치환, 문장 삭제
+        seen_deletions = set()
+        for key_id in over:
+            kind, morpheme = keys[key_id]
+            for i in editable:
+                slot = slots[i]
+                if slot.vector[key_id] <= 0:
+                    continue
+                for substitute in self._substitutes(morpheme):
+                    new_text = self._substitute_once(slot.text, key_id, substitute)
+                    if new_text is None:
+                        continue
+                    new_vector = self.counter.count_vector(new_text)
+                    yield {
+                        'op': 'substitute', 'slot': i, 'text': new_text, 'vector': new_vector,
+                        'delta': [n - o for n, o in zip(new_vector, slot.vector)],
+                        'chars': _char_count(new_text) - _char_count(slot.text),
+                        'detail': f"{morpheme} -> {substitute}",
+                    }
+                if i not in seen_deletions and self._can_delete(slots, i):
+                    seen_deletions.add(i)
+                    yield self._deletion_move(slots, i)
+
+        # 글자수 초과: 모든 편집 가능 문장의 삭제
+        if chars > high_chars:
+            for i in editable:
+                if i not in seen_deletions and self._can_delete(slots, i):
+                    seen_deletions.add(i)
+                    yield self._deletion_move(slots, i)
+
+        # 부족 형태소: 템플릿 문장 삽입 (해당 형태소가 가장 적은 문단에)
+        for key_id in under:
+            kind, morpheme = keys[key_id]
+            target = self._insertion_slot(slots, key_id)
+            if target is None:
+                continue
+            sentences = [template.format(morpheme=morpheme) for template in INSERTION_TEMPLATES]
+            for sentence in self._least_used(slots, sentences):
+                yield self._insertion_move(target, sentence, f"{morpheme} 추가")
+
+        # 글자수 부족: 일반 문장 삽입
+        if chars < low_chars:
+            target = self._insertion_slot(slots, None)
+            if target is not None:
+                for sentence in self._least_used(slots, FILLER_SENTENCES):
+                    yield self._insertion_move(target, sentence, "글자수 보충")
+
+    def _deletion_move(self, slots, i):
+        slot = slots[i]
+        removed_chars = _char_count(slot.text)
+        if not slot.ends_paragraph:
+            removed_chars += _char_count(slot.separator)
+        return {
+            'op': 'delete', 'slot': i,
+            'delta': [-v for v in slot.vector],
+            'chars': -removed_chars,
+            'detail': slot.text[:30],
+        }
+
+    def _insertion_move(self, slot_index, sentence, detail):
+        vector = self.counter.count_vector(sentence)
+        return {
+            'op': 'insert', 'slot': slot_index, 'text': sentence, 'vector': vector,
+            'delta': vector,
+            'chars': _char_count(sentence),
+            'detail': detail,
+        }
+
+    @staticmethod
+    def _least_used(slots, sentences):
+        """같은 문장이 반복해서 삽입되지 않도록 가장 적게 쓰인 문장들만 후보로 남깁니다."""
+        inserted = [sentence for slot in slots for sentence, _ in slot.inserts]
+        usage = {sentence: inserted.count(sentence) for sentence in sentences}
+        fewest = min(usage.values())
+        return [sentence for sentence in sentences if usage[sentence] == fewest]
+
+    def _can_delete(self, slots, i):
+        # 문단의 마지막 남은 문장은 삭제하지 않습니다. (문단 구조 유지)
+        paragraph = slots[i].paragraph
+        remaining = sum(
+            1 for slot in slots
+            if slot.paragraph == paragraph and (not slot.deleted or slot.inserts)
+        )
+        return remaining > 1 and not slots[i].inserts
+
+    def _insertion_slot(self, slots, key_id):
+        """문장을 덧붙일 위치 (문단의 마지막 편집 가능 문장)"""
+        last_in_paragraph = {}
+        paragraph_counts = {}
+        for i, slot in enumerate(slots):
+            if slot.protected or slot.deleted:
+                continue
+            last_in_paragraph[slot.paragraph] = i
+            # 해당 형태소 출현 수 + 이미 삽입한 문장 수가 적은 문단을 우선 (삽입이 한 문단에 몰리지 않도록)
+            count = len(slot.inserts)
+            if key_id is not None:
+                count += slot.vector[key_id] + sum(vector[key_id] for _, vector in slot.inserts)
+            paragraph_counts[slot.paragraph] = paragraph_counts.get(slot.paragraph, 0) + count
+        if not last_in_paragraph:
+            return None
+        paragraph = min(last_in_paragraph, key=lambda p: (paragraph_counts[p], p))
+        return last_in_paragraph[paragraph]
+
+    def _substitutes(self, morpheme):
+        if morpheme not in self._substitute_cache:
+            candidates = []
+            if self.substitutions_for is not None:
+                try:
+                    candidates = self.substitutions_for(morpheme) or []
+                except Exception as e:
+                    logger.error(f"대체어 조회 실패 ('{morpheme}'): {e}")
+            # 다른 목표 형태소를 포함하는 대체어는 다른 형태소 횟수를 바꾸므로 제외
+            targets = [m for _, m in self.counter.keys if m]
+            safe = [
+                c for c in candidates
+                if isinstance(c, str) and c.strip() and c != morpheme and not any(t in c for t in targets)
+            ]
+            self._substitute_cache[morpheme] = safe[:self.MAX_SUBSTITUTES]
+        return self._substitute_cache[morpheme]
+
+    def _substitute_once(self, text, key_id, substitute):
+        """
+        문장에서 형태소의 첫 번째 독립된 출현을 대체어로 바꿉니다.
+
+        앞뒤에 한글이 붙어 있거나(예: '엔진오일'의 '엔진') 다른 복합 형태소 출현과 겹치는 출현은
+        단어 일부를 바꾸게 되므로 건너뜁니다. 바꿀 수 있는 출현이 없으면 None을 반환합니다. (삭제 후보만 남음)
+        """
+        matches = list(self.counter.iter_matches(text))
+        keys = self.counter.keys
+        compound_spans = [
+            (start, end) for pattern_id, start, end in matches
+            if pattern_id != key_id and keys[pattern_id][0] == 'compound'
+        ]
+        for pattern_id, start, end in matches:
+            if pattern_id != key_id:
+                continue
+            if (start > 0 and _is_hangul(text[start - 1])) or (end < len(text) and _is_hangul(text[end])):
+                continue
+            if any(span_start < end and start < span_end for span_start, span_end in compound_spans):
+                continue
+            return text[:start] + substitute + text[end:]
+        return None
+
+    # ----- 적용 / 지역 탐색 -----
+
+    def _apply(self, slots, move):
+        slot = slots[move['slot']]
+        if move['op'] == 'delete':
+            slot.deleted = True
+        elif move['op'] == 'substitute':
+            slot.text = move['text']
+            slot.vector = move['vector']
+            slot.substitutions += 1
+        else:
+            slot.inserts.append((move['text'], move['vector']))
+
+    def _prune(self, text, operations):
+        """
+        뒤에서부터 연산을 하나씩 빼 보고, 빼도 위반량이 늘지 않으면 제거합니다.
+        (같은 문장에 치환이 여러 번 적용된 경우는 순서 의존성이 있어 제외)
+        """
+        substitution_slots = {}
+        for move in operations:
+            if move['op'] == 'substitute':
+                substitution_slots[move['slot']] = substitution_slots.get(move['slot'], 0) + 1
+
+        def violation_of(ops):
+            slots = self._build_slots(text)
+            for move in ops:
+                self._apply(slots, move)
+            rendered = self._render(slots)
+            return self._violation(self.counter.count_vector(rendered), _char_count(rendered))
+
+        current = violation_of(operations)
+        for index in range(len(operations) - 1, -1, -1):
+            move = operations[index]
+            if move['op'] == 'substitute' and substitution_slots[move['slot']] > 1:
+                continue
+            candidate = operations[:index] + operations[index + 1:]
+            if move['op'] == 'delete' and any(m['slot'] == move['slot'] and m['op'] == 'insert' for m in candidate):
+                continue
+            candidate_violation = violation_of(candidate)
+            if candidate_violation <= current:
+                operations, current = candidate, candidate_violation
+        return operations
+
+    def _render(self, slots):
+        parts = []
+        for slot in slots:
+            texts = ([] if slot.deleted else [slot.text]) + [sentence for sentence, _ in slot.inserts]
+            if texts:
+                parts.append(' '.join(texts) + slot.separator)
+            elif slot.ends_paragraph:
+                # 삭제된 문장이 문단의 끝이면 문단 구분만 남깁니다.
+                if parts:
+                    parts[-1] = parts[-1].rstrip(' ')
+                parts.append(slot.separator)
+        rendered = ''.join(parts)
+        return rendered.rstrip(' ') if slots and slots[-1].deleted else rendered
+
+    @staticmethod
+    def _describe(move):
+        # text: 치환 후 문장 또는 삽입할 문장 (삭제는 None)
+        return {'op': move['op'], 'slot': move['slot'], 'detail': move['detail'], 'text': move.get('text')}
@@ -0,0 +1,78 @@
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+STREAM_CACHE_TIMEOUT = 3600
+
+
+def stream_cache_key(keyword_id, user_id):
+    return f"content_stream_{keyword_id}_{user_id}"
+
+
+class GenerationStream:
+    """
+    스트리밍 생성 중인 부분 텍스트를 캐시에 모아 두는 진행 버퍼
+
+    - 생성 스레드는 begin(stage)으로 단계를 시작하고 write(text)로 받은 조각을 이어 붙입니다.
+    - 캐시 쓰기는 flush_interval/flush_chars 기준으로 묶어서 처리합니다. (조각마다 쓰지 않음)
+    - SSE 엔드포인트는 read()로 버퍼를 읽어 새로 추가된 부분만 클라이언트에 보냅니다.
+
+    버퍼 형식: {'attempt': 단계 시작 번호, 'stage': 단계 이름, 'text': 부분 텍스트, 'done': 완료 여부}
+    (재시도나 검증 단계로 넘어가면 attempt가 바뀌고 text는 처음부터 다시 채워짐)
+    """
+
+    def __init__(self, keyword_id, user_id, flush_interval=0.3, flush_chars=200):
+        self.cache_key = stream_cache_key(keyword_id, user_id)
+        self.flush_interval = flush_interval
+        self.flush_chars = flush_chars
+        self._lock = threading.Lock()
+        self._attempt = 0
+        self._stage = None
+        self._chunks = []
+        self._pending_chars = 0
+        self._last_flush = 0.0
+        self._flush(done=False)
+
+    def begin(self, stage):
+        """새 단계(초안 작성/검증 재작성 등)를 시작합니다. 이전 단계의 부분 텍스트는 버립니다."""
+        with self._lock:
+            self._attempt += 1
+            self._stage = stage
+            self._chunks = []
+            self._flush(done=False)
+
+    def write(self, text):
+        if not text:
+            return
+        with self._lock:
+            self._chunks.append(text)
+            self._pending_chars += len(text)
+            if self._pending_chars >= self.flush_chars or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush(done=False)
+
+    def finish(self):
+        """남은 조각을 쓰고 버퍼를 완료 상태로 표시합니다."""
+        with self._lock:
+            self._flush(done=True)
+
+    def _flush(self, done):
+        self._pending_chars = 0
+        self._last_flush = time.monotonic()
+        try:
+            cache.set(self.cache_key, {
+                'attempt': self._attempt,
+                'stage': self._stage,
+                'text': ''.join(self._chunks),
+                'done': done,
+            }, timeout=STREAM_CACHE_TIMEOUT)
+        except Exception as e:
+            # 진행 버퍼는 보조 기능이므로 실패해도 생성은 계속합니다.
+            logger.warning(f"생성 진행 버퍼 저장 실패: {e}")
+
+    @staticmethod
+    def read(keyword_id, user_id):
+        return cache.get(stream_cache_key(keyword_id, user_id))
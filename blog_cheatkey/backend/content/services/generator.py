@@ -2,21 +2,29 @@
 import re
 import json
 import logging
+import random
 import time
 import traceback
-from urllib.parse import urlparse
 from django.conf import settings
-from konlpy.tag import Okt
+import anthropic
 from anthropic import Anthropic
-from research.models import ResearchSource, StatisticData
 from key_word.models import Keyword, Subtopic
-from content.models import BlogContent, MorphemeAnalysis
+from content.models import BlogContent
+from .analysis_store import save_content_with_analysis
 from accounts.models import User
 from .substitution_generator import SubstitutionGenerator
 from .morpheme_analyzer import MorphemeAnalyzer 
+from .tokenizer import get_tokenizer
+from .llm_executor import get_limiter, run_concurrently
+from .perf import PerfRecorder
+from .research_bundle import load_research_bundle
+from .prompt_prefix import GENERATION_PREFIX, VERIFICATION_PREFIX, anthropic_system_blocks
 
 logger = logging.getLogger(__name__)
 
+# 다중 후보 생성 시 후보별 temperature (후보 수가 더 많으면 처음부터 반복)
+CANDIDATE_TEMPERATURES = (0.7, 0.9, 0.5, 0.8, 0.6)
+
 
 class ContentGenerator:
     """
@@ -28,13 +36,15 @@ class ContentGenerator:
         self.anthropic_api_key = settings.ANTHROPIC_API_KEY
         self.model = "claude-sonnet-4-20250514" # Model updated
         self.client = Anthropic(api_key=self.anthropic_api_key)
-        self.okt = Okt()
+        self.okt = get_tokenizer() # 워커 공유 토크나이저
         self.max_retries = 3 # API 호출 재시도 횟수
         self.retry_delay = 5 # 재시도 간격 (초)
         self.substitution_generator = SubstitutionGenerator()
         self.morpheme_analyzer = MorphemeAnalyzer() # Instance of the new MorphemeAnalyzer
+        # 단계별 소요 시간/호출 횟수 기록 (generate_content 호출마다 새로 생성)
+        self.perf = self.morpheme_analyzer.perf = PerfRecorder('generate')
     
-    def generate_content(self, keyword_id, user_id, target_audience=None, business_info=None, custom_morphemes=None, subtopics_list=None):
+    def generate_content(self, keyword_id, user_id, target_audience=None, business_info=None, custom_morphemes=None, subtopics_list=None, stream=None, candidates=None):
         """
         키워드 기반 블로그 콘텐츠 생성 (최적화 조건 충족)
         
@@ -45,10 +55,22 @@ class ContentGenerator:
             business_info (dict): 사업자 정보
             custom_morphemes (list): 사용자 지정 형태소 목록
             subtopics_list (list): 명시적으로 전달된 소제목 목록 (기본값 None)
+            stream (GenerationStream, optional): 주어지면 Claude 응답을 스트리밍으로 받아
+                부분 텍스트를 이 버퍼에 기록 (SSE 엔드포인트에서 실시간으로 전달)
+            candidates (int, optional): 동시에 요청할 초안 수 (기본값 settings.CONTENT_GENERATION_CANDIDATES).
+                2 이상이면 temperature가 다른 초안을 동시에 생성해 형태소 분석 점수가 가장 좋은 초안을 쓰고,
+                조건을 충족한 초안이 없을 때만 검증 재작성을 요청합니다.
             
         Returns:
             int: 생성된 BlogContent 객체의 ID, 실패 시 None
         """
+        self.perf = self.morpheme_analyzer.perf = PerfRecorder('generate')
+        if candidates is None:
+            candidates = getattr(settings, 'CONTENT_GENERATION_CANDIDATES', 1)
+        candidates = max(1, int(candidates))
+        candidate_summary = None
+        existing_content = None # 키워드/사용자 조회 전에 실패해도 예외 처리에서 참조할 수 있도록
+        research_data = None # 작업 동안 재사용 (재시도/참고자료 생성 단계에서 다시 조회하지 않음)
         for attempt in range(self.max_retries):
             try:
                 keyword_obj = Keyword.objects.get(id=keyword_id)
@@ -59,10 +81,9 @@ class ContentGenerator:
                 if current_subtopics is None:
                     current_subtopics = list(keyword_obj.subtopics.order_by('order').values_list('title', flat=True))
                 
-                news_sources = ResearchSource.objects.filter(keyword=keyword_obj, source_type='news')
-                academic_sources = ResearchSource.objects.filter(keyword=keyword_obj, source_type='academic')
-                general_sources = ResearchSource.objects.filter(keyword=keyword_obj, source_type='general')
-                statistics = StatisticData.objects.filter(source__keyword=keyword_obj)
+                if research_data is None:
+                    with self.perf.stage('research_load'):
+                        research_data = load_research_bundle(keyword_obj)
                 
                 existing_content = BlogContent.objects.filter(
                     keyword=keyword_obj, 
@@ -82,9 +103,7 @@ class ContentGenerator:
                         "expertise": user.profile.expertise if hasattr(user, 'profile') and hasattr(user.profile, 'expertise') else "관련 분야 전문가"
                     },
                     "custom_morphemes": custom_morphemes, 
-                    "research_data": self._format_research_data(
-                        news_sources, academic_sources, general_sources, statistics
-                    )
+                    "research_data": research_data
                 }
                 
                 logger.info(f"콘텐츠 생성 API 호출 시작 (시도 {attempt+1}/{self.max_retries}): 키워드={keyword_text}, 사용자={user.username}")
@@ -92,18 +111,40 @@ class ContentGenerator:
 
                 prompt = self._create_optimized_content_prompt(data_for_prompt)
                 
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=4096,
-                    temperature=0.7,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                
-                logger.info("콘텐츠 생성 API 호출 완료")
-                
-                generated_content_text = response.content[0].text
-                
-                initial_analysis = self.morpheme_analyzer.analyze(generated_content_text, keyword_text, custom_morphemes)
+                if candidates > 1:
+                    drafts = self._generate_candidates(prompt, candidates, stream)
+                    logger.info(f"콘텐츠 생성 API 호출 완료 (초안 {len(drafts)}/{candidates}개)")
+                    
+                    # 모든 초안을 같은 목표 형태소 집합으로 한 번에 분석해 가장 좋은 초안을 고릅니다.
+                    with self.perf.stage('analyze'):
+                        ranked = self.morpheme_analyzer.analyze_many([text for _, text in drafts], keyword_text, custom_morphemes)
+                    best = ranked[0]
+                    generated_content_text = drafts[best['index']][1]
+                    initial_analysis = best['analysis']
+                    candidate_summary = [
+                        {
+                            'temperature': drafts[item['index']][0],
+                            'selected': item is best,
+                            'is_fully_optimized': item['score']['is_fully_optimized'],
+                            'char_count': item['score']['char_count'],
+                            'invalid_morphemes': item['score']['invalid_morphemes'],
+                        }
+                        for item in ranked
+                    ]
+                    self.perf.update({
+                        'candidates': len(drafts),
+                        'candidates_optimized': sum(1 for item in ranked if item['score']['is_fully_optimized']),
+                    })
+                    logger.info(f"초안 선택: temperature={drafts[best['index']][0]}, 최적화 충족={initial_analysis['is_fully_optimized']}")
+                else:
+                    response = self._create_message(prompt, temperature=0.7, stage='llm.generate', stream=stream, prefix=GENERATION_PREFIX)
+                    
+                    logger.info("콘텐츠 생성 API 호출 완료")
+                    
+                    generated_content_text = response.content[0].text
+                    
+                    with self.perf.stage('analyze'):
+                        initial_analysis = self.morpheme_analyzer.analyze(generated_content_text, keyword_text, custom_morphemes)
                 
                 final_content_to_save = generated_content_text
                 final_analysis_for_db = initial_analysis
@@ -119,15 +160,11 @@ class ContentGenerator:
                         initial_analysis
                     )
                     
-                    optimization_response = self.client.messages.create(
-                        model=self.model,
-                        max_tokens=4096,
-                        temperature=0.5,
-                        messages=[{"role": "user", "content": optimization_prompt}]
-                    )
+                    optimization_response = self._create_message(optimization_prompt, temperature=0.5, stage='llm.verify', stream=stream, prefix=VERIFICATION_PREFIX)
                     
                     optimized_content_after_verify_prompt = optimization_response.content[0].text
-                    analysis_after_verify_prompt = self.morpheme_analyzer.analyze(optimized_content_after_verify_prompt, keyword_text, custom_morphemes)
+                    with self.perf.stage('analyze'):
+                        analysis_after_verify_prompt = self.morpheme_analyzer.analyze(optimized_content_after_verify_prompt, keyword_text, custom_morphemes)
                     
                     logger.info(f"추가 최적화 시도 후 결과: 글자수={analysis_after_verify_prompt['char_count']}, 목표형태소 유효={analysis_after_verify_prompt['is_valid_morphemes']}")
 
@@ -145,7 +182,7 @@ class ContentGenerator:
                 if existing_content:
                     existing_content.delete()
                 
-                blog_content = BlogContent.objects.create(
+                blog_content = BlogContent(
                     user=user,
                     keyword=keyword_obj,
                     title=f"{keyword_text} 완벽 가이드", 
@@ -153,49 +190,47 @@ class ContentGenerator:
                     mobile_formatted_content=mobile_formatted_content,
                     references=references_list,
                     char_count=final_analysis_for_db['char_count'],
-                    is_optimized=final_analysis_for_db['is_fully_optimized'] 
+                    is_optimized=final_analysis_for_db['is_fully_optimized'],
+                    # 단계별 소요 시간/호출 횟수 (저장 단계 시간은 아래 로그 레코드에만 포함)
+                    meta_data={'perf': self.perf.to_dict(), **({'candidates': candidate_summary} if candidate_summary else {})}
                 )
                 
-                logger.info("형태소 분석 결과 저장 시작")
-                if 'morpheme_analysis' in final_analysis_for_db and 'counts' in final_analysis_for_db['morpheme_analysis']:
-                    for morpheme, info in final_analysis_for_db['morpheme_analysis']['counts'].items():
-                        MorphemeAnalysis.objects.create(
-                            content=blog_content,
-                            morpheme=morpheme,
-                            count=info.get('count', 0),
-                            is_valid=info.get('is_valid', False),
-                            morpheme_type=info.get('type', 'unknown') # Save morpheme type
-                        )
+                # 콘텐츠와 형태소 분석 결과를 한 트랜잭션에서 저장
+                logger.info("콘텐츠 및 형태소 분석 결과 저장 시작")
+                with self.perf.stage('save'):
+                    save_content_with_analysis(blog_content, final_analysis_for_db)
+                self.perf.log(content_id=blog_content.id, keyword=keyword_text, attempts=attempt + 1)
                 
                 logger.info(f"콘텐츠 생성 완료: ID={blog_content.id}")
                 return blog_content.id
                     
-            except anthropic.OverloadedError as e:
-                logger.warning(f"Anthropic API 과부하 (시도 {attempt+1}/{self.max_retries}). 오류: {e}")
-                if attempt >= self.max_retries - 1:
-                    logger.error("최대 재시도 횟수 초과. API 과부하가 지속됩니다.")
-                    if existing_content:
-                        existing_content.title = f"{keyword_text} (생성 실패)"
-                        existing_content.content = f"콘텐츠 생성 중 최종 오류 발생: {str(e)}"
-                        existing_content.save()
-                    return None
-                
-                # Exponential backoff: 1s, 2s, 4s, ... + random jitter
-                wait_time = (2 ** attempt) + random.random()
-                logger.info(f"{wait_time:.2f}초 후 재시도합니다.")
-                time.sleep(wait_time)
-
             except anthropic.APIError as e:
-                logger.error(f"콘텐츠 생성 중 API 오류 발생 (시도 {attempt+1}/{self.max_retries}): {e}")
-                traceback.print_exc()
+                # anthropic 0.48은 OverloadedError를 패키지 최상위에서 내보내지 않으므로 상태 코드(529)로 과부하를 구분합니다.
+                overloaded = getattr(e, 'status_code', None) == 529
+                if overloaded:
+                    logger.warning(f"Anthropic API 과부하 (시도 {attempt+1}/{self.max_retries}). 오류: {e}")
+                else:
+                    logger.error(f"콘텐츠 생성 중 API 오류 발생 (시도 {attempt+1}/{self.max_retries}): {e}")
+                    traceback.print_exc()
                 if attempt >= self.max_retries - 1:
-                    logger.error("최대 재시도 횟수 초과. API 오류로 콘텐츠 생성 실패.")
+                    if overloaded:
+                        logger.error("최대 재시도 횟수 초과. API 과부하가 지속됩니다.")
+                    else:
+                        logger.error("최대 재시도 횟수 초과. API 오류로 콘텐츠 생성 실패.")
                     if existing_content:
                         existing_content.title = f"{keyword_text} (생성 실패)"
                         existing_content.content = f"콘텐츠 생성 중 최종 오류 발생: {str(e)}"
                         existing_content.save()
                     return None
-                time.sleep(self.retry_delay) # Fixed delay for other API errors
+                
+                self.perf.incr('retries')
+                if overloaded:
+                    # Exponential backoff: 1s, 2s, 4s, ... + random jitter
+                    wait_time = (2 ** attempt) + random.random()
+                    logger.info(f"{wait_time:.2f}초 후 재시도합니다.")
+                    time.sleep(wait_time)
+                else:
+                    time.sleep(self.retry_delay) # Fixed delay for other API errors
 
             except Exception as e:
                 logger.error(f"콘텐츠 생성 중 예기치 않은 오류 발생: {e}")
@@ -205,27 +240,88 @@ class ContentGenerator:
                     existing_content.content = f"콘텐츠 생성 중 최종 오류 발생: {str(e)}"
                     existing_content.save()
                 return None # For unexpected errors, fail fast
-                    
-    def _format_research_data(self, news_sources, academic_sources, general_sources, statistics):
-        research_data = {'news': [], 'academic': [], 'general': [], 'statistics': []}
-        
-        for source_type, sources in [('news', news_sources), ('academic', academic_sources), ('general', general_sources)]:
-            for source in sources.order_by('-published_date')[:5]:
-                research_data[source_type].append({
-                    'title': source.title, 'url': source.url, 'snippet': source.snippet,
-                    'date': source.published_date.isoformat() if source.published_date else '',
-                    'source': source.author or urlparse(source.url).netloc
-                })
-        
-        for stat in statistics.order_by('-source__published_date')[:5]:
-            research_data['statistics'].append({
-                'value': stat.value, 'context': stat.context, 'pattern_type': stat.pattern_type,
-                'source_url': stat.source.url, 'source_title': stat.source.title,
-                'source': stat.source.author or urlparse(stat.source.url).netloc,
-                'date': stat.source.published_date.isoformat() if stat.source.published_date else ''
-            })
-        return research_data
-    
+
+    def _generate_candidates(self, prompt, count, stream=None):
+        """
+        같은 프롬프트로 temperature가 다른 초안 count개를 동시에 요청합니다.
+        실제 동시 호출 수는 공유 제한기(anthropic)가 제한하므로 ANTHROPIC_MAX_CONCURRENCY보다 많은 초안은 순서를 기다립니다.
+        스트리밍 버퍼에는 첫 번째 초안만 기록합니다.
+
+        Returns:
+            list: 성공한 초안의 [(temperature, 텍스트), ...] (요청 순서 유지)
+                  모든 초안이 실패하면 첫 번째 오류를 그대로 발생시켜 호출한 쪽의 재시도 로직을 따릅니다.
+        """
+        temperatures = [CANDIDATE_TEMPERATURES[i % len(CANDIDATE_TEMPERATURES)] for i in range(count)]
+
+        def request_draft(index):
+            try:
+                response = self._create_message(
+                    prompt, temperature=temperatures[index], stage='llm.generate',
+                    stream=stream if index == 0 else None, prefix=GENERATION_PREFIX
+                )
+                return response.content[0].text, None
+            except Exception as e:
+                logger.warning(f"초안 {index + 1}/{count} 생성 실패 (temperature={temperatures[index]}): {e}")
+                return None, e
+
+        results = run_concurrently(request_draft, range(count), max_workers=count)
+        drafts = [(temperatures[i], text) for i, (text, _) in enumerate(results) if text]
+        if not drafts:
+            errors = [error for _, error in results if error is not None]
+            if errors:
+                raise errors[0]
+            raise ValueError("생성된 초안이 없습니다.")
+        return drafts
+
+    def _create_message(self, prompt, temperature, stage, stream=None, prefix=None):
+        """
+        Claude 호출 공통 함수. 워커 전체에서 공유하는 동시 호출 수 제한을 거치고
+        호출 횟수/토큰 사용량/소요 시간(제한기 대기 포함)을 self.perf에 기록합니다.
+
+        prefix(PromptPrefix)가 주어지면 고정 지시문을 cache_control이 붙은 system 블록으로 보내고,
+        prompt에는 요청마다 달라지는 부분만 넣습니다.
+
+        stream(GenerationStream)이 주어지면 스트리밍 API로 받으면서 부분 텍스트를 버퍼에 쓰고,
+        완료 후에는 messages.create()와 같은 형식의 최종 메시지를 반환합니다.
+        """
+        request = dict(
+            model=self.model,
+            max_tokens=4096,
+            temperature=temperature,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        if prefix is not None:
+            request['system'] = anthropic_system_blocks(prefix)
+        self.perf.incr('llm_calls')
+        try:
+            with self.perf.stage(stage), get_limiter('anthropic'):
+                if stream is None:
+                    response = self.client.messages.create(**request)
+                else:
+                    stream.begin(stage)
+                    requested_at, first_text_at = time.monotonic(), None
+                    with self.client.messages.stream(**request) as message_stream:
+                        for text in message_stream.text_stream:
+                            if first_text_at is None:
+                                first_text_at = time.monotonic()
+                            stream.write(text)
+                        response = message_stream.get_final_message()
+                    if first_text_at is not None:
+                        # 스트리밍 시작 후 첫 텍스트가 도착할 때까지의 시간 (체감 대기 시간)
+                        self.perf.add_time(f'{stage}.first_text', first_text_at - requested_at)
+        except Exception:
+            self.perf.incr('llm_errors')
+            raise
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            # input_tokens에는 캐시에서 읽은/캐시에 쓴 토큰이 포함되지 않습니다.
+            cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+            cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+            self.perf.incr('llm_tokens', (getattr(usage, 'input_tokens', 0) or 0) + (getattr(usage, 'output_tokens', 0) or 0) + cache_read + cache_write)
+            self.perf.incr('llm_cache_read_tokens', cache_read)
+            self.perf.incr('llm_cache_write_tokens', cache_write)
+        return response
+
     def _create_optimized_content_prompt(self, data):
         keyword = data["keyword"]
         custom_morphemes = data.get("custom_morphemes", [])
@@ -285,83 +381,36 @@ class ContentGenerator:
             statistics_text = "\n(활용 가능한 특정 통계 자료가 없습니다. 일반적인 경향이나 중요성을 언급해주세요.)\n"
 
 
-        optimization_requirements = f"""
-        ⚠️ 중요: 다음 최적화 조건을 반드시 준수해야 합니다.
-
-        1. 글자수 조건: 정확히 {target_min_chars}-{target_max_chars}자 (공백 제외, 참고자료 섹션 제외)
-        - 내용을 간결하게 유지하거나 필요시 확장하여 이 범위에 맞추기
-
-        2. 키워드 및 주요 형태소 출현 횟수 조건:
-        {keyword_instruction}
-        - 중요: Ctrl+F로 검색했을 때 위에 언급된 모든 키워드와 형태소가 각각 지정된 범위 내에 있어야 합니다!
-
-        3. 키워드 최적화 방법:
-        - 지시어 활용: "{keyword}는" → "이것은" 등
-        - 자연스러운 생략: 문맥상 이해 가능한 경우 생략
-        - 동의어/유사어 대체: 과다 사용된 단어를 적절한 동의어로 대체 (단, 목표 형태소는 유지)
-
-        ✓ 최종 검증: 생성 완료 후, 위에 언급된 모든 목표 키워드/형태소가 **각각** 지정된 범위 내에 있는지, 글자수가 맞는지 **반드시** 재확인하세요. **최대 횟수를 단 1회라도 초과해서는 안 됩니다. 차라리 최소 횟수보다 약간 부족한 것이 낫습니다.** 이 규칙은 절대적입니다.
-        """
         logger.info(f"프롬프트에 전달되는 소제목: {data.get('subtopics', [])}")
         subtopics_for_prompt = data.get('subtopics', [])
         subtopic_lines = ""
         if subtopics_for_prompt:
             for i, st_title in enumerate(subtopics_for_prompt):
-                subtopic_lines += f"        ### {st_title}\n"
+                subtopic_lines += f"### {st_title}\n"
         else:
-            subtopic_lines = "        (소제목 없이 자유롭게 본론 구성)\n"
-
-
-        prompt = f"""
-        당신은 {data.get('target_audience', {}).get('persona', '전문 블로그 작가')}입니다. 다음 지침에 따라 '{keyword}' 키워드에 대한 블로그 게시물을 작성해 주세요.
-
-        ## 최종 목표: 독자가 글을 끝까지 읽고, 제시된 해결책에 만족하며, {data.get('business_info', {}).get('name', '우리 회사')}를 신뢰하게 만드는 것
+            subtopic_lines = "(소제목 없이 자유롭게 본론 구성)\n"
 
-        ---
+        # 고정 지시문은 GENERATION_PREFIX(system, 프롬프트 캐시)로 보내고, 여기서는 이번 글에 해당하는 정보만 만듭니다.
+        prompt = f"""========== 이번 글 정보 ==========
 
-        ### **블로그 게시물 작성 필수 지침**
+- 키워드: '{keyword}'
+- 업체명: {business_info.get('name', '우리 회사')}
+- 작성자 페르소나: {target_audience.get('persona', '해당 분야의 깊이 있는 전문가')}
+- 타겟 독자: {target_audience.get('description', '초보자부터 전문가까지 모두')}
+- 글의 목적: {target_audience.get('goal', '정보 제공 및 문제 해결')}
+- 어조와 스타일: {target_audience.get('tone_and_style', '전문적이고 신뢰감 있지만, 이해하기 쉬운 어조')}
 
-        1.  **페르소나 및 타겟 독자:**
-            -   **작성자 페르소나:** {data.get('target_audience', {}).get('persona', '해당 분야의 깊이 있는 전문가')}
-            -   **타겟 독자:** {data.get('target_audience', {}).get('description', '초보자부터 전문가까지 모두')}
-            -   **글의 목적:** {data.get('target_audience', {}).get('goal', '정보 제공 및 문제 해결')}
-            -   **어조와 스타일:** {data.get('target_audience', {}).get('tone_and_style', '전문적이고 신뢰감 있지만, 이해하기 쉬운 어조')}
-
-        2.  **[필수] 서론 작성 가이드 (전문성 어필, 공감, 강력한 유도):**
-            -   **공감 형성:** 독자가 '{keyword}' 문제로 겪는 '구체적인 불편함'과 '답답한 감정'을 정확히 짚어내며 깊은 공감대를 형성하세요. (예: "혹시 '{keyword}' 문제 때문에 밤잠 설치고 계신가요? 수많은 정보를 찾아봤지만, 결국 시간만 낭비한 것 같아 허탈하신가요?")
-            -   **전문성 어필 및 신뢰 구축:** "{data.get('business_info', {}).get('name', '우리 회사')}는 이 분야의 전문가로서 수많은 고객들의 문제를 해결해왔습니다. 그 경험과 노하우를 바탕으로, 여러분의 시간을 아껴줄 가장 효과적인 방법만을 알려드리겠습니다." 와 같이 저희의 전문성을 드러내 독자가 글을 신뢰하게 만드세요.
-            -   **해결책 약속:** 이 글이 단순 정보 나열이 아닌, 문제를 '해결'할 '검증된 방법'과 '실용적인 팁'을 제공한다는 점을 명확히 약속하세요.
-            -   **독서 유도:** "이 글을 단 5분만 투자해서 끝까지 읽으신다면, 더 이상 헤매지 않고 문제를 해결할 명확한 청사진을 얻게 될 것입니다." 와 같이, 글을 놓치면 손해라는 인식을 주어 끝까지 읽도록 강력하게 유도하세요.
-
-        3.  **본문 작성 가이드:**
-            -   제공된 소제목(`subtopics`)을 모두 사용하여 본문을 구성하세요. 소제목은 `###` 마크다운을 사용하세요.
-            -   소제목 목록:
+소제목 목록:
 {subtopic_lines}
-            -   각 소제목 아래에는 최소 2-3개의 문단을 작성하여 내용을 풍부하게 만드세요.
-            -   독자의 이해를 돕기 위해, 전문 용어는 쉽게 풀어서 설명하고, 필요한 경우 실제 예시를 들어주세요.
-            -   제공된 참고 자료(뉴스, 학술, 일반, 통계)를 본문 내용에 자연스럽게 인용하여 글의 신뢰도를 높여주세요. 통계 자료는 최소 1개 이상 반드시 인용해야 합니다.
-
-        4.  **참고 자료 활용:**
-            {research_text}
-            {statistics_text}
-            - **중요 인용 지침:** 본문에서 [1], [2]와 같은 인용번호 표시는 절대 사용하지 마세요. 대신 "X 보고서에 따르면" 또는 "Y 연구 결과에 의하면" 등 출처 이름을 직접 언급하는 방식으로 인용하세요. 본문에 URL을 포함하지 마세요.
-
-        5.  **최적화 요구사항:**
-            {optimization_requirements}
-
-        6.  **[필수] 결론 작성 가이드 (신뢰 구축 및 행동 유도):**
-            -   본문의 핵심 내용을 단순히 요약하는 것을 넘어, 독자가 '이제 무엇을 해야 할지' 명확히 알 수 있도록 행동 지침을 제시하며 마무리합니다.
-            -   "오늘 알려드린 방법을 당장 적용해보세요." 와 같이, 독자가 실천으로 옮기도록 자신감을 불어넣고 격려해주세요.
-            -   **가장 중요:** "만약 알려드린 방법으로도 문제가 해결되지 않거나, 상황이 급박하여 전문가의 즉각적인 조치가 필요하다면, 한순간도 주저하지 말고 저희에게 연락 주세요. 신속하게 도와드리겠습니다." 라는 문구를 **반드시 포함**하여, 독자가 막막할 때 기댈 수 있는 든든한 전문가라는 인식을 심어주세요.
-            -   독자와의 상호작용을 유도하는 질문을 던지세요. (예: "'{keyword}'에 대해 더 궁금한 점이 있다면 댓글로 알려주세요.")
-
-        7.  **참고 자료 섹션:**
-            -   글의 마지막에는 `## 참고자료` 라는 제목으로 섹션을 만들고, 본문 작성에 활용한 모든 참고 자료의 출처를 명확하게 밝혀주세요. (이 섹션은 글자수 카운트에서 제외됩니다.)
-
-        ---
-
-        이제 위의 모든 지침을 종합하여, 독자의 기대를 뛰어넘는 고품질 블로그 게시물 작성을 시작해 주세요.
-        """
+최적화 목표:
+- 글자수: {target_min_chars}-{target_max_chars}자 (공백 제외, 참고자료 섹션 제외)
+{keyword_instruction}
+
+참고 자료:
+{research_text}
+{statistics_text}
+이제 지침을 종합하여, 독자의 기대를 뛰어넘는 '{keyword}' 블로그 게시물 작성을 시작해 주세요.
+"""
         return prompt
     
     def _create_verification_optimization_prompt(self, content, keyword, custom_morphemes, verification_result):
@@ -405,36 +454,18 @@ class ContentGenerator:
         
         optimization_strategies = self._generate_dynamic_optimization_strategies(keyword, current_counts, base_morphemes + compound_morphemes)
         
-        return f"""
-        다음 블로그 콘텐츠를 최적화해주세요. 다음 조건을 모두 충족하도록 수정해주세요:
-        
-        ========== 최적화 목표 ==========
-        
-        1. 글자수 조건: {target_min_chars}-{target_max_chars}자 (공백 제외)
-           {char_count_guidance}
-        
-        2. 목표 형태소 출현 횟수 조건:
-           {morpheme_issues_text}
+        # 카운팅 방식/일반 전략/지침은 VERIFICATION_PREFIX(system, 프롬프트 캐시)로 보냅니다.
+        return f"""========== 최적화 목표 ==========
 
-        3. 키워드 및 형태소 카운팅 방식:
-           - 핵심 기본 형태소 (예: '엔진', '오일', '종류'): 문장 내에서 부분적으로 포함되어도 카운트됩니다. (예: '엔진오일종류'에서 '엔진' 1회, '오일' 1회, '종류' 1회)
-           - 복합 키워드 및 구문 (예: '엔진오일', '엔진오일종류'): 정확히 해당 구문이 일치해야 카운트됩니다.
+1. 글자수 조건: {target_min_chars}-{target_max_chars}자 (공백 제외)
+   {char_count_guidance}
 
-        ========== 최적화 전략 ==========
-        {optimization_strategies}
-        
-        ========== 중요 지침 ==========
-        
-        1. 콘텐츠의 핵심 메시지와 전문성은 유지하세요.
-        2. 모든 소제목과 주요 섹션을 유지하세요.
-        3. 자연스러운 문체와 흐름을 유지하세요.
-        4. 모든 통계 자료 인용과 출처 표시를 유지하세요.
-        5. 조정 후에는 반드시 위에 언급된 각 목표 형태소가 지정된 범위 내에서 사용되었는지, 글자수가 맞는지 확인하세요.
-        6. 결과물만 제시하고 추가 설명은 하지 마세요.
-        
-        ========== 원본 콘텐츠 ==========
-        {content}
-        """
+2. 목표 형태소 출현 횟수 조건:
+{morpheme_issues_text}
+{optimization_strategies}
+========== 원본 콘텐츠 ==========
+{content}
+"""
     
     def _generate_dynamic_optimization_strategies(self, keyword, current_morpheme_counts, all_target_morphemes_list):
         excess_morphemes = []
@@ -462,21 +493,7 @@ class ContentGenerator:
             elif count < target_min:
                 lacking_morphemes.append(morpheme)
         
-        strategies = """
-        1. 과다 사용된 목표 형태소 감소 방법:
-           - 동의어/유사어 대체: (단, 대체어는 목표 형태소가 아니어야 하며, 해당 형태소의 카운팅 방식(부분/정확)을 고려하여 대체)
-           - 지시어 사용: "이것", "그것", "해당 내용" 등으로 대체
-           - 자연스러운 생략: 문맥상 이해 가능한 경우 생략
-           - 다른 표현으로 문장 재구성: 같은 의미를 다른 방식으로 표현
-           - 해당 형태소가 포함된 문장 전체를 문맥상 자연스럽게 삭제하거나, 형태소만 제거하여 문장을 간결하게 만드세요.
-
-        2. 부족한 목표 형태소 증가 방법:
-           - 구체적인 예시나 사례 추가: 해당 목표 형태소가 포함된 예시 추가
-           - 설명 확장: 핵심 개념에 대한 추가 설명 제공 (목표 형태소 사용)
-           - 실용적인 팁이나 조언 추가: 목표 형태소가 포함된 팁 제시
-           - 기존 문장 분리 또는 확장: 한 문장을 두 개로 나누거나 확장하여 목표 형태소 사용 기회 증가
-        """
-        
+        # 일반 감소/증가 전략은 VERIFICATION_PREFIX에 있으므로 여기서는 이번 글의 대체어 예시만 만듭니다.
         substitution_text = "\n3. 유용한 대체어 예시 (과다 형태소 감소 시):"
         added_subs = False
         
@@ -487,7 +504,7 @@ class ContentGenerator:
                 substitution_text += f"\n   - '{morpheme}' 대체어: {', '.join(morpheme_substitutions[:3])}"
                 added_subs = True
         
-        return strategies + (substitution_text if added_subs else "")
+        return substitution_text + "\n" if added_subs else ""
         
     def _add_references(self, content, research_data):
         if "## 참고자료" in content: return content
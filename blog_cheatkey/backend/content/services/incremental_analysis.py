@@ -0,0 +1,255 @@
+import re
+from bisect import bisect_right
+
+# 문장 종결 부호 뒤의 공백, 또는 빈 줄(문단 구분)에서 문장을 나눕니다.
+SENTENCE_SEPARATOR_PATTERN = re.compile(r'(?<=[.!?])\s+|\s*\n[ \t]*\n\s*')
+
+
+def split_sentence_units(text):
+    """
+    텍스트를 (문장, 뒤따르는 구분 공백) 목록으로 나눕니다.
+    모든 항목의 문장+구분자를 이어 붙이면 원문과 정확히 같습니다.
+    """
+    units = []
+    position = 0
+    for match in SENTENCE_SEPARATOR_PATTERN.finditer(text):
+        if match.start() == position and units:
+            # 연속된 구분자는 앞 문장의 구분자에 합칩니다.
+            units[-1][1] += match.group()
+        else:
+            units.append([text[position:match.start()], match.group()])
+        position = match.end()
+    if position < len(text) or not units:
+        units.append([text[position:], ''])
+    return [(sentence, separator) for sentence, separator in units]
+
+
+def _char_count(text):
+    # MorphemeAnalyzer.analyze 의 글자수 정의와 동일 (공백 문자 ' ' 만 제외)
+    return len(text) - text.count(' ')
+
+
+class _SentenceUnit:
+    __slots__ = ('text', 'separator', 'vector', 'chars')
+
+    def __init__(self, text, separator, vector):
+        self.text = text
+        self.separator = separator
+        self.vector = vector
+        self.chars = _char_count(text) + _char_count(separator)
+
+    @property
+    def length(self):
+        return len(self.text) + len(self.separator)
+
+    @property
+    def ends_paragraph(self):
+        return self.separator.count('\n') >= 2
+
+
+class IncrementalAnalysis:
+    """
+    문장/문단 단위 형태소 카운트를 보관하고, 수정된 구간만 다시 세어 전체 합계를 갱신하는 분석 객체
+
+    - 문서를 한 번 나누고 문장별 카운트를 계산한 뒤에는, 문장 교체/삭제나 구간 교체 시
+      바뀐 문장만 MorphemeCounter로 다시 세므로 편집 비용이 문서 길이가 아닌 편집 크기에 비례합니다.
+    - 문장은 공백(또는 빈 줄)으로 구분되므로 문장 단독 카운트의 합은 전체 텍스트 카운트와 같습니다.
+      (목표 형태소 자체에 '문장부호+공백'이 포함된 경우는 예외)
+    """
+
+    def __init__(self, content, counter):
+        self.counter = counter
+        self._units = [self._make_unit(sentence, separator) for sentence, separator in split_sentence_units(content)]
+        self._totals = [0] * len(counter.keys)
+        self.char_count = 0
+        for unit in self._units:
+            self._add_to_totals(unit, 1)
+
+        # 문자 오프셋 -> 문장 인덱스 조회용 누적 시작 위치 (편집 지점 이후만 지연 재계산)
+        self._offsets = []
+        self._offsets_valid = 0
+        # 편집할 때마다 1씩 증가 (텍스트를 직렬화하지 않고 변경 여부 확인)
+        self.revision = 0
+
+    # ----- 조회 -----
+
+    @property
+    def text(self):
+        return ''.join(unit.text + unit.separator for unit in self._units)
+
+    def __len__(self):
+        return len(self._units)
+
+    def count(self, kind, morpheme):
+        """전체 문서에서 형태소 출현 횟수"""
+        return self._totals[self.counter.key_index[(kind, morpheme)]]
+
+    @property
+    def counts(self):
+        """{'base': {...}, 'compound': {...}} 형식의 전체 카운트"""
+        return self.counter.to_counts(self._totals)
+
+    def sentence(self, index):
+        return self._units[index].text
+
+    def sentence_count(self, index, kind, morpheme):
+        return self._units[index].vector[self.counter.key_index[(kind, morpheme)]]
+
+    def sentences_containing(self, kind, morpheme):
+        """형태소가 1회 이상 등장하는 문장 인덱스 목록"""
+        key = self.counter.key_index[(kind, morpheme)]
+        return [i for i, unit in enumerate(self._units) if unit.vector[key] > 0]
+
+    def paragraphs(self):
+        """
+        문단별 (문장 인덱스 목록, 글자수, 카운트 리스트)를 반환합니다.
+        문장별 카운트를 더하기만 하므로 텍스트를 다시 스캔하지 않습니다.
+        """
+        result = []
+        indices, chars, vector = [], 0, [0] * len(self.counter.keys)
+        for i, unit in enumerate(self._units):
+            indices.append(i)
+            chars += unit.chars
+            vector = [a + b for a, b in zip(vector, unit.vector)]
+            if unit.ends_paragraph or i == len(self._units) - 1:
+                result.append({'sentences': indices, 'chars': chars, 'counts': self.counter.to_counts(vector)})
+                indices, chars, vector = [], 0, [0] * len(self.counter.keys)
+        return result
+
+    def separator(self, index):
+        """index 번째 문장 뒤의 구분 공백"""
+        return self._units[index].separator
+
+    @property
+    def text_length(self):
+        """전체 텍스트 길이 (텍스트를 이어 붙이지 않고 계산)"""
+        if not self._units:
+            return 0
+        self._ensure_offsets()
+        return self._offsets[-1] + self._units[-1].length
+
+    def sentence_span(self, index):
+        """index 번째 문장의 전체 텍스트 기준 (시작, 끝) 오프셋 (뒤따르는 구분 공백 제외)"""
+        self._ensure_offsets()
+        start = self._offsets[index]
+        return start, start + len(self._units[index].text)
+
+    def sentence_index_at(self, offset):
+        """문자 오프셋이 속한 문장 인덱스"""
+        self._ensure_offsets()
+        return max(0, bisect_right(self._offsets, offset) - 1)
+
+    # ----- 편집 -----
+
+    def snapshot(self):
+        """현재 상태를 저장합니다. (문장 단위 객체는 교체만 되고 수정되지 않으므로 목록 복사로 충분)"""
+        return list(self._units), list(self._totals), self.char_count
+
+    def restore(self, snapshot):
+        """snapshot()으로 저장한 상태로 되돌립니다."""
+        units, totals, char_count = snapshot
+        self._units = list(units)
+        self._totals = list(totals)
+        self.char_count = char_count
+        self._invalidate_offsets(-1)
+        self.revision += 1
+
+    def replace_sentence(self, index, new_text):
+        """
+        index 번째 문장을 new_text로 교체합니다. 빈 문자열이면 문장을 삭제합니다.
+        new_text가 여러 문장이면 여러 문장으로 나뉘어 들어갑니다.
+        """
+        unit = self._units[index]
+        if not new_text.strip():
+            self._delete_unit(index)
+            return
+        self._splice(index, index + 1, new_text + unit.separator)
+
+    def replace_span(self, start, end, new_text):
+        """
+        전체 텍스트 기준 [start, end) 구간을 new_text로 교체하고, 해당 구간의 문장만 다시 카운트합니다.
+        """
+        if not self._units:
+            self._splice(0, 0, new_text)
+            return
+        self._ensure_offsets()
+        first = self.sentence_index_at(start)
+        last = self.sentence_index_at(max(start, end - 1)) if end > start else first
+        region_start = self._offsets[first]
+        region_text = ''.join(unit.text + unit.separator for unit in self._units[first:last + 1])
+        local_start = start - region_start
+        local_end = end - region_start
+        self._splice(first, last + 1, region_text[:local_start] + new_text + region_text[local_end:])
+
+    def _delete_unit(self, index):
+        unit = self._units[index]
+        # 문단 구분(빈 줄)은 앞 문장에 넘겨 문단 경계를 유지합니다.
+        if index > 0 and unit.ends_paragraph and not self._units[index - 1].ends_paragraph:
+            previous = self._units[index - 1]
+            self._add_to_totals(previous, -1)
+            self._units[index - 1] = self._make_unit(previous.text, unit.separator, previous.vector)
+            self._add_to_totals(self._units[index - 1], 1)
+        self._add_to_totals(unit, -1)
+        del self._units[index]
+        self._invalidate_offsets(index - 1)
+        self.revision += 1
+
+    def _splice(self, first, stop, region_text):
+        # 편집 구간이 문장 구분자로 끝나지 않으면 다음 문장과 이어지므로 함께 다시 나눕니다.
+        # (문서 끝을 제외한 모든 문장은 구분자를 가진다는 불변식을 유지)
+        pieces = split_sentence_units(region_text) if region_text.strip() else []
+        while pieces and not pieces[-1][1] and stop < len(self._units):
+            next_unit = self._units[stop]
+            region_text += next_unit.text + next_unit.separator
+            stop += 1
+            pieces = split_sentence_units(region_text)
+
+        for unit in self._units[first:stop]:
+            self._add_to_totals(unit, -1)
+
+        new_units = []
+        if pieces:
+            new_units = [self._make_unit(sentence, separator) for sentence, separator in pieces]
+        elif region_text and first > 0:
+            # 공백만 남으면 앞 문장의 구분자에 붙입니다.
+            previous = self._units[first - 1]
+            self._add_to_totals(previous, -1)
+            self._units[first - 1] = self._make_unit(previous.text, previous.separator + region_text, previous.vector)
+            self._add_to_totals(self._units[first - 1], 1)
+        elif region_text:
+            new_units = [self._make_unit('', region_text)]
+
+        for unit in new_units:
+            self._add_to_totals(unit, 1)
+        self._units[first:stop] = new_units
+        self._invalidate_offsets(first - 1)
+        self.revision += 1
+
+    # ----- 내부 -----
+
+    def _make_unit(self, text, separator, vector=None):
+        if vector is None:
+            vector = self.counter.count_vector(text)
+        return _SentenceUnit(text, separator, vector)
+
+    def _add_to_totals(self, unit, sign):
+        totals = self._totals
+        for i, value in enumerate(unit.vector):
+            if value:
+                totals[i] += sign * value
+        self.char_count += sign * unit.chars
+
+    def _invalidate_offsets(self, index):
+        self._offsets_valid = max(0, min(self._offsets_valid, index + 1))
+
+    def _ensure_offsets(self):
+        offsets = self._offsets
+        del offsets[self._offsets_valid:]
+        position = 0
+        if offsets:
+            last = self._units[len(offsets) - 1]
+            position = offsets[-1] + last.length
+        for unit in self._units[len(offsets):]:
+            offsets.append(position)
+            position += unit.length
+        self._offsets_valid = len(offsets)
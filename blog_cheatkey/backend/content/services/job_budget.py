@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceeded(Exception):
+    """작업 예산(시간/LLM 호출 수/토큰)을 모두 사용했을 때 발생"""
+
+
+class JobBudget:
+    """
+    최적화 작업 하나의 실행 예산 (경과 시간, LLM 호출 수, 토큰 수)
+
+    - 한도가 0 또는 None이면 해당 항목은 제한하지 않습니다.
+    - 동시에 실행되는 API 요청 스레드들이 같은 예산을 공유하므로 기록은 잠금으로 보호합니다.
+    - on_update(budget)를 지정하면 사용량이 바뀔 때마다 호출합니다. (상태 조회용 캐시 갱신 등)
+    """
+
+    def __init__(self, max_seconds=None, max_llm_calls=None, max_tokens=None, on_update=None):
+        self.max_seconds = max_seconds or None
+        self.max_llm_calls = max_llm_calls or None
+        self.max_tokens = max_tokens or None
+        self.on_update = on_update
+        self.started_at = time.monotonic()
+        self.llm_calls = 0
+        self.tokens = 0
+        self._exhausted_reason = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, on_update=None):
+        return cls(
+            max_seconds=getattr(settings, 'OPTIMIZER_MAX_SECONDS', 600),
+            max_llm_calls=getattr(settings, 'OPTIMIZER_MAX_LLM_CALLS', 200),
+            max_tokens=getattr(settings, 'OPTIMIZER_MAX_TOKENS', 1000000),
+            on_update=on_update,
+        )
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def remaining_seconds(self):
+        """남은 시간(초). 시간 제한이 없으면 None"""
+        if self.max_seconds is None:
+            return None
+        return max(0.0, self.max_seconds - self.elapsed())
+
+    def exhausted_reason(self):
+        """다 쓴 예산 항목 이름('wall_time', 'llm_calls', 'tokens') 또는 None"""
+        if self._exhausted_reason:
+            return self._exhausted_reason
+        reason = None
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            reason = 'wall_time'
+        elif self.max_llm_calls is not None and self.llm_calls >= self.max_llm_calls:
+            reason = 'llm_calls'
+        elif self.max_tokens is not None and self.tokens >= self.max_tokens:
+            reason = 'tokens'
+        if reason:
+            with self._lock:
+                if not self._exhausted_reason:
+                    self._exhausted_reason = reason
+                    logger.warning(f"최적화 작업 예산 소진({reason}): {self.to_dict()['used']}")
+        return self._exhausted_reason
+
+    def is_exhausted(self):
+        return self.exhausted_reason() is not None
+
+    def check(self):
+        """예산이 남아 있지 않으면 BudgetExceeded를 발생시킵니다. (LLM 호출 직전에 사용)"""
+        reason = self.exhausted_reason()
+        if reason:
+            raise BudgetExceeded(f"최적화 작업 예산 소진: {reason}")
+
+    def charge_llm_call(self, response=None):
+        """LLM 호출 1회와 응답의 토큰 사용량(usage_metadata가 있으면)을 기록하고 토큰 수를 반환합니다."""
+        tokens = 0
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            tokens = getattr(usage, 'total_token_count', 0) or 0
+        with self._lock:
+            self.llm_calls += 1
+            self.tokens += tokens
+        self._notify()
+        return tokens
+
+    def close(self):
+        """
+        작업이 끝난 뒤에는 사용량 알림을 보내지 않습니다.
+        (기다리지 않고 버린 API 요청이 늦게 끝나도 완료 상태를 덮어쓰지 않도록)
+        """
+        self.on_update = None
+
+    def _notify(self):
+        if self.on_update:
+            try:
+                self.on_update(self)
+            except Exception as e:
+                logger.warning(f"예산 사용량 알림 실패: {e}")
+
+    def to_dict(self):
+        return {
+            'limits': {
+                'seconds': self.max_seconds,
+                'llm_calls': self.max_llm_calls,
+                'tokens': self.max_tokens,
+            },
+            'used': {
+                'seconds': round(self.elapsed(), 1),
+                'llm_calls': self.llm_calls,
+                'tokens': self.tokens,
+            },
+            'exhausted': self._exhausted_reason,
+        }
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .tokenizer import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# 제공자별 기본 제한 (settings.LLM_PROVIDER_LIMITS 로 덮어쓸 수 있음)
+DEFAULT_PROVIDER_LIMITS = {
+    'gemini': {'max_concurrency': 4, 'requests_per_minute': 60},
+    'anthropic': {'max_concurrency': 2, 'requests_per_minute': 50},
+    'openai': {'max_concurrency': 4, 'requests_per_minute': 60},
+    'perplexity': {'max_concurrency': 2, 'requests_per_minute': 30},
+}
+
+
+class TokenBucket:
+    """
+    초당 rate개의 토큰이 채워지는 토큰 버킷 (최대 capacity개까지 누적)
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 1개를 얻을 때까지 대기합니다. 대기한 시간(초)을 반환합니다."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class ProviderLimiter:
+    """
+    LLM 제공자별 호출 제한기 (동시 호출 수 + 분당 요청 수)
+
+    사용 예:
+        with get_limiter('gemini'):
+            response = model.generate_content(...)
+
+    워커 프로세스 안의 모든 작업 스레드가 같은 제한기를 공유합니다.
+    max_concurrency 또는 requests_per_minute가 0 이하이면 해당 제한을 두지 않습니다.
+    """
+
+    def __init__(self, name, max_concurrency, requests_per_minute):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        if requests_per_minute > 0:
+            self._bucket = TokenBucket(requests_per_minute / 60.0, capacity=max(1, max_concurrency))
+        else:
+            self._bucket = None
+
+    def __enter__(self):
+        if self._bucket is not None:
+            waited = self._bucket.acquire()
+            if waited > 1:
+                logger.info(f"{self.name} API 요청 속도 제한으로 {waited:.1f}초 대기")
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._semaphore is not None:
+            self._semaphore.release()
+        return False
+
+
+class LLMRequestCancelled(Exception):
+    """CancelScope가 취소되어 제한기 대기 후 API를 호출하지 않은 요청"""
+
+
+class CancelScope:
+    """
+    여러 요청 중 하나의 결과로 충분해지면 나머지 요청을 취소하기 위한 상태
+
+    - 요청은 제한기를 얻은 직후 begin()으로 확인하므로, 취소 뒤에 제한기 대기열에서 나온 요청은 API를 호출하지 않습니다.
+    - cancel()은 이미 호출 중이라 결과가 버려질 요청 수를 반환합니다. (비용은 발생하므로 작업 집계에 반영하기 위해 사용)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cancelled = False
+        self.in_flight = 0
+
+    def begin(self):
+        """API 호출 직전에 사용합니다. 이미 취소되었으면 False"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.in_flight += 1
+            return True
+
+    def end(self):
+        """API 호출이 끝난 뒤 사용합니다. 취소된 뒤에 끝난(결과가 버려진) 호출이면 False"""
+        with self._lock:
+            self.in_flight -= 1
+            return not self.cancelled
+
+    def cancel(self):
+        """취소하고, 이미 호출 중인 요청 수를 반환합니다."""
+        with self._lock:
+            self.cancelled = True
+            return self.in_flight
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider):
+    """제공자 이름('gemini', 'anthropic', 'openai', 'perplexity')에 대한 공유 제한기를 반환합니다."""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                limits = dict(DEFAULT_PROVIDER_LIMITS.get(provider, {'max_concurrency': 2, 'requests_per_minute': 30}))
+                limits.update(getattr(settings, 'LLM_PROVIDER_LIMITS', {}).get(provider, {}))
+                limiter = ProviderLimiter(provider, limits['max_concurrency'], limits['requests_per_minute'])
+                _limiters[provider] = limiter
+    return limiter
+
+
+def run_concurrently(func, items, max_workers=8):
+    """
+    items의 각 항목에 func를 스레드로 동시에 적용하고, 결과를 입력 순서대로 반환합니다.
+    실제 API 호출의 동시성/속도는 func 내부의 ProviderLimiter가 제한합니다.
+    항목 하나에서 발생한 예외는 호출한 쪽으로 그대로 전달됩니다.
+    호출한 스레드의 토크나이저 track() 집계는 워커 스레드에도 적용됩니다.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    func = get_tokenizer().bind_tracking(func)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
@@ -1,13 +1,41 @@
 # d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\morpheme_analyzer.py
 import re
-from konlpy.tag import Okt
 import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from .morpheme_counter import count_vectors, exact_word_pattern
+from .occurrence_index import OccurrenceIndex
+from .target_set import get_counter, get_target_set, get_target_sets
+from .tokenizer import get_tokenizer
 
 logger = logging.getLogger(__name__)
 
+# analyze_many() 용 프로세스 풀 (처음 필요할 때 생성해서 워커 수명 동안 재사용)
+_analysis_pool = None
+_analysis_pool_lock = threading.Lock()
+
+
+def _get_analysis_pool(max_workers):
+    global _analysis_pool
+    if _analysis_pool is None:
+        with _analysis_pool_lock:
+            if _analysis_pool is None:
+                # JVM(Okt)이 떠 있는 워커를 fork하지 않도록 spawn 방식을 사용합니다.
+                _analysis_pool = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _analysis_pool
+
+
 class MorphemeAnalyzer:
+    # analyze_many()에서 후보가 이 개수 이상이면 프로세스 풀로 나눠서 카운트
+    POOL_MIN_TEXTS = 8
+    POOL_MAX_WORKERS = 2
+
     def __init__(self):
-        self.okt = Okt()
+        self.okt = get_tokenizer() # 워커 공유 토크나이저 (잡마다 JVM 연결/사전 로딩 방지)
         # Define target ranges for base and compound morphemes
         # 기본 형태소 (엔진, 오일, 종류)는 17~20회
         self.target_min_base_count = 17
@@ -20,54 +48,72 @@ class MorphemeAnalyzer:
         self.target_min_chars = 1500 
         self.target_max_chars = 2500 
 
-    def analyze(self, content, keyword, custom_morphemes=None):
-        char_count = len(content.replace(" ", ""))
+        # 호출 횟수를 기록할 PerfRecorder (작업을 실행하는 쪽에서 설정)
+        self.perf = None
+
+    def _record_call(self, name, amount=1):
+        if self.perf is not None:
+            self.perf.incr(f'analyzer.{name}', amount)
+
+    def analyze(self, content, keyword, custom_morphemes=None, with_positions=False):
+        """
+        글자수와 목표 형태소 출현 횟수를 분석합니다.
+
+        with_positions=True 이면 형태소별 출현 오프셋(morpheme_analysis['positions'])과
+        문장/문단 구간(occurrence_index, OccurrenceIndex.to_dict() 형식)도 함께 반환합니다.
+        결과는 JSON으로 저장할 수 있는 값만 담습니다. 색인 객체가 필요하면 build_occurrence_index()를 사용하세요.
+        """
+        self._record_call('analyze')
+        # 1~2. 기본/복합 형태소 목록과 카운팅 엔진 (키워드+사용자 지정 형태소 조합별로 캐시된 TargetSet 재사용)
+        target_set = self.get_target_set(keyword, custom_morphemes)
+
+        # 3. Count occurrences (모든 목표 형태소를 텍스트 1회 스캔으로 카운트)
+        occurrence_index = None
+        if with_positions:
+            occurrence_index = OccurrenceIndex(content, target_set.counter)
+            scanned_counts = target_set.counter.to_counts(occurrence_index.count_vector())
+        else:
+            scanned_counts = target_set.counter.count(content)
+
+        result = self._build_result(content, target_set, scanned_counts)
+
+        if occurrence_index is not None:
+            # counts와 같은 규칙으로 형태소별 위치를 정리 (같은 문자열이면 복합 형태소 기준)
+            index_data = occurrence_index.to_dict()
+            positions = dict(index_data['positions']['base'])
+            positions.update(index_data['positions']['compound'])
+            result['morpheme_analysis']['positions'] = positions
+            result['occurrence_index'] = {
+                'sentences': index_data['sentences'],
+                'paragraphs': index_data['paragraphs'],
+            }
+
+        return result
+
+    def analyze_document(self, document, keyword, custom_morphemes=None):
+        """
+        BlogDocument(참고자료 제외 본문)를 analyze()와 같은 형식으로 분석합니다.
+        문서가 유지하는 카운트를 그대로 사용하므로 텍스트를 다시 스캔하지 않습니다.
+        (document는 같은 키워드/사용자 지정 형태소의 TargetSet 카운터로 만들어져야 합니다)
+        """
+        self._record_call('analyze_document')
+        target_set = self.get_target_set(keyword, custom_morphemes)
+        return self._build_result(None, target_set, document.counts, char_count=document.char_count)
+
+    def _build_result(self, content, target_set, scanned_counts, char_count=None):
+        """카운트 결과로 analyze() 반환 형식의 분석 결과를 만듭니다."""
+        if char_count is None:
+            char_count = len(content.replace(" ", ""))
         is_valid_char_count = self.target_min_chars <= char_count <= self.target_max_chars
+        effective_base_morphemes = list(target_set.base)
+        compound_morphemes = list(target_set.compound)
 
-        # 1. Identify base morphemes from the keyword
-        # 키워드를 Okt.morphs로 분해하여 기본 형태소 추출
-        base_morphemes_from_keyword = []
-        try:
-            base_morphemes_from_keyword = [m for m in self.okt.morphs(keyword) if len(m) >= 2]
-        except Exception as e:
-            logger.error(f"Okt morphs error for keyword '{keyword}': {e}")
-            base_morphemes_from_keyword = []
-        
-        # 사용자 지정 형태소 중 단일 단어 형태를 기본 형태소에 추가
-        effective_base_morphemes = list(set(base_morphemes_from_keyword))
-        if custom_morphemes:
-            for cm in custom_morphemes:
-                if ' ' not in cm and cm not in effective_base_morphemes: # 공백 없는 단어만
-                    effective_base_morphemes.append(cm)
-        effective_base_morphemes.sort() # For consistent order
-
-        # 2. Identify compound morphemes/phrases
-        compound_morphemes = [keyword] # 전체 키워드는 항상 복합 형태소
-        
-        # 기본 형태소들의 조합으로 복합 형태소 생성 (예: 엔진 + 오일 -> 엔진오일)
-        # 이 부분은 키워드에 따라 더 정교한 로직이 필요할 수 있습니다.
-        # 현재는 간단히 Okt.morphs 결과의 연속된 두 단어를 조합합니다.
-        if len(base_morphemes_from_keyword) > 1:
-            for i in range(len(base_morphemes_from_keyword) - 1):
-                combo = base_morphemes_from_keyword[i] + base_morphemes_from_keyword[i+1]
-                if combo not in compound_morphemes and len(combo) > 2:
-                    compound_morphemes.append(combo)
-        
-        # 사용자 지정 형태소 중 여러 단어 형태를 복합 형태소에 추가
-        if custom_morphemes:
-            for cm in custom_morphemes:
-                if ' ' in cm and cm not in compound_morphemes: # 공백 있는 구문만
-                    compound_morphemes.append(cm)
-        compound_morphemes = list(set(compound_morphemes))
-        compound_morphemes.sort() # For consistent order
-
-        # 3. Count occurrences
         morpheme_counts = {}
         is_valid_morphemes = True
 
         # Count base morphemes (substring match)
         for morpheme in effective_base_morphemes:
-            count = self._count_substring(morpheme, content)
+            count = scanned_counts['base'][morpheme]
             is_valid = self.target_min_base_count <= count <= self.target_max_base_count
             morpheme_counts[morpheme] = {'count': count, 'is_valid': is_valid, 'type': 'base'}
             if not is_valid:
@@ -75,7 +121,7 @@ class MorphemeAnalyzer:
 
         # Count compound morphemes (exact word/phrase match)
         for morpheme in compound_morphemes:
-            count = self._count_exact_word(morpheme, content)
+            count = scanned_counts['compound'][morpheme]
             is_valid = self.target_min_compound_count <= count <= self.target_max_compound_count
             morpheme_counts[morpheme] = {'count': count, 'is_valid': is_valid, 'type': 'compound'}
             if not is_valid:
@@ -101,6 +147,111 @@ class MorphemeAnalyzer:
             }
         }
 
+    def analyze_many(self, texts, keyword, custom_morphemes=None, use_pool=None):
+        """
+        여러 후보 텍스트를 같은 TargetSet으로 분석하고 좋은 순서대로 정렬해 반환합니다.
+
+        Args:
+            texts (list): 후보 텍스트 목록
+            keyword (str): 주요 키워드
+            custom_morphemes (list, optional): 사용자 지정 형태소
+            use_pool (bool, optional): 프로세스 풀 사용 여부. None이면 후보 수(POOL_MIN_TEXTS)로 결정
+
+        Returns:
+            list: [{'index': 원래 순서, 'analysis': analyze() 결과, 'score': score_analysis() 결과}, ...]
+                  (가장 좋은 후보가 먼저, 점수가 같으면 원래 순서 유지)
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        self._record_call('analyze_many')
+        self._record_call('analyze_many_texts', len(texts))
+
+        target_set = self.get_target_set(keyword, custom_morphemes)
+        counter = target_set.counter
+        if use_pool is None:
+            use_pool = len(texts) >= self.POOL_MIN_TEXTS
+
+        vectors = None
+        if use_pool:
+            try:
+                pool = _get_analysis_pool(self.POOL_MAX_WORKERS)
+                chunk_size = -(-len(texts) // self.POOL_MAX_WORKERS)
+                futures = [
+                    pool.submit(count_vectors, target_set.base, target_set.compound, texts[i:i + chunk_size])
+                    for i in range(0, len(texts), chunk_size)
+                ]
+                vectors = [vector for future in futures for vector in future.result()]
+            except Exception as e:
+                logger.warning(f"프로세스 풀 분석 실패, 현재 프로세스에서 분석합니다: {e}")
+                vectors = None
+        if vectors is None:
+            vectors = [counter.count_vector(text) for text in texts]
+
+        ranked = []
+        for i, (text, vector) in enumerate(zip(texts, vectors)):
+            analysis = self._build_result(text, target_set, counter.to_counts(vector))
+            ranked.append({'index': i, 'analysis': analysis, 'score': self.score_analysis(analysis)})
+        ranked.sort(key=lambda item: (item['score']['rank'], item['index']))
+        return ranked
+
+    def score_analysis(self, analysis):
+        """
+        분석 결과의 요약 점수를 계산합니다. rank 값이 작을수록 좋은 결과입니다.
+        rank 순서는 is_better_optimization()의 판단 기준과 같습니다.
+        """
+        invalid_morphemes = sum(1 for m_info in analysis['morpheme_analysis']['counts'].values() if not m_info['is_valid'])
+        target_center = (self.target_min_chars + self.target_max_chars) // 2
+        char_diff = abs(analysis['char_count'] - target_center)
+        if analysis['is_fully_optimized']:
+            rank = (0, 0, 0, 0, 0) # 모든 조건을 충족하면 서로 우열이 없음
+        else:
+            rank = (
+                1,
+                0 if analysis['is_valid_morphemes'] else 1,
+                0 if analysis['is_valid_char_count'] else 1,
+                invalid_morphemes,
+                char_diff
+            )
+        return {
+            'rank': rank,
+            'is_fully_optimized': analysis['is_fully_optimized'],
+            'char_count': analysis['char_count'],
+            'invalid_morphemes': invalid_morphemes,
+            'char_diff': char_diff
+        }
+
+    def build_occurrence_index(self, content, target_morphemes):
+        """
+        target_morphemes 사전({'base': [...], 'compound': [...]})에 대한 출현 위치 색인을 만듭니다.
+        """
+        return OccurrenceIndex(content, self.get_counter(target_morphemes))
+
+    def get_counter(self, target_morphemes):
+        """
+        analyze() 결과의 target_morphemes 사전({'base': [...], 'compound': [...]})에 대한 카운팅 엔진을 반환합니다.
+        """
+        return self._get_counter(target_morphemes['base'], target_morphemes['compound'])
+
+    def get_target_set(self, keyword, custom_morphemes=None):
+        """
+        키워드와 사용자 지정 형태소에 대한 TargetSet(분해 결과 + 컴파일된 카운터)을 반환합니다.
+        """
+        return get_target_set(keyword, custom_morphemes, self.okt)
+
+    def get_target_sets(self, keywords, custom_morphemes=None):
+        """
+        여러 키워드의 TargetSet을 {키워드: TargetSet}으로 반환합니다. (키워드 분해를 한 번에 요청)
+        대량 생성처럼 여러 키워드를 처리하기 전에 호출해 두면 이후 analyze()는 캐시된 TargetSet을 사용합니다.
+        """
+        return get_target_sets(keywords, custom_morphemes, self.okt)
+
+    def _get_counter(self, base_morphemes, compound_morphemes):
+        """
+        목표 형태소 집합에 대한 MorphemeCounter를 반환합니다. (집합별로 1회만 생성)
+        """
+        return get_counter(base_morphemes, compound_morphemes)
+
     def _count_substring(self, sub, text):
         """
         텍스트 내에서 부분 문자열(sub)의 출현 횟수를 카운트합니다.
@@ -113,15 +264,7 @@ class MorphemeAnalyzer:
         텍스트 내에서 정확한 단어/구문(word)의 출현 횟수를 카운트합니다.
         한글 단어는 비한글 문자 경계를, 영어/숫자는 단어 경계를 사용합니다.
         """
-        if re.search(r'[가-힣]', word): # 한글 포함 여부 확인
-            if ' ' in word: # 여러 단어로 구성된 한글 구문
-                pattern = re.escape(word)
-            else: # 단일 한글 단어
-                # 한글 단어의 경우, 앞뒤에 한글이 아닌 문자가 와야 정확한 단어로 간주
-                pattern = rf'(?<![가-힣]){re.escape(word)}(?![가-힣])'
-        else: # 영어, 숫자 등 (표준 단어 경계)
-            pattern = rf'\b{re.escape(word)}\b'
-        
+        pattern = exact_word_pattern(word)
         return len(re.findall(pattern, text))
 
     def is_better_optimization(self, new_analysis, old_analysis):
@@ -132,36 +275,4 @@ class MorphemeAnalyzer:
         - is_valid_char_count가 True면 다음
         - 그 외에는 유효하지 않은 형태소 개수가 더 적은 쪽이 좋음
         """
-        if new_analysis['is_fully_optimized'] and not old_analysis['is_fully_optimized']:
-            return True
-        if old_analysis['is_fully_optimized']: # old가 이미 최적화되어 있으면 더 나은 것은 없음
-            return False
-
-        # 형태소 유효성 우선
-        if new_analysis['is_valid_morphemes'] and not old_analysis['is_valid_morphemes']:
-            return True
-        if old_analysis['is_valid_morphemes'] and not new_analysis['is_valid_morphemes']:
-            return False
-
-        # 글자수 유효성 다음
-        if new_analysis['is_valid_char_count'] and not old_analysis['is_valid_char_count']:
-            return True
-        if old_analysis['is_valid_char_count'] and not new_analysis['is_valid_char_count']:
-            return False
-
-        # 유효하지 않은 형태소 개수 비교 (적을수록 좋음)
-        new_invalid_morphemes_count = sum(1 for m_info in new_analysis['morpheme_analysis']['counts'].values() if not m_info['is_valid'])
-        old_invalid_morphemes_count = sum(1 for m_info in old_analysis['morpheme_analysis']['counts'].values() if not m_info['is_valid'])
-        if new_invalid_morphemes_count < old_invalid_morphemes_count:
-            return True
-        elif new_invalid_morphemes_count > old_invalid_morphemes_count:
-            return False
-
-        # 글자수 차이 비교 (목표 중앙값에 가까울수록 좋음)
-        target_center = (self.target_min_chars + self.target_max_chars) // 2
-        new_char_diff = abs(new_analysis['char_count'] - target_center)
-        old_char_diff = abs(old_analysis['char_count'] - target_center)
-        if new_char_diff < old_char_diff:
-            return True
-        
-        return False # 동등하거나 더 나쁘면 False
+        return self.score_analysis(new_analysis)['rank'] < self.score_analysis(old_analysis)['rank']
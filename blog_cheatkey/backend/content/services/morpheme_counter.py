@@ -0,0 +1,205 @@
+import re
+
+HANGUL_PATTERN = re.compile(r'[가-힣]')
+
+
+def exact_word_pattern(word):
+    """
+    정확한 단어/구문 매칭용 정규식 패턴 문자열을 반환합니다.
+    한글 단어는 비한글 문자 경계를, 영어/숫자는 단어 경계를 사용합니다.
+    """
+    if HANGUL_PATTERN.search(word): # 한글 포함 여부 확인
+        if ' ' in word: # 여러 단어로 구성된 한글 구문
+            return re.escape(word)
+        # 단일 한글 단어: 앞뒤에 한글이 아닌 문자가 와야 정확한 단어로 간주
+        return rf'(?<![가-힣]){re.escape(word)}(?![가-힣])'
+    return rf'\b{re.escape(word)}\b' # 영어, 숫자 등 (표준 단어 경계)
+
+
+def _is_hangul(ch):
+    return '가' <= ch <= '힣'
+
+
+def _is_word_char(ch):
+    # re 모듈의 유니코드 \w 정의와 동일 (isalnum 또는 '_')
+    return ch.isalnum() or ch == '_'
+
+
+class MorphemeCounter:
+    """
+    여러 목표 형태소의 출현 횟수를 텍스트 1회 스캔으로 계산하는 다중 패턴 카운팅 엔진
+
+    - 기본 형태소: MorphemeAnalyzer._count_substring 과 동일한 결과 (겹치지 않는 부분 문자열)
+    - 복합 형태소: MorphemeAnalyzer._count_exact_word 와 동일한 결과 (한글/단어 경계 규칙)
+
+    목표 형태소 집합(키워드, 사용자 지정 형태소)마다 한 번만 생성해서 재사용합니다.
+    """
+
+    # 매칭 경계 규칙
+    BOUNDARY_NONE = 0    # 부분 문자열 매칭
+    BOUNDARY_HANGUL = 1  # 앞뒤가 한글이 아니어야 함
+    BOUNDARY_WORD = 2    # 정규식 \b 와 동일
+
+    def __init__(self, base_morphemes, compound_morphemes):
+        self.base_morphemes = list(base_morphemes)
+        self.compound_morphemes = list(compound_morphemes)
+
+        # 패턴 정보: (종류, 형태소, 경계 규칙)
+        self._patterns = []
+        # 빈 문자열처럼 통합 스캔으로 표현할 수 없는 패턴은 개별 정규식으로 처리
+        self._regex_fallbacks = []
+
+        for morpheme in self.base_morphemes:
+            self._add_pattern('base', morpheme, self.BOUNDARY_NONE)
+        for morpheme in self.compound_morphemes:
+            if HANGUL_PATTERN.search(morpheme):
+                boundary = self.BOUNDARY_NONE if ' ' in morpheme else self.BOUNDARY_HANGUL
+            else:
+                boundary = self.BOUNDARY_WORD
+            self._add_pattern('compound', morpheme, boundary)
+
+        self._build_scanner()
+
+        # count_vector() 결과의 각 위치에 대응하는 (종류, 형태소) 목록
+        self.keys = [(kind, morpheme) for kind, morpheme, _ in self._patterns]
+        self.keys += [(kind, morpheme) for kind, morpheme, _ in self._regex_fallbacks]
+        self.key_index = {key: i for i, key in enumerate(self.keys)}
+
+    def _add_pattern(self, kind, morpheme, boundary):
+        if not morpheme:
+            if kind == 'base':
+                pattern = re.compile(re.escape(morpheme))
+            else:
+                pattern = re.compile(exact_word_pattern(morpheme))
+            self._regex_fallbacks.append((kind, morpheme, pattern))
+            return
+        self._patterns.append((kind, morpheme, boundary))
+
+    def _build_scanner(self):
+        # 모든 목표 형태소를 하나의 전방탐색 정규식으로 합쳐 텍스트를 1회만 스캔합니다.
+        # 같은 위치에서 시작하는 형태소가 여러 개일 수 있으므로, 가장 긴 형태소가 먼저 매칭되도록
+        # 길이 역순으로 정렬하고, 매칭된 문자열의 접두사인 다른 형태소들은 미리 계산해 둡니다.
+        self._lengths = [len(morpheme) for _, morpheme, _ in self._patterns]
+        self._ids_by_text = {}
+        for pattern_id, (_, morpheme, _) in enumerate(self._patterns):
+            self._ids_by_text.setdefault(morpheme, []).append(pattern_id)
+
+        literals = sorted(self._ids_by_text, key=len, reverse=True)
+        self._prefix_ids = {}
+        for literal in literals:
+            self._prefix_ids[literal] = [
+                pattern_id
+                for end in range(len(literal), 0, -1)
+                for pattern_id in self._ids_by_text.get(literal[:end], [])
+            ]
+
+        if literals:
+            alternation = '|'.join(re.escape(literal) for literal in literals)
+            self._scanner = re.compile(f'(?=({alternation}))')
+        else:
+            self._scanner = None
+
+    def iter_matches(self, text):
+        """
+        유효한(경계 규칙과 비중첩 규칙을 만족하는) 매칭을 (패턴 ID, 시작, 끝) 형태로 시작 위치 순서대로 반환합니다.
+        """
+        if self._scanner is None:
+            return
+
+        lengths = self._lengths
+        patterns = self._patterns
+        prefix_ids = self._prefix_ids
+        text_len = len(text)
+        last_end = [0] * len(patterns)
+
+        for match in self._scanner.finditer(text):
+            start = match.start()
+            for pattern_id in prefix_ids[match.group(1)]:
+                if start < last_end[pattern_id]:
+                    continue # re.findall 과 동일하게 겹치는 매칭은 제외
+
+                end = start + lengths[pattern_id]
+                boundary = patterns[pattern_id][2]
+                if boundary == self.BOUNDARY_HANGUL:
+                    if start > 0 and _is_hangul(text[start - 1]):
+                        continue
+                    if end < text_len and _is_hangul(text[end]):
+                        continue
+                elif boundary == self.BOUNDARY_WORD:
+                    if not self._is_word_boundary(text, start) or not self._is_word_boundary(text, end):
+                        continue
+
+                last_end[pattern_id] = end
+                yield pattern_id, start, end
+
+    def count_vector(self, text):
+        """
+        텍스트 내 목표 형태소 출현 횟수를 self.keys 순서의 리스트로 반환합니다.
+        """
+        vector = [0] * len(self.keys)
+        for pattern_id, _, _ in self.iter_matches(text):
+            vector[pattern_id] += 1
+
+        offset = len(self._patterns)
+        for i, (_, _, pattern) in enumerate(self._regex_fallbacks):
+            vector[offset + i] = len(pattern.findall(text))
+        return vector
+
+    def occurrences(self, text):
+        """
+        텍스트 내 목표 형태소의 출현 위치를 self.keys 순서의 리스트로 반환합니다.
+        각 항목은 (시작, 끝) 오프셋 목록입니다.
+        """
+        positions = [[] for _ in self.keys]
+        for pattern_id, start, end in self.iter_matches(text):
+            positions[pattern_id].append((start, end))
+
+        offset = len(self._patterns)
+        for i, (_, _, pattern) in enumerate(self._regex_fallbacks):
+            positions[offset + i] = [match.span() for match in pattern.finditer(text)]
+        return positions
+
+    def to_counts(self, vector):
+        """
+        count_vector() 형식의 리스트를 {'base': {...}, 'compound': {...}} 형식으로 변환합니다.
+        """
+        counts = {
+            'base': {m: 0 for m in self.base_morphemes},
+            'compound': {m: 0 for m in self.compound_morphemes},
+        }
+        for (kind, morpheme), count in zip(self.keys, vector):
+            counts[kind][morpheme] = count
+        return counts
+
+    def count(self, text):
+        """
+        텍스트 내 모든 목표 형태소의 출현 횟수를 계산합니다.
+
+        Args:
+            text (str): 분석할 텍스트
+
+        Returns:
+            dict: {'base': {형태소: 횟수}, 'compound': {형태소: 횟수}}
+        """
+        return self.to_counts(self.count_vector(text))
+
+    @staticmethod
+    def _is_word_boundary(text, pos):
+        before = pos > 0 and _is_word_char(text[pos - 1])
+        after = pos < len(text) and _is_word_char(text[pos])
+        return before != after
+
+
+_worker_counters = {}
+
+
+def count_vectors(base_morphemes, compound_morphemes, texts):
+    """
+    여러 텍스트의 count_vector() 결과 목록을 반환합니다.
+    프로세스 풀 작업 함수로 사용되므로 Django/Okt에 의존하지 않고, 프로세스마다 카운터를 1회만 컴파일합니다.
+    """
+    cache_key = (tuple(base_morphemes), tuple(compound_morphemes))
+    counter = _worker_counters.get(cache_key)
+    if counter is None:
+        counter = _worker_counters[cache_key] = MorphemeCounter(base_morphemes, compound_morphemes)
+    return [counter.count_vector(text) for text in texts]
@@ -0,0 +1,102 @@
+from bisect import bisect_right
+
+from .incremental_analysis import split_sentence_units
+
+
+class OccurrenceIndex:
+    """
+    목표 형태소의 출현 위치와 문장/문단 위치를 함께 보관하는 색인
+
+    - 형태소별 (시작, 끝) 오프셋을 1회 스캔으로 기록합니다.
+    - 문장/문단 경계는 IncrementalAnalysis와 같은 규칙(split_sentence_units)으로 나눕니다.
+    - 축소/삽입/글자수 조정 단계에서 텍스트를 다시 스캔하지 않고 해당 문장으로 바로 이동할 수 있습니다.
+    """
+
+    def __init__(self, text, counter):
+        self.text = text
+        self.counter = counter
+
+        # 문장 구간 (문장 텍스트만, 뒤따르는 구분 공백 제외)과 문단 구간
+        self.sentence_spans = []
+        self.paragraph_spans = []
+        self._sentence_paragraph = []
+        position = 0
+        paragraph_start = None
+        for sentence, separator in split_sentence_units(text):
+            if paragraph_start is None:
+                paragraph_start = position
+            self.sentence_spans.append((position, position + len(sentence)))
+            self._sentence_paragraph.append(len(self.paragraph_spans))
+            position += len(sentence)
+            if separator.count('\n') >= 2:
+                self.paragraph_spans.append((paragraph_start, position))
+                paragraph_start = None
+            position += len(separator)
+        if paragraph_start is not None:
+            self.paragraph_spans.append((paragraph_start, self.sentence_spans[-1][1]))
+        self._sentence_starts = [start for start, _ in self.sentence_spans]
+
+        # self.counter.keys 순서의 출현 위치 목록과, 출현 위치별 문장 인덱스
+        self._positions = counter.occurrences(text)
+        self._sentences_by_key = [
+            [self.sentence_at(start) for start, _ in spans]
+            for spans in self._positions
+        ]
+        self._sentence_counts = [{} for _ in self.sentence_spans]
+        for key, sentence_indices in zip(counter.keys, self._sentences_by_key):
+            for i in sentence_indices:
+                self._sentence_counts[i][key] = self._sentence_counts[i].get(key, 0) + 1
+
+    # ----- 위치 -> 단위 -----
+
+    def sentence_at(self, offset):
+        """문자 오프셋이 속한 문장 인덱스 (문장 사이 공백은 앞 문장으로 취급)"""
+        return max(0, bisect_right(self._sentence_starts, offset) - 1)
+
+    def paragraph_at(self, offset):
+        """문자 오프셋이 속한 문단 인덱스"""
+        return self._sentence_paragraph[self.sentence_at(offset)]
+
+    def sentence(self, index):
+        start, end = self.sentence_spans[index]
+        return self.text[start:end]
+
+    @property
+    def sentences(self):
+        return [self.text[start:end] for start, end in self.sentence_spans]
+
+    def sentences_in_paragraph(self, paragraph_index):
+        return [i for i, p in enumerate(self._sentence_paragraph) if p == paragraph_index]
+
+    # ----- 형태소 -> 위치/단위 -----
+
+    def positions(self, kind, morpheme):
+        """형태소의 (시작, 끝) 오프셋 목록"""
+        return self._positions[self.counter.key_index[(kind, morpheme)]]
+
+    def count(self, kind, morpheme):
+        return len(self.positions(kind, morpheme))
+
+    def count_vector(self):
+        """MorphemeCounter.count_vector() 와 같은 형식의 전체 카운트"""
+        return [len(spans) for spans in self._positions]
+
+    def sentences_containing(self, kind, morpheme):
+        """형태소가 등장하는 문장 인덱스 목록 (중복 제거, 오름차순)"""
+        return sorted(set(self._sentences_by_key[self.counter.key_index[(kind, morpheme)]]))
+
+    def paragraphs_containing(self, kind, morpheme):
+        """형태소가 등장하는 문단 인덱스 목록 (중복 제거, 오름차순)"""
+        return sorted({self._sentence_paragraph[i] for i in self.sentences_containing(kind, morpheme)})
+
+    def sentence_counts(self, index):
+        """문장 하나에 등장하는 목표 형태소별 횟수 {(종류, 형태소): 횟수}"""
+        return dict(self._sentence_counts[index])
+
+    def to_dict(self):
+        """JSON 저장용 표현 (analyze() 결과의 positions와 동일한 형식 + 문장/문단 구간)"""
+        return {
+            'positions': self.counter.to_counts([[list(span) for span in spans] for spans in self._positions]),
+            'sentences': [list(span) for span in self.sentence_spans],
+            'paragraphs': [list(span) for span in self.paragraph_spans],
+        }
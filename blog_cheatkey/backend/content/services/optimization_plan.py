@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+
+from .blog_document import split_refs
+from .constraint_solver import ConstraintSolver
+from .incremental_analysis import split_sentence_units, _char_count
+from .morpheme_analyzer import MorphemeAnalyzer
+from .substitution_generator import default_substitutions_many
+
+logger = logging.getLogger(__name__)
+
+_planner = None
+_planner_lock = threading.Lock()
+
+
+def get_optimization_planner():
+    """워커 프로세스에서 공유하는 OptimizationPlanner를 반환합니다. (요청마다 분석기를 새로 만들지 않음)"""
+    global _planner
+    if _planner is None:
+        with _planner_lock:
+            if _planner is None:
+                _planner = OptimizationPlanner()
+    return _planner
+
+
+class OptimizationPlanner:
+    """
+    LLM을 호출하지 않고 최적화 필요 여부와 로컬 편집 계획(문장 삭제/대체어 치환/문장 추가)을 계산합니다.
+
+    - 분석은 MorphemeAnalyzer, 편집 계획은 ConstraintSolver로 계산합니다. (참고자료 섹션 제외)
+    - 대체어는 API 대신 기본 지시어 목록(default_substitutions_many)만 사용하므로 실제 최적화 결과와는 다를 수 있습니다.
+    """
+
+    def __init__(self, analyzer=None):
+        self.analyzer = analyzer or MorphemeAnalyzer()
+
+    def plan(self, content, keyword, custom_morphemes=None):
+        started = time.perf_counter()
+        analyzer = self.analyzer
+        body, _ = split_refs(content)
+
+        target_set = analyzer.get_target_set(keyword, custom_morphemes)
+        analysis = analyzer.analyze(body, keyword, custom_morphemes)
+        counts = analysis['morpheme_analysis']['counts']
+
+        over, under = [], []
+        for morpheme, info in counts.items():
+            if info['type'] == 'base':
+                low, high = analyzer.target_min_base_count, analyzer.target_max_base_count
+            else:
+                low, high = analyzer.target_min_compound_count, analyzer.target_max_compound_count
+            if info['count'] > high:
+                over.append({'morpheme': morpheme, 'type': info['type'], 'count': info['count'], 'max': high, 'excess': info['count'] - high})
+            elif info['count'] < low:
+                under.append({'morpheme': morpheme, 'type': info['type'], 'count': info['count'], 'min': low, 'shortage': low - info['count']})
+
+        plan = None
+        if not analysis['is_fully_optimized']:
+            plan = self._edit_plan(body, target_set, keyword)
+
+        return {
+            'keyword': keyword,
+            'needs_optimization': not analysis['is_fully_optimized'],
+            'analysis': {
+                'char_count': analysis['char_count'],
+                'is_valid_char_count': analysis['is_valid_char_count'],
+                'is_valid_morphemes': analysis['is_valid_morphemes'],
+                'is_fully_optimized': analysis['is_fully_optimized'],
+                'counts': counts,
+            },
+            'targets': {
+                'base': [analyzer.target_min_base_count, analyzer.target_max_base_count],
+                'compound': [analyzer.target_min_compound_count, analyzer.target_max_compound_count],
+                'chars': [analyzer.target_min_chars, analyzer.target_max_chars],
+            },
+            'over': over,
+            'under': under,
+            'plan': plan,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def _edit_plan(self, body, target_set, keyword):
+        # 목표 형태소 전체의 품사를 한 번에 조회해 둡니다. (솔버가 형태소마다 토크나이저를 호출하지 않도록)
+        substitutions = default_substitutions_many(target_set.all_list, self.analyzer.okt)
+        solver = ConstraintSolver.for_targets(
+            target_set,
+            self.analyzer,
+            substitutions_for=substitutions.get
+        )
+        try:
+            result = solver.solve(body)
+        except Exception as e:
+            logger.error(f"최적화 계획 계산 오류 ('{keyword}'): {e}")
+            return None
+
+        # 솔버의 문장 번호는 split_sentence_units 순서와 같습니다.
+        sentences = [sentence for sentence, _ in split_sentence_units(body)]
+        operations = []
+        summary = {'delete': 0, 'substitute': 0, 'insert': 0}
+        for operation in result.operations:
+            summary[operation['op']] += 1
+            operations.append({
+                'op': operation['op'],
+                'sentence_index': operation['slot'],
+                # 삭제/치환 대상 문장, 삽입이면 새 문장이 뒤에 붙을 문장
+                'sentence': sentences[operation['slot']],
+                'text': operation['text'],
+                'detail': operation['detail'],
+            })
+
+        return {
+            'feasible': result.feasible,
+            'violation_before': round(result.violation_before, 2),
+            'violation_after': round(result.violation_after, 2),
+            'char_count_after': _char_count(result.text),
+            'summary': summary,
+            'operations': operations,
+        }
@@ -1,108 +1,183 @@
 # d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\optimizer.py
 import re
 import json
+import hashlib
+import functools
 import logging
 import time
 import random
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from django.conf import settings
-from konlpy.tag import Okt 
 import google.generativeai as genai
-from content.models import BlogContent, MorphemeAnalysis
+from content.models import BlogContent
 from .formatter import ContentFormatter
-from .substitution_generator import SubstitutionGenerator
+from .substitution_generator import SubstitutionGenerator, default_substitutions_many
 from .morpheme_analyzer import MorphemeAnalyzer 
+from .incremental_analysis import IncrementalAnalysis
+from .blog_document import BlogDocument, split_refs
+from .tokenizer import get_tokenizer
+from .llm_executor import CancelScope, LLMRequestCancelled, get_limiter, run_concurrently
+from .constraint_solver import ConstraintSolver
+from .rewrite_memo import RewriteMemo
+from .job_budget import JobBudget, BudgetExceeded
+from .analysis_store import save_content_with_analysis
+from .perf import PerfRecorder
+from .prompt_prefix import SEO_OPTIMIZATION_PREFIX, SEO_READABILITY_PREFIX, ULTRA_SEO_PREFIX, get_gemini_model
 
 logger = logging.getLogger(__name__)
 
+# 글자수 확장용 문장 템플릿 ({phrase} 자리에 문단의 핵심 명사를 넣음)
+EXPANSION_TEMPLATES = (
+    " 이에 더해, {phrase}에 대한 심층적인 이해가 필요합니다.",
+    " 또한 {phrase}의 중요성을 강조하고 싶습니다.",
+    " {phrase}와 관련하여 추가적인 정보를 제공하자면 다음과 같습니다.",
+    " 실제로 {phrase}는 많은 영향을 미칩니다.",
+    " 그리고 {phrase}에 대한 고려도 중요합니다."
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _sentence_footprint(counter, sentence):
+    """
+    추가할 문장의 (글자수, 목표 형태소별 카운트 벡터). 템플릿 문장은 반복해서 쓰이므로 캐시합니다.
+    counter가 None이면 카운트 벡터도 None
+    """
+    vector = tuple(counter.count_vector(sentence)) if counter is not None else None
+    return len(sentence.replace(" ", "")), vector
+
+
+ALGORITHM_VERSION = 'v3_analyzer_focused_v3'
+
+
+def optimization_fingerprint(content_text, keyword, custom_morphemes=None, analyzer=None):
+    """
+    최적화 입력(본문, 키워드, 사용자 지정 형태소, 분석기 목표 범위, 알고리즘 버전)의 해시를 반환합니다.
+    값이 같으면 최적화를 다시 실행해도 결과가 달라질 이유가 없습니다.
+    """
+    analyzer = analyzer or MorphemeAnalyzer()
+    payload = {
+        'content': content_text,
+        'keyword': keyword,
+        'custom_morphemes': sorted(set(custom_morphemes or [])),
+        'targets': [
+            analyzer.target_min_base_count, analyzer.target_max_base_count,
+            analyzer.target_min_compound_count, analyzer.target_max_compound_count,
+            analyzer.target_min_chars, analyzer.target_max_chars,
+        ],
+        'algorithm_version': ALGORITHM_VERSION,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_cached_optimization(blog_content, custom_morphemes=None):
+    """
+    현재 본문이 마지막 최적화 결과와 같고 입력 조건도 같으면 저장된 결과를 반환합니다. 아니면 None.
+    """
+    cached = (blog_content.meta_data or {}).get('optimization_cache')
+    if not cached or 'result' not in cached:
+        return None
+    fingerprint = optimization_fingerprint(blog_content.content, blog_content.keyword.keyword, custom_morphemes)
+    if cached.get('output_hash') != fingerprint:
+        return None
+    return dict(cached['result'], cached=True)
+
+
 class ContentOptimizer:
     """
     Gemini API를 사용한 블로그 콘텐츠 최적화 클래스
     주요 기능: 글자수, 키워드 출현 횟수 확인 및 최적화
     """
 
-    def __init__(self):
+    REDUCTION_PROMPT_VERSION = 'reduce-v1'
+
+    def __init__(self, substitution_generator=None):
         self.google_api_key = settings.GOOGLE_API_KEY
         genai.configure(api_key=self.google_api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
-        self.okt = Okt() 
-        self.substitution_generator = SubstitutionGenerator()
+        self.model_name = 'gemini-2.5-pro'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.okt = get_tokenizer() # 워커 공유 토크나이저
+        self.substitution_generator = substitution_generator or SubstitutionGenerator()
         self.morpheme_analyzer = MorphemeAnalyzer()
-
-    def optimize_existing_content_v3(self, content_id):
+        # 형태소 축소 시 대상 문장들을 한 번의 API 호출(JSON 배열)로 묶어서 처리
+        self.batch_sentence_reduction = getattr(settings, 'OPTIMIZER_BATCH_REDUCTION', True)
+        self.batch_reduction_max_sentences = 30 # 한 번의 요청에 넣을 최대 문장 수
+        # 반복 루프 전에 로컬 제약 솔버로 형태소/글자수 목표를 한 번에 맞춰 봄
+        self.use_constraint_solver = getattr(settings, 'OPTIMIZER_USE_CONSTRAINT_SOLVER', True)
+        # 최적화 프롬프트 전략 실행 방식 ('speculative' 또는 'sequential', 호출 비용 차이는 settings.OPTIMIZER_PROMPT_MODE 설명 참고)
+        self.prompt_mode = getattr(settings, 'OPTIMIZER_PROMPT_MODE', 'speculative')
+        # 문장 축소 결과 캐시 (프롬프트를 바꾸면 REDUCTION_PROMPT_VERSION을 올려서 이전 결과를 무효화)
+        self.rewrite_memo = RewriteMemo(self.model_name, self.REDUCTION_PROMPT_VERSION)
+        # 작업 예산 (optimize_existing_content_v3 호출마다 새로 설정, 직접 호출 시에는 설정값 기준)
+        self.budget = JobBudget.from_settings()
+        # 단계별 소요 시간/호출 횟수 기록 (optimize_existing_content_v3 호출마다 새로 생성)
+        self.perf = self.morpheme_analyzer.perf = PerfRecorder('optimize')
+
+    def optimize_existing_content_v3(self, content_id, prompt_mode=None, custom_morphemes=None, force=False, budget=None):
         """
         기존 콘텐츠를 SEO 친화적으로 최적화
 
         Args:
             content_id (int): BlogContent 모델의 ID
+            prompt_mode (str, optional): 'speculative'(프롬프트 전략 동시 실행) 또는
+                'sequential'(이전 결과를 다듬는 순차 실행, 비용 절감용). None이면 설정값 사용
+            custom_morphemes (list, optional): 사용자 지정 형태소
+            force (bool): True면 저장된 최적화 결과가 있어도 다시 실행
+            budget (JobBudget, optional): 시간/LLM 호출/토큰 예산. None이면 설정값으로 생성
+                (예산을 다 쓰면 그때까지의 최상의 결과를 저장하고 반환)
 
         Returns:
-            dict: 최적화 결과
+            dict: 최적화 결과 (저장된 결과를 재사용했으면 'cached': True)
         """
         try:
             blog_content = BlogContent.objects.get(id=content_id)
             original_content_text = blog_content.content # API 호출 전 원본 저장
             keyword = blog_content.keyword.keyword
-            custom_morphemes_for_analysis = None # Assuming this is passed from higher level
+            custom_morphemes_for_analysis = custom_morphemes or None
 
-            logger.info(f"콘텐츠 SEO 최적화 시작 (V3): content_id={content_id}, 키워드={keyword}")
+            if not force:
+                cached_result = get_cached_optimization(blog_content, custom_morphemes_for_analysis)
+                if cached_result:
+                    logger.info(f"본문과 조건이 마지막 최적화 결과와 같아 저장된 결과를 반환합니다: content_id={content_id}")
+                    return cached_result
 
-            api_optimized_content = None
-            best_api_analysis = self.morpheme_analyzer.analyze(original_content_text, keyword, custom_morphemes_for_analysis) # 초기 분석은 원본 기준
+            self.budget = budget or JobBudget.from_settings()
+            self.perf = self.morpheme_analyzer.perf = PerfRecorder('optimize')
+            logger.info(f"콘텐츠 SEO 최적화 시작 (V3): content_id={content_id}, 키워드={keyword}")
+            self.rewrite_memo.reset_stats()
 
-            api_attempts_count = 0
+            # 이 작업의 Okt 호출 집계 (run_concurrently/전략 실행 스레드 포함, analyze_many 프로세스 풀은 제외)
+            with get_tokenizer().track() as okt_stats:
+                best_api_analysis = self.morpheme_analyzer.analyze(original_content_text, keyword, custom_morphemes_for_analysis) # 초기 분석은 원본 기준
 
-            for attempt in range(3): # Still keep a few API attempts for initial optimization
-                api_attempts_count = attempt + 1
-                try:
-                    content_for_api_prompt = api_optimized_content if api_optimized_content else original_content_text
-                    current_analysis_for_prompt = self.morpheme_analyzer.analyze(content_for_api_prompt, keyword, custom_morphemes_for_analysis)
-
-                    if attempt == 0:
-                        prompt = self._create_seo_optimization_prompt(content_for_api_prompt, keyword, custom_morphemes_for_analysis, current_analysis_for_prompt)
-                        temp = 0.7
-                    elif attempt == 1:
-                        prompt = self._create_seo_readability_prompt(content_for_api_prompt, keyword, custom_morphemes_for_analysis, current_analysis_for_prompt)
-                        temp = 0.5
+                prompt_mode = prompt_mode or self.prompt_mode
+                with self.perf.stage('prompt_strategies'):
+                    if prompt_mode == 'sequential':
+                        api_optimized_content, best_api_analysis, api_attempts_count = self._run_sequential_prompt_strategies(
+                            original_content_text, keyword, custom_morphemes_for_analysis, best_api_analysis
+                        )
                     else:
-                        prompt = self._create_ultra_seo_prompt(content_for_api_prompt, keyword, custom_morphemes_for_analysis, current_analysis_for_prompt)
-                        temp = 0.3
-                    
-                    logger.info(f"API 최적화 시도 #{attempt+1}/3, temperature={temp}")
-
-                    response = self.model.generate_content(
-                        prompt,
-                        generation_config=genai.types.GenerationConfig(
-                            temperature=temp,
-                            max_output_tokens=4096
+                        api_optimized_content, best_api_analysis, api_attempts_count = self._run_speculative_prompt_strategies(
+                            original_content_text, keyword, custom_morphemes_for_analysis, best_api_analysis
                         )
-                    )
-                    
-                    current_api_output = response.text
-                    analysis_of_api_output = self.morpheme_analyzer.analyze(current_api_output, keyword, custom_morphemes_for_analysis)
-                    
-                    logger.info(f"API 시도 #{attempt+1} 결과: 글자수={analysis_of_api_output['char_count']}, 목표형태소 유효={analysis_of_api_output['is_valid_morphemes']}")
-                    
-                    if self.morpheme_analyzer.is_better_optimization(analysis_of_api_output, best_api_analysis):
-                        api_optimized_content = current_api_output
-                        best_api_analysis = analysis_of_api_output
-                        logger.info(f"새로운 최상의 API 결과 발견: 글자수={best_api_analysis['char_count']}, 목표형태소 유효={best_api_analysis['is_valid_morphemes']}")
-                    
-                    if best_api_analysis['is_fully_optimized']:
-                        logger.info("API 최적화 성공: 모든 조건 충족")
-                        break
-                        
-                except Exception as e:
-                    logger.error(f"API 최적화 시도 #{attempt+1} 오류: {str(e)}")
-                    logger.error(traceback.format_exc())
-                    time.sleep(5)
 
-            content_to_force_optimize = api_optimized_content if api_optimized_content else original_content_text
+                content_to_force_optimize = api_optimized_content if api_optimized_content else original_content_text
             
-            logger.info("SEO 강제 최적화 시작")
-            final_optimized_content = self.enforce_seo_optimization(content_to_force_optimize, keyword, custom_morphemes_for_analysis)
+                logger.info("SEO 강제 최적화 시작")
+                with self.perf.stage('enforce_seo'):
+                    final_optimized_content = self.enforce_seo_optimization(content_to_force_optimize, keyword, custom_morphemes_for_analysis)
             
-            final_analysis = self.morpheme_analyzer.analyze(final_optimized_content, keyword, custom_morphemes_for_analysis)
+                final_analysis = self.morpheme_analyzer.analyze(final_optimized_content, keyword, custom_morphemes_for_analysis)
+                if self.morpheme_analyzer.is_better_optimization(best_api_analysis, final_analysis):
+                    # 강제 최적화가 예산 부족 등으로 오히려 나빠졌으면 그 전의 최상의 결과를 사용
+                    final_optimized_content = content_to_force_optimize
+                    final_analysis = best_api_analysis
+            self.perf.update({
+                'okt_calls': okt_stats['calls'],
+                'okt_seconds': round(okt_stats['seconds'], 3),
+                'okt_wait_seconds': round(okt_stats['wait_seconds'], 3),
+            })
             logger.info(f"최종 결과: 글자수={final_analysis['char_count']}, 목표형태소 유효={final_analysis['is_valid_morphemes']}")
             
             formatter = ContentFormatter()
@@ -119,31 +194,23 @@ class ContentOptimizer:
                 'is_valid_char_count': final_analysis['is_valid_char_count'],
                 'is_valid_morphemes': final_analysis['is_valid_morphemes'],
                 'optimization_date': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'algorithm_version': 'v3_analyzer_focused_v3', # Updated version
-                'api_attempts': api_attempts_count 
+                'algorithm_version': ALGORITHM_VERSION, # Updated version
+                'api_attempts': api_attempts_count,
+                'prompt_mode': prompt_mode,
+                'rewrite_memo': self.rewrite_memo.get_stats(),
+                'budget': self.budget.to_dict()
             }
-            blog_content.meta_data = meta_data
-            blog_content.save()
-            
-            blog_content.morpheme_analyses.all().delete()
-            
-            if 'morpheme_analysis' in final_analysis and 'counts' in final_analysis['morpheme_analysis']:
-                for morpheme, info in final_analysis['morpheme_analysis']['counts'].items():
-                    MorphemeAnalysis.objects.create(
-                        content=blog_content,
-                        morpheme=morpheme,
-                        count=info.get('count', 0),
-                        is_valid=info.get('is_valid', False),
-                        morpheme_type=info.get('type', 'unknown')
-                    )
             
             success_message = "콘텐츠가 성공적으로 SEO 최적화되었습니다."
             if not final_analysis['is_fully_optimized']:
                 success_message += " (일부 조건 미달성)"
+            budget_exhausted = self.budget.exhausted_reason()
+            if budget_exhausted:
+                success_message += f" (작업 예산 소진: {budget_exhausted})"
             
             logger.info(f"콘텐츠 SEO 최적화 완료: ID={content_id}, 글자수={final_analysis['char_count']}, 모든 목표형태소 유효={final_analysis['is_valid_morphemes']}")
                 
-            return {
+            result = {
                 'success': True,
                 'message': success_message,
                 'content_id': content_id,
@@ -151,8 +218,29 @@ class ContentOptimizer:
                 'is_valid_morphemes': final_analysis['is_valid_morphemes'],
                 'char_count': final_analysis['char_count'],
                 'attempts': api_attempts_count,
-                'algorithm_version': 'v3_analyzer_focused_v3'
+                'algorithm_version': ALGORITHM_VERSION,
+                'budget': meta_data['budget']
             }
+
+            # 다음 요청에서 본문이 그대로면 다시 실행하지 않도록 결과 해시와 함께 저장
+            # (조회는 현재 본문 기준이므로 결과 본문의 해시만 필요합니다)
+            # (예산이 모자라 중간에 멈춘 결과는 다음 요청에서 이어서 최적화할 수 있도록 저장하지 않음)
+            if not budget_exhausted:
+                meta_data['optimization_cache'] = {
+                    'output_hash': optimization_fingerprint(final_optimized_content, keyword, custom_morphemes_for_analysis, self.morpheme_analyzer),
+                    'result': result
+                }
+            # 단계별 소요 시간/호출 횟수 (저장 단계 시간은 아래 로그 레코드에만 포함)
+            meta_data['perf'] = self.perf.to_dict()
+            blog_content.meta_data = meta_data
+            # 콘텐츠와 형태소 분석 결과를 한 트랜잭션에서 저장
+            with self.perf.stage('save'):
+                save_content_with_analysis(blog_content, final_analysis, update_fields=[
+                    'content', 'mobile_formatted_content', 'char_count', 'is_optimized', 'meta_data', 'updated_at'
+                ])
+            self.perf.log(content_id=content_id, keyword=keyword, prompt_mode=prompt_mode)
+
+            return result
                 
         except BlogContent.DoesNotExist:
             logger.error(f"ID {content_id}에 해당하는 콘텐츠를 찾을 수 없습니다.")
@@ -170,10 +258,136 @@ class ContentOptimizer:
                 'content_id': content_id
             }
 
+    def _prompt_strategies(self):
+        """
+        (이름, 프롬프트 생성 함수, temperature, 고정 지시문) 목록 - 순차 모드에서는 이 순서대로 시도
+        고정 지시문은 system_instruction/컨텍스트 캐시로 보내고, 프롬프트 생성 함수는 요청별 부분만 만듭니다.
+        """
+        return [
+            ('seo', self._create_seo_optimization_prompt, 0.7, SEO_OPTIMIZATION_PREFIX),
+            ('readability', self._create_seo_readability_prompt, 0.5, SEO_READABILITY_PREFIX),
+            ('ultra', self._create_ultra_seo_prompt, 0.3, ULTRA_SEO_PREFIX),
+        ]
+
+    def _run_speculative_prompt_strategies(self, original_content_text, keyword, custom_morphemes, original_analysis):
+        """
+        모든 프롬프트 전략을 원문 기준으로 동시에 실행하고, 끝나는 순서대로 분석해 가장 좋은 결과를 고릅니다.
+        하나라도 모든 조건을 충족하면(또는 시간 예산이 끝나면) 나머지 결과는 기다리지 않습니다.
+        - 아직 gemini 제한기(LLM_PROVIDER_LIMITS)를 기다리던 요청은 API를 호출하지 않습니다.
+        - 이미 호출 중이던 요청은 중단할 수 없으므로 perf의 llm_abandoned_calls와 예산의 호출 수에 반영하고,
+          늦게 도착한 응답의 토큰은 집계하지 않습니다.
+
+        Returns:
+            tuple: (최상의 API 결과 또는 None, 그 분석 결과, 시도 횟수)
+        """
+        strategies = self._prompt_strategies()
+        best_content, best_analysis = None, original_analysis
+        attempts = 0
+
+        def run_strategy(strategy):
+            name, create_prompt, temperature, prefix = strategy
+            prompt = create_prompt(original_content_text, keyword, custom_morphemes, original_analysis)
+            logger.info(f"API 최적화 전략 '{name}' 요청, temperature={temperature}")
+            return self._generate_with_gemini(
+                prompt, temperature=temperature, max_output_tokens=4096, prefix=prefix, cancel_scope=cancel_scope
+            ).text
+
+        cancel_scope = CancelScope()
+
+        executor = ThreadPoolExecutor(max_workers=len(strategies))
+        try:
+            # 작업 스레드의 Okt 호출 집계(track)를 전략 실행 스레드에도 적용
+            run_strategy = get_tokenizer().bind_tracking(run_strategy)
+            futures = {executor.submit(run_strategy, strategy): strategy[0] for strategy in strategies}
+            for future in as_completed(futures, timeout=self.budget.remaining_seconds()):
+                name = futures[future]
+                attempts += 1
+                try:
+                    api_output = future.result()
+                except Exception as e:
+                    logger.error(f"API 최적화 전략 '{name}' 오류: {str(e)}")
+                    continue
+
+                analysis = self.morpheme_analyzer.analyze(api_output, keyword, custom_morphemes)
+                logger.info(f"API 전략 '{name}' 결과: 글자수={analysis['char_count']}, 목표형태소 유효={analysis['is_valid_morphemes']}")
+
+                if self.morpheme_analyzer.is_better_optimization(analysis, best_analysis):
+                    best_content, best_analysis = api_output, analysis
+                    logger.info(f"새로운 최상의 API 결과 발견 ('{name}'): 글자수={analysis['char_count']}, 목표형태소 유효={analysis['is_valid_morphemes']}")
+
+                if best_analysis['is_fully_optimized']:
+                    logger.info(f"API 최적화 성공 ('{name}'): 모든 조건 충족, 나머지 전략 취소")
+                    break
+        except FuturesTimeoutError:
+            logger.warning("작업 시간 예산 소진: 아직 끝나지 않은 API 최적화 전략은 기다리지 않습니다.")
+        finally:
+            # 이미 실행 중인 요청은 끝까지 기다리지 않습니다. (결과는 버려짐)
+            abandoned = cancel_scope.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            if abandoned:
+                logger.info(f"결과를 기다리지 않는 API 최적화 요청 {abandoned}개 (비용은 발생)")
+                self.perf.incr('llm_abandoned_calls', abandoned)
+                for _ in range(abandoned):
+                    self.budget.charge_llm_call()
+
+        return best_content, best_analysis, attempts
+
+    def _run_sequential_prompt_strategies(self, original_content_text, keyword, custom_morphemes, original_analysis):
+        """
+        프롬프트 전략을 하나씩 실행하며 이전 최상의 결과를 다음 프롬프트의 입력으로 사용합니다. (호출 수 최소화)
+
+        Returns:
+            tuple: (최상의 API 결과 또는 None, 그 분석 결과, 시도 횟수)
+        """
+        api_optimized_content = None
+        best_api_analysis = original_analysis
+        api_attempts_count = 0
+
+        for attempt, (name, create_prompt, temp, prefix) in enumerate(self._prompt_strategies()):
+            if self.budget.is_exhausted():
+                logger.warning("작업 예산 소진: 남은 API 최적화 시도를 건너뜁니다.")
+                break
+            api_attempts_count = attempt + 1
+            try:
+                content_for_api_prompt = api_optimized_content if api_optimized_content else original_content_text
+                current_analysis_for_prompt = self.morpheme_analyzer.analyze(content_for_api_prompt, keyword, custom_morphemes)
+                prompt = create_prompt(content_for_api_prompt, keyword, custom_morphemes, current_analysis_for_prompt)
+
+                logger.info(f"API 최적화 시도 #{attempt+1}/3 ('{name}'), temperature={temp}")
+
+                response = self._generate_with_gemini(prompt, temperature=temp, max_output_tokens=4096, prefix=prefix)
+
+                current_api_output = response.text
+                analysis_of_api_output = self.morpheme_analyzer.analyze(current_api_output, keyword, custom_morphemes)
+
+                logger.info(f"API 시도 #{attempt+1} 결과: 글자수={analysis_of_api_output['char_count']}, 목표형태소 유효={analysis_of_api_output['is_valid_morphemes']}")
+
+                if self.morpheme_analyzer.is_better_optimization(analysis_of_api_output, best_api_analysis):
+                    api_optimized_content = current_api_output
+                    best_api_analysis = analysis_of_api_output
+                    logger.info(f"새로운 최상의 API 결과 발견: 글자수={best_api_analysis['char_count']}, 목표형태소 유효={best_api_analysis['is_valid_morphemes']}")
+
+                if best_api_analysis['is_fully_optimized']:
+                    logger.info("API 최적화 성공: 모든 조건 충족")
+                    break
+
+            except BudgetExceeded:
+                break
+            except Exception as e:
+                logger.error(f"API 최적화 시도 #{attempt+1} 오류: {str(e)}")
+                self.perf.incr('retries')
+                logger.error(traceback.format_exc())
+                time.sleep(5)
+
+        return api_optimized_content, best_api_analysis, api_attempts_count
+
     def enforce_seo_optimization(self, content, keyword, custom_morphemes=None):
         """
         SEO 최적화를 위한 강제 변환 (MorphemeAnalyzer 사용)
 
+        문서는 처음에 한 번만 BlogDocument로 파싱하고, 모든 단계가 같은 문서를 수정한 뒤
+        마지막에 한 번만 텍스트로 직렬화합니다.
+
         Args:
             content (str): 최적화할 콘텐츠
             keyword (str): 주요 키워드
@@ -182,121 +396,164 @@ class ContentOptimizer:
         Returns:
             str: SEO 최적화된 콘텐츠
         """
-        content_parts = self.separate_content_and_refs(content)
-        content_without_refs = content_parts['content_without_refs']
-        refs_section = content_parts['refs_section']
+        target_set = self.morpheme_analyzer.get_target_set(keyword, custom_morphemes)
+        document = BlogDocument(content, target_set.counter)
 
-        initial_analysis = self.morpheme_analyzer.analyze(content_without_refs, keyword, custom_morphemes)
+        initial_analysis = self.morpheme_analyzer.analyze_document(document, keyword, custom_morphemes)
         logger.info(f"SEO 강제 최적화 시작: 글자수={initial_analysis['char_count']} (유효: {initial_analysis['is_valid_char_count']}), 목표형태소 유효={initial_analysis['is_valid_morphemes']}")
 
         if initial_analysis['is_fully_optimized']:
             logger.info("이미 SEO 최적화된 상태입니다.")
-            if refs_section and "## 참고자료" not in content_without_refs:
-                 return content_without_refs + "\n\n" + refs_section
-            return content_without_refs
+            return document.to_text()
+
+        self._improve_content_structure(document, keyword)
+        self._optimize_headings(document, keyword)
 
-        optimized_content = content_without_refs
-        optimized_content = self._improve_content_structure(optimized_content, keyword)
-        optimized_content = self._optimize_headings(optimized_content, keyword)
+        if self.use_constraint_solver:
+            with self.perf.stage('constraint_solver'):
+                self._solve_targets_locally(document, keyword, custom_morphemes)
 
         attempt = 0
-        previous_content = ""
+        previous_revision = None
         max_safety_attempts = 100 # Safety break for infinite loop
+        best_snapshot, best_analysis = None, None # 지금까지의 최상의 결과 (예산 소진 시 반환)
 
         while attempt < max_safety_attempts:
-            if optimized_content == previous_content:
+            if document.revision == previous_revision:
                 logger.warning("최적화 과정이 고착 상태에 빠졌습니다. 루프를 중단합니다.")
                 break
-            previous_content = optimized_content
+            previous_revision = document.revision
 
-            current_analysis = self.morpheme_analyzer.analyze(optimized_content, keyword, custom_morphemes)
+            current_analysis = self.morpheme_analyzer.analyze_document(document, keyword, custom_morphemes)
             logger.info(f"강제 최적화 시도 #{attempt+1}: 글자수={current_analysis['char_count']} (유효: {current_analysis['is_valid_char_count']}), 목표형태소 유효={current_analysis['is_valid_morphemes']}")
 
+            if best_analysis is None or self.morpheme_analyzer.is_better_optimization(current_analysis, best_analysis):
+                best_snapshot, best_analysis = document.snapshot(), current_analysis
+
             if current_analysis['is_fully_optimized']:
                 logger.info("강제 최적화 성공: 모든 조건 충족")
                 break
 
+            if self.budget.is_exhausted():
+                logger.warning(f"작업 예산 소진({self.budget.exhausted_reason()}): 지금까지의 최상의 결과로 강제 최적화를 마칩니다.")
+                break
+
             needs_char_adjustment = not current_analysis['is_valid_char_count']
             needs_morpheme_adjustment = not current_analysis['is_valid_morphemes'] 
 
             # 형태소 조정이 우선순위가 높음
             if needs_morpheme_adjustment:
                 logger.info("조정: 목표 형태소")
-                optimized_content = self._enforce_exact_target_morpheme_count(
-                    optimized_content, 
-                    keyword, 
-                    custom_morphemes,
-                    current_analysis['morpheme_analysis']['counts'],
-                    current_analysis['morpheme_analysis']['target_morphemes']
-                )
+                with self.perf.stage('morpheme_adjust'):
+                    self._enforce_exact_target_morpheme_count(
+                        document,
+                        current_analysis['morpheme_analysis']['counts'],
+                        current_analysis['morpheme_analysis']['target_morphemes']
+                    )
             elif needs_char_adjustment:
                 logger.info("조정: 글자수")
                 target_chars_center = (self.morpheme_analyzer.target_min_chars + self.morpheme_analyzer.target_max_chars) // 2
-                optimized_content = self._enforce_exact_char_count_v2(
-                    optimized_content, 
-                    target_chars_center, 
-                    tolerance=100 + attempt * 10, # 허용 오차를 점진적으로 늘림
-                    all_target_morphemes=current_analysis['morpheme_analysis']['target_morphemes'], # Pass categorized morphemes
-                    current_morpheme_counts=current_analysis['morpheme_analysis']['counts']
-                )
+                with self.perf.stage('char_adjust'):
+                    self._enforce_exact_char_count_v2(
+                        document, 
+                        target_chars_center, 
+                        tolerance=100 + attempt * 10, # 허용 오차를 점진적으로 늘림
+                        all_target_morphemes=current_analysis['morpheme_analysis']['target_morphemes'], # Pass categorized morphemes
+                        current_morpheme_counts=current_analysis['morpheme_analysis']['counts']
+                    )
             
             attempt += 1
+
+        self.perf.incr('enforce_iterations', attempt)
+        if best_snapshot is not None:
+            final_loop_analysis = self.morpheme_analyzer.analyze_document(document, keyword, custom_morphemes)
+            if self.morpheme_analyzer.is_better_optimization(best_analysis, final_loop_analysis):
+                document.restore(best_snapshot)
         
         # 👇 [개선] 최종적으로 20회를 초과하는 형태소가 없도록 강제 조정
         logger.info("최종 검증: 20회 초과 형태소 강제 조정 시작")
-        optimized_content = self._enforce_absolute_max_count(optimized_content, keyword, custom_morphemes, max_count=20)
+        with self.perf.stage('absolute_max'):
+            self._enforce_absolute_max_count(document, max_count=20)
             
-        optimized_content = self._optimize_paragraph_breaks(optimized_content)
+        self._optimize_paragraph_breaks(document)
+
+        return document.to_text()
+
+    def _solve_targets_locally(self, document, keyword, custom_morphemes):
+        """
+        ConstraintSolver로 문장 삭제/대체어 치환/문장 삽입 계획을 세워 목표를 한 번에 맞춥니다.
+        목표를 모두 만족하지 못해도 위반량이 줄었다면 결과를 문서에 반영하고, 남은 부분은 기존 반복 루프가 처리합니다.
+        대체어는 기본 지시어 목록(default_substitutions_many)만 사용하므로 이 단계에서는 LLM을 호출하지 않습니다.
+        (형태소마다 Claude에 요청하면 작업 예산과 perf 집계에서 빠진 호출이 생김)
+        """
+        analyzer = self.morpheme_analyzer
+        target_set = analyzer.get_target_set(keyword, custom_morphemes)
+        substitutions = default_substitutions_many(target_set.all_list, analyzer.okt)
+        solver = ConstraintSolver.for_targets(
+            target_set,
+            analyzer,
+            substitutions_for=substitutions.get
+        )
+        try:
+            result = solver.solve(document.text)
+        except Exception as e:
+            logger.error(f"로컬 제약 솔버 오류: {e}")
+            logger.error(traceback.format_exc())
+            return
 
-        if refs_section and "## 참고자료" not in optimized_content:
-            optimized_content = optimized_content + "\n\n" + refs_section
-        return optimized_content
+        if result.violation_after < result.violation_before:
+            logger.info(f"로컬 제약 솔버 적용: 연산 {len(result.operations)}개, 목표 충족={result.feasible}")
+            document.set_text(result.text)
 
-    def _enforce_absolute_max_count(self, content, keyword, custom_morphemes, max_count):
+    def _enforce_absolute_max_count(self, document, max_count):
         """
-        모든 목표 형태소가 지정된 최대 횟수(max_count)를 넘지 않도록 강제로 조정합니다.
+        모든 목표 형태소가 지정된 최대 횟수(max_count)를 넘지 않도록 BlogDocument를 강제로 조정합니다.
+        문서가 유지하는 카운트를 사용하므로 수정된 문장만 다시 카운트합니다.
         """
+
         safety_break = 0
         while safety_break < 20: # 무한 루프 방지
-            analysis = self.morpheme_analyzer.analyze(content, keyword, custom_morphemes)
+            counts = document.counts
             morphemes_over_limit = []
 
-            for morpheme, info in analysis['morpheme_analysis']['counts'].items():
-                if info['count'] > max_count:
-                    morphemes_over_limit.append((morpheme, info['count']))
+            # analyze()와 동일하게 기본 형태소 다음 복합 형태소 순서로 (같은 문자열이면 복합 형태소 기준)
+            morpheme_counts = {}
+            for morpheme_type in ('base', 'compound'):
+                for morpheme, count in counts[morpheme_type].items():
+                    morpheme_counts[morpheme] = (morpheme_type, count)
+
+            for morpheme, (morpheme_type, count) in morpheme_counts.items():
+                if count > max_count:
+                    morphemes_over_limit.append((morpheme, morpheme_type, count))
             
             if not morphemes_over_limit:
                 logger.info(f"최종 검증 완료: 모든 목표 형태소가 {max_count}회 이하입니다.")
-                return content
+                return
             
             # 가장 많이 초과된 형태소부터 처리
-            morphemes_over_limit.sort(key=lambda x: x[1], reverse=True)
-            morpheme_to_reduce, current_count = morphemes_over_limit[0]
+            morphemes_over_limit.sort(key=lambda x: x[2], reverse=True)
+            morpheme_to_reduce, morpheme_type, current_count = morphemes_over_limit[0]
             
             logger.warning(f"최종 검증: 형태소 '{morpheme_to_reduce}'가 {max_count}회를 초과했습니다 ({current_count}회). 19회로 강제 조정합니다.")
             
-            content = self._reduce_morpheme_to_target(
-                content,
+            self._reduce_morpheme_in_document(
+                document.body,
                 morpheme_to_reduce,
-                target_count=max_count - 1, # 목표 횟수를 19로 설정하여 확실히 줄임
-                all_target_morphemes_dict=analysis['morpheme_analysis']['target_morphemes']
+                morpheme_type,
+                target_count=max_count - 1 # 목표 횟수를 19로 설정하여 확실히 줄임
             )
             safety_break += 1
         
         logger.error(f"최종 검증 실패: {safety_break}회 시도 후에도 20회를 초과하는 형태소가 남아있습니다.")
-        return content
 
-    def _improve_content_structure(self, content, keyword):
+    def _improve_content_structure(self, document, keyword):
         logger.debug(f"콘텐츠 구조 개선 시도: {keyword}")
-        return content
 
-    def _optimize_headings(self, content, keyword):
+    def _optimize_headings(self, document, keyword):
         logger.debug(f"제목 최적화 시도: {keyword}")
-        return content
 
-    def _optimize_paragraph_breaks(self, content):
+    def _optimize_paragraph_breaks(self, document):
         logger.debug("문단 간격 및 줄바꿈 최적화 시도")
-        return content
 
     def _force_adjust_target_morphemes_extreme(self, content, keyword, custom_morphemes, current_morpheme_counts, target_morphemes_dict):
         """
@@ -325,7 +582,8 @@ class ContentOptimizer:
                     adjusted_content, 
                     morpheme, 
                     target_count, 
-                    target_morphemes_dict # Pass the full dict
+                    target_morphemes_dict, # Pass the full dict
+                    morpheme_type='base'
                 )
             elif current_count < target_min:
                 shortage = target_min - current_count
@@ -347,7 +605,8 @@ class ContentOptimizer:
                     adjusted_content, 
                     morpheme, 
                     target_count, 
-                    target_morphemes_dict # Pass the full dict
+                    target_morphemes_dict, # Pass the full dict
+                    morpheme_type='compound'
                 )
             elif current_count < target_min:
                 shortage = target_min - current_count
@@ -373,35 +632,36 @@ class ContentOptimizer:
         return adjusted_content
     
     def _add_morpheme_strategically(self, content, morpheme, count_to_add):
+        document = BlogDocument(content, self.morpheme_analyzer.get_counter({'base': [morpheme], 'compound': []}))
+        self._add_morpheme_to_document(document, morpheme, count_to_add)
+        return document.to_text()
+
+    def _add_morpheme_to_document(self, document, morpheme, count_to_add):
+        """ BlogDocument의 긴 일반 문단들에 형태소를 나눠서 삽입 (소제목 문단은 제외) """
         logger.info(f"형태소 '{morpheme}' {count_to_add}회 전략적으로 추가")
-        paragraphs = content.split("\n\n")
-        normal_paragraphs_indices = [i for i, p in enumerate(paragraphs)
-                                     if not p.strip().startswith(('#', '##', '###')) and len(p.strip()) > 50]
+        paragraphs = document.paragraphs()
+        normal_paragraphs = [p for p in paragraphs if not p['is_heading'] and len(p['text'].strip()) > 50]
 
-        if not normal_paragraphs_indices:
+        if not normal_paragraphs:
             logger.warning(f"'{morpheme}' 추가할 적절한 긴 문단 없음. 마지막 문단에 추가 시도.")
-            if paragraphs:
-                idx_to_add = len(paragraphs) -1
+            last_paragraph = paragraphs[-1]
+            if len(last_paragraph['text']) < 50 :
+                 new_text = last_paragraph['text'] + self._generate_sentences_with_morpheme(morpheme, count_to_add)
             else:
-                paragraphs.append("")
-                idx_to_add = 0
-            
-            if len(paragraphs[idx_to_add]) < 50 :
-                 paragraphs[idx_to_add] += self._generate_sentences_with_morpheme(morpheme, count_to_add)
-            else:
-                 paragraphs[idx_to_add] = self._inject_morpheme_into_paragraph(paragraphs[idx_to_add], morpheme, count_to_add)
-            return "\n\n".join(paragraphs)
+                 new_text = self._inject_morpheme_into_paragraph(last_paragraph['text'], morpheme, count_to_add)
+            document.replace_paragraph(last_paragraph, new_text)
+            return
 
-        add_counts_per_paragraph = {idx: 0 for idx in normal_paragraphs_indices}
+        add_counts_per_paragraph = {p['index']: 0 for p in normal_paragraphs}
         for i in range(count_to_add):
-            idx_to_add = normal_paragraphs_indices[i % len(normal_paragraphs_indices)]
+            idx_to_add = normal_paragraphs[i % len(normal_paragraphs)]['index']
             add_counts_per_paragraph[idx_to_add] += 1
-            
+
+        replacements = {}
         for idx, num_to_add_in_para in add_counts_per_paragraph.items():
             if num_to_add_in_para > 0:
-                paragraphs[idx] = self._inject_morpheme_into_paragraph(paragraphs[idx], morpheme, num_to_add_in_para)
-        
-        return "\n\n".join(paragraphs)
+                replacements[idx] = self._inject_morpheme_into_paragraph(paragraphs[idx]['text'], morpheme, num_to_add_in_para)
+        document.replace_paragraphs(replacements, paragraphs)
 
     def _generate_sentences_with_morpheme(self, morpheme, count):
         """ 형태소가 포함된 문장 생성 (간단 버전) """
@@ -444,10 +704,55 @@ class ContentOptimizer:
         
         return " ".join(s.strip() for s in sentences if s.strip())
 
+    def _generate_with_gemini(self, prompt, temperature, max_output_tokens, prefix=None, cancel_scope=None):
+        """
+        Gemini 호출 공통 함수. 워커 전체에서 공유하는 동시 호출 수/요청 속도 제한을 거칩니다.
+        prefix(PromptPrefix)가 주어지면 그 지시문이 캐시된 모델(get_gemini_model)로 요청합니다.
+        cancel_scope(CancelScope)가 취소되면 제한기 대기 후 호출하지 않고 LLMRequestCancelled를 발생시킵니다.
+        """
+        self.budget.check()
+        model = get_gemini_model(self.model_name, prefix) if prefix is not None else self.model
+        current = True
+        try:
+            # 소요 시간에는 제한기 대기 시간도 포함됩니다.
+            with self.perf.stage('llm.gemini'), get_limiter('gemini'):
+                if cancel_scope is not None and not cancel_scope.begin():
+                    raise LLMRequestCancelled("취소된 요청입니다.")
+                self.perf.incr('llm_calls')
+                try:
+                    response = model.generate_content(
+                        prompt,
+                        generation_config=genai.types.GenerationConfig(
+                            temperature=temperature,
+                            max_output_tokens=max_output_tokens
+                        )
+                    )
+                finally:
+                    if cancel_scope is not None:
+                        current = cancel_scope.end()
+        except LLMRequestCancelled:
+            raise
+        except Exception:
+            if current:
+                self.perf.incr('llm_errors')
+            raise
+        if not current:
+            # 작업이 이 결과를 기다리지 않고 진행했습니다. 호출 수는 취소 시점에 llm_abandoned_calls로 집계했으므로
+            # 작업이 끝난 뒤에 예산/perf가 바뀌지 않도록 늦게 도착한 사용량은 반영하지 않습니다.
+            usage = getattr(response, 'usage_metadata', None)
+            logger.info(f"버려진 Gemini 응답 도착 (토큰 {getattr(usage, 'total_token_count', 0) or 0}개, 집계 제외)")
+            return response
+        self.perf.incr('llm_tokens', self.budget.charge_llm_call(response))
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            self.perf.incr('llm_cache_read_tokens', getattr(usage, 'cached_content_token_count', 0) or 0)
+        return response
+
     def _ask_llm_for_sentence_reduction(self, sentence, morpheme_to_reduce):
         """
         Claude에게 특정 형태소를 문장에서 제거하거나 문장 전체를 삭제할지 문의하고,
         자연스러움을 유지하도록 요청합니다.
+        API 오류로 답을 받지 못하면 None을 반환합니다. (원문 유지 답변과 구분하기 위해)
         """
         prompt = f"""
         당신은 전문 콘텐츠 편집자입니다. 주어진 문장에서 특정 단어/구문의 출현을 줄이면서
@@ -469,19 +774,107 @@ class ContentOptimizer:
         어떤 설명이나 다른 텍스트도 추가하지 마세요.
         """
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=1024
-                )
-            )
+            response = self._generate_with_gemini(prompt, temperature=0.3, max_output_tokens=1024)
             return response.text.strip()
         except Exception as e:
             logger.error(f"Gemini sentence reduction API error: {e}")
-            return sentence
+            return None
+
+    def _ask_llm_for_batch_sentence_reduction(self, sentences, morpheme_to_reduce):
+        """
+        여러 문장에 대한 형태소 축소를 한 번의 Gemini 호출로 요청합니다.
+        응답은 문장 순서대로 된 JSON 배열이어야 하며, 파싱에 실패하면 문장별 호출로 대체합니다.
+
+        Returns:
+            list: 입력 문장과 같은 순서의 결과 (수정된 문장, 빈 문자열=삭제, 원문, 또는 API 오류 시 None)
+        """
+        if not sentences:
+            return []
+
+        numbered_sentences = json.dumps(
+            [{"id": i, "sentence": sentence} for i, sentence in enumerate(sentences)],
+            ensure_ascii=False,
+            indent=2
+        )
+        prompt = f"""
+        당신은 전문 콘텐츠 편집자입니다. 주어진 각 문장에서 특정 단어/구문의 출현을 줄이면서
+        문장의 자연스러움과 의미를 유지하는 것이 당신의 임무입니다.
+
+        줄여야 할 단어/구문: "{morpheme_to_reduce}"
+        문장 목록 (JSON):
+        {numbered_sentences}
+
+        각 문장을 분석하고 다음 중 하나를 결정하세요:
+        1. 단어/구문 "{morpheme_to_reduce}"를 문장에서 제거해도 문장이 부자연스러워지거나
+           필수적인 의미를 잃지 않습니까? 그렇다면 수정된 문장을 제공하세요.
+        2. 단어/구문만 제거하면 문장이 부자연스러워지거나 의미가 크게 변합니까?
+           그렇다면 블로그 게시물의 전체적인 흐름과 일관성에 영향을 주지 않고
+           문장 전체를 제거할 수 있습니까? 그렇다면 빈 문자열을 반환하세요.
+        3. 위 두 가지 모두 불가능한 경우 원래 문장을 변경하지 않고 그대로 반환하세요.
 
-    def _reduce_morpheme_to_target(self, content, morpheme_to_reduce, target_count, all_target_morphemes_dict):
+        결과는 입력과 같은 id를 사용한 JSON 배열로만 출력하세요. 어떤 설명이나 다른 텍스트도 추가하지 마세요.
+        형식: [{{"id": 0, "sentence": "수정된 문장"}}, {{"id": 1, "sentence": ""}}, ...]
+        """
+        try:
+            response = self._generate_with_gemini(prompt, temperature=0.3, max_output_tokens=8192)
+            rewrites = self._parse_batch_reduction_response(response.text, len(sentences))
+        except Exception as e:
+            logger.error(f"Gemini batch sentence reduction API error: {e}")
+            rewrites = None
+
+        if rewrites is None:
+            logger.warning(f"일괄 문장 축소 응답을 해석할 수 없어 문장별로 다시 요청합니다. ({len(sentences)}개 문장)")
+            self.perf.incr('retries', len(sentences))
+            return self._ask_llm_for_sentence_reductions_concurrently(sentences, morpheme_to_reduce)
+
+        # 응답에서 누락된 문장만 개별적으로 다시 요청
+        missing_ids = [i for i in range(len(sentences)) if i not in rewrites]
+        if missing_ids:
+            self.perf.incr('retries', len(missing_ids))
+            retried = self._ask_llm_for_sentence_reductions_concurrently([sentences[i] for i in missing_ids], morpheme_to_reduce)
+            rewrites.update(zip(missing_ids, retried))
+        return [rewrites[i] for i in range(len(sentences))]
+
+    def _ask_llm_for_sentence_reductions_concurrently(self, sentences, morpheme_to_reduce):
+        """
+        문장별 축소 요청을 동시에 보내고 결과를 입력 순서대로 반환합니다.
+        전체 소요 시간은 호출 시간의 합이 아니라 가장 느린 호출에 가까워집니다.
+        """
+        return run_concurrently(
+            lambda sentence: self._ask_llm_for_sentence_reduction(sentence, morpheme_to_reduce),
+            sentences
+        )
+
+    def _parse_batch_reduction_response(self, response_text, sentence_count):
+        """
+        일괄 축소 응답(JSON 배열)을 {문장 id: 결과 문장} 으로 변환합니다. 해석할 수 없으면 None.
+        """
+        text = response_text.strip()
+        # 코드 블록(```json ... ```)으로 감싼 응답 처리
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text)
+        json_match = re.search(r'\[.*\]', text, re.DOTALL)
+        if not json_match:
+            return None
+        try:
+            items = json.loads(json_match.group())
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(items, list):
+            return None
+
+        rewrites = {}
+        for position, item in enumerate(items):
+            if isinstance(item, dict):
+                sentence_id = item.get('id', position)
+                rewritten = item.get('sentence')
+            else:
+                # id 없이 문장 문자열 배열로 답한 경우 순서대로 대응
+                sentence_id, rewritten = position, item
+            if isinstance(sentence_id, int) and 0 <= sentence_id < sentence_count and isinstance(rewritten, str):
+                rewrites[sentence_id] = rewritten.strip()
+        return rewrites
+
+    def _reduce_morpheme_to_target(self, content, morpheme_to_reduce, target_count, all_target_morphemes_dict, morpheme_type=None):
         """
         특정 형태소의 출현 횟수를 목표치(target_count)까지 줄입니다.
         Gemini에게 문맥상 자연스러움을 확인하도록 요청합니다.
@@ -489,72 +882,74 @@ class ContentOptimizer:
         logger.info(f"형태소 '{morpheme_to_reduce}' 횟수를 목표치({target_count}회)에 맞게 제거 (Gemini 문맥 고려)")
 
         # Determine counting method based on morpheme type (base or compound)
-        temp_analysis_for_type = self.morpheme_analyzer.analyze(content, "", all_target_morphemes_dict['all_list'])
-        morpheme_type = temp_analysis_for_type['morpheme_analysis']['counts'].get(morpheme_to_reduce, {}).get('type', 'base')
-
-        if morpheme_type == 'base':
-            count_func = self.morpheme_analyzer._count_substring
-            pattern = re.escape(morpheme_to_reduce) # Substring pattern for finding sentences
-        else: # compound
-            count_func = self.morpheme_analyzer._count_exact_word
-            if re.search(r'[가-힣]', morpheme_to_reduce):
-                if ' ' in morpheme_to_reduce:
-                    pattern = re.escape(morpheme_to_reduce)
-                else:
-                    pattern = rf'(?<![가-힣]){re.escape(morpheme_to_reduce)}(?![가-힣])'
-            else:
-                pattern = rf'\b{re.escape(morpheme_to_reduce)}\b'
-        
-        current_content = content
-        previous_content = ""
-        attempt = 0
-        max_attempts = 30 # Safety break for infinite loop
+        if morpheme_type is None:
+            morpheme_type = 'compound' if morpheme_to_reduce in all_target_morphemes_dict['compound'] else 'base'
 
-        while attempt < max_attempts:
-            if current_content == previous_content:
-                logger.warning(f"'{morpheme_to_reduce}' 감소 과정이 고착 상태입니다. 루프를 중단합니다.")
-                break
-            previous_content = current_content
+        counter = self.morpheme_analyzer.get_counter(all_target_morphemes_dict)
+        if (morpheme_type, morpheme_to_reduce) not in counter.key_index:
+            counter = self.morpheme_analyzer.get_counter({
+                'base': [morpheme_to_reduce] if morpheme_type == 'base' else [],
+                'compound': [morpheme_to_reduce] if morpheme_type == 'compound' else []
+            })
 
-            current_count = count_func(morpheme_to_reduce, current_content)
-            
-            if current_count <= target_count:
-                logger.info(f"형태소 '{morpheme_to_reduce}' 목표치({target_count}회) 달성 (현재 {current_count}회).")
-                return current_content
+        document = IncrementalAnalysis(content, counter)
+        self._reduce_morpheme_in_document(document, morpheme_to_reduce, morpheme_type, target_count)
+        return document.text
 
-            sentences = re.split(r'(?<=[.!?])\s+', current_content)
-            
-            sentences_with_morpheme_indices = []
-            for i, s in enumerate(sentences):
-                if re.search(pattern, s): # Use the correct pattern for finding sentences containing the morpheme
-                    sentences_with_morpheme_indices.append(i)
+    def _reduce_morpheme_in_document(self, document, morpheme_to_reduce, morpheme_type, target_count):
+        """
+        IncrementalAnalysis 문서에서 형태소 출현 횟수를 목표치까지 줄입니다.
+        수정된 문장만 다시 카운트하므로 반복마다 문서 전체를 다시 분석하지 않습니다.
+
+        Returns:
+            bool: 목표치 달성 여부
+        """
+        with self.perf.stage('reduce_morpheme'):
+            attempt = 0
+            max_attempts = 30 # Safety break for infinite loop
+
+            while attempt < max_attempts:
+                current_count = document.count(morpheme_type, morpheme_to_reduce)
             
-            if not sentences_with_morpheme_indices:
-                logger.warning(f"형태소 '{morpheme_to_reduce}'를 포함하는 문장을 찾을 수 없습니다. (현재 {current_count}회)")
-                break
+                if current_count <= target_count:
+                    logger.info(f"형태소 '{morpheme_to_reduce}' 목표치({target_count}회) 달성 (현재 {current_count}회).")
+                    return True
 
-            # Send ALL relevant sentences to Gemini for processing
-            modified_sentences_map = {}
-            for idx in sentences_with_morpheme_indices:
-                original_sentence = sentences[idx]
-                reduced_sentence_or_keyword = self._ask_llm_for_sentence_reduction(original_sentence, morpheme_to_reduce)
-                modified_sentences_map[idx] = reduced_sentence_or_keyword
+                sentences_with_morpheme_indices = document.sentences_containing(morpheme_type, morpheme_to_reduce)
+            
+                if not sentences_with_morpheme_indices:
+                    logger.warning(f"형태소 '{morpheme_to_reduce}'를 포함하는 문장을 찾을 수 없습니다. (현재 {current_count}회)")
+                    return False
+
+                # Send ALL relevant sentences to Gemini for processing
+                modified_sentences_map = {}
+                reduced_sentences = self._request_sentence_reductions(
+                    [document.sentence(idx) for idx in sentences_with_morpheme_indices],
+                    morpheme_to_reduce
+                )
+                for idx, reduced_sentence_or_keyword in zip(sentences_with_morpheme_indices, reduced_sentences):
+                    original_sentence = document.sentence(idx)
                 
-                if reduced_sentence_or_keyword != original_sentence:
-                    logger.info(f"Gemini: 문장 '{original_sentence[:30]}...'에서 형태소 '{morpheme_to_reduce}' 수정/제거 시도.")
-                else:
-                    logger.info(f"Gemini: 문장 '{original_sentence[:30]}...' 변경 없음.")
+                    if reduced_sentence_or_keyword != original_sentence:
+                        modified_sentences_map[idx] = reduced_sentence_or_keyword
+                        logger.info(f"Gemini: 문장 '{original_sentence[:30]}...'에서 형태소 '{morpheme_to_reduce}' 수정/제거 시도.")
+                    else:
+                        logger.info(f"Gemini: 문장 '{original_sentence[:30]}...' 변경 없음.")
 
-            new_sentences = [modified_sentences_map.get(i, s) for i, s in enumerate(sentences)]
-            
-            current_content = " ".join(s for s in new_sentences if s) # Filter out empty strings from deleted sentences
+                if not modified_sentences_map:
+                    logger.warning(f"'{morpheme_to_reduce}' 감소 과정이 고착 상태입니다. 루프를 중단합니다.")
+                    return False
+
+                # 뒤쪽 문장부터 교체해야 앞쪽 문장 인덱스가 유지됩니다. (빈 문자열은 문장 삭제)
+                for idx in sorted(modified_sentences_map, reverse=True):
+                    document.replace_sentence(idx, modified_sentences_map[idx])
             
-            updated_count = count_func(morpheme_to_reduce, current_content)
-            logger.info(f"형태소 '{morpheme_to_reduce}' 제거 시도 #{attempt+1}. 현재 횟수: {updated_count}")
-            attempt += 1
+                updated_count = document.count(morpheme_type, morpheme_to_reduce)
+                logger.info(f"형태소 '{morpheme_to_reduce}' 제거 시도 #{attempt+1}. 현재 횟수: {updated_count}")
+                attempt += 1
 
-        logger.warning(f"형태소 '{morpheme_to_reduce}' {max_attempts}회 시도 후에도 목표치({target_count}회) 미달성. 현재 {count_func(morpheme_to_reduce, current_content)}회.")
-        return current_content
+            logger.warning(f"형태소 '{morpheme_to_reduce}' {max_attempts}회 시도 후에도 목표치({target_count}회) 미달성. 현재 {document.count(morpheme_type, morpheme_to_reduce)}회.")
+            return False
 
     def _get_enhanced_substitutions(self, morpheme):
         substitutions = self.substitution_generator.get_substitutions(morpheme)
@@ -565,57 +960,59 @@ class ContentOptimizer:
             substitutions.extend(s for s in default_subs if s not in substitutions)
         return list(set(substitutions))
 
-    def _enforce_exact_char_count_v2(self, content, target_char_count, tolerance=50, all_target_morphemes=None, current_morpheme_counts=None):
-        current_char_count = len(content.replace(" ", ""))
+    def _enforce_exact_char_count_v2(self, document, target_char_count, tolerance=50, all_target_morphemes=None, current_morpheme_counts=None):
+        """ BlogDocument의 일반 문단을 늘리거나 줄여 글자수를 목표 범위로 맞춥니다. """
+        current_char_count = document.char_count
         min_chars = target_char_count - tolerance
         max_chars = target_char_count + tolerance
 
         if min_chars <= current_char_count <= max_chars:
-            return content
+            return
             
-        paragraphs = re.split(r'(\n\n+)', content)
-        
-        processed_paragraphs = []
-        temp_para = ""
-        for part in paragraphs:
-            if part == "\n\n" or part == "\n":
-                if temp_para:
-                    processed_paragraphs.append(temp_para)
-                    temp_para = ""
-                processed_paragraphs.append(part)
-            else:
-                temp_para += part
-        if temp_para:
-            processed_paragraphs.append(temp_para)
-
-        content_paragraphs_with_indices = []
-        for i, p_text in enumerate(processed_paragraphs):
-            if not (p_text == "\n\n" or p_text == "\n") and p_text.strip():
-                 if not p_text.strip().startswith(('#', '##', '###')):
-                    content_paragraphs_with_indices.append({'original_idx': i, 'text': p_text, 'len': len(p_text.replace(" ",""))})
+        paragraphs = document.paragraphs()
+        content_paragraphs_with_indices = [
+            {'original_idx': p['index'], 'text': p['text'], 'len': len(p['text'].replace(" ",""))}
+            for p in paragraphs
+            if p['text'].strip() and not p['is_heading']
+        ]
+        replacements = {}
         
         if not content_paragraphs_with_indices:
             logger.warning("글자수 조정: 수정할 내용 문단 없음.")
-            return content
+            return
+
+        # 문단 길이는 위에서 한 번만 계산하고, 각 문단의 몫은 정렬 순서의 위치로 바로 나눕니다.
+        # (문단마다 리스트를 다시 검색하거나 전체 길이를 다시 재지 않음)
+        paragraph_count = len(content_paragraphs_with_indices)
 
         if current_char_count < min_chars:
             chars_to_add = min_chars - current_char_count
             logger.info(f"글자수 조정: {chars_to_add}자 추가 필요")
             
             content_paragraphs_with_indices.sort(key=lambda x: x['len'])
+
+            # 문단별 핵심어(명사)는 한 번에 요청합니다. (토크나이저 서버 사용 시 왕복 1회)
+            try:
+                paragraph_nouns = self.okt.call_many(
+                    'nouns', [self._expansion_source(p['text']) for p in content_paragraphs_with_indices]
+                )
+            except Exception as e:
+                logger.warning(f"문단 핵심어 일괄 추출 실패, 문단별로 추출합니다: {e}")
+                paragraph_nouns = [None] * paragraph_count
             
             added_chars_total = 0
-            for para_info in content_paragraphs_with_indices:
+            for position, para_info in enumerate(content_paragraphs_with_indices):
                 if added_chars_total >= chars_to_add: break
                 
-                current_para_add = (chars_to_add - added_chars_total) // (len(content_paragraphs_with_indices) - content_paragraphs_with_indices.index(para_info)) if len(content_paragraphs_with_indices) > content_paragraphs_with_indices.index(para_info) else (chars_to_add - added_chars_total)
+                current_para_add = (chars_to_add - added_chars_total) // (paragraph_count - position)
                 current_para_add = max(20, current_para_add)
                 
-                expanded_text = self._expand_paragraph(para_info['text'], current_para_add, all_target_morphemes, current_morpheme_counts)
-                char_diff = len(expanded_text.replace(" ","")) - para_info['len']
-                processed_paragraphs[para_info['original_idx']] = expanded_text
+                expanded_text, char_diff = self._expand_paragraph(
+                    para_info['text'], current_para_add, all_target_morphemes, current_morpheme_counts,
+                    nouns=paragraph_nouns[position]
+                )
+                replacements[para_info['original_idx']] = expanded_text
                 added_chars_total += char_diff
-                if added_chars_total >= chars_to_add: break
             
         elif current_char_count > max_chars:
             chars_to_remove = current_char_count - max_chars
@@ -623,37 +1020,45 @@ class ContentOptimizer:
 
             content_paragraphs_with_indices.sort(key=lambda x: x['len'], reverse=True)
             removed_chars_total = 0
-            for para_info in content_paragraphs_with_indices:
+            for position, para_info in enumerate(content_paragraphs_with_indices):
                 if removed_chars_total >= chars_to_remove: break
                 if para_info['len'] < 50 : continue
 
                 current_para_remove = min(
-                    (chars_to_remove - removed_chars_total) // (len(content_paragraphs_with_indices) - content_paragraphs_with_indices.index(para_info) if len(content_paragraphs_with_indices) > content_paragraphs_with_indices.index(para_info) else 1),
+                    (chars_to_remove - removed_chars_total) // (paragraph_count - position),
                     para_info['len'] // 3
                 )
                 current_para_remove = max(20, current_para_remove)
 
-                if current_para_remove > 0:
-                    reduced_text = self._reduce_paragraph(para_info['text'], current_para_remove, all_target_morphemes, current_morpheme_counts)
-                    char_diff = para_info['len'] - len(reduced_text.replace(" ",""))
-                    processed_paragraphs[para_info['original_idx']] = reduced_text
-                    removed_chars_total += char_diff
-                    if removed_chars_total >= chars_to_remove: break
+                reduced_text = self._reduce_paragraph(para_info['text'], current_para_remove, all_target_morphemes, current_morpheme_counts)
+                # 바뀐 문단만 한 번 잽니다.
+                char_diff = para_info['len'] - len(reduced_text.replace(" ",""))
+                replacements[para_info['original_idx']] = reduced_text
+                removed_chars_total += char_diff
             
-        return "".join(processed_paragraphs)
+        document.replace_paragraphs(replacements, paragraphs)
 
-    def _expand_paragraph(self, paragraph, chars_to_add, all_target_morphemes_dict, current_morpheme_counts):
+    @staticmethod
+    def _expansion_source(paragraph):
+        """문단 확장 시 핵심어를 뽑을 텍스트 (마지막 문장, 없으면 문단 전체)"""
+        sentences = re.split(r'(?<=[.!?])\s+', paragraph.strip())
+        last_sentence = sentences[-1] if sentences and sentences[-1] else ""
+        return last_sentence if last_sentence else paragraph
+
+    def _expand_paragraph(self, paragraph, chars_to_add, all_target_morphemes_dict, current_morpheme_counts, nouns=None):
         """
         문단을 확장하여 글자수를 늘립니다.
         과다하게 출현하는 목표 형태소가 재유입되지 않도록 주의합니다.
+        nouns가 주어지면 (일괄 추출한) 그 명사 목록을 핵심어 후보로 사용합니다.
+
+        Returns:
+            tuple: (확장된 문단, 늘어난 글자수)
         """
-        if chars_to_add <=0: return paragraph
-        
-        sentences = re.split(r'(?<=[.!?])\s+', paragraph.strip())
-        last_sentence = sentences[-1] if sentences and sentences[-1] else ""
+        if chars_to_add <=0: return paragraph, 0
         
         try:
-            nouns = self.okt.nouns(last_sentence if last_sentence else paragraph)
+            if nouns is None:
+                nouns = self.okt.nouns(self._expansion_source(paragraph))
             key_phrases = [n for n in nouns if len(n) > 1][:3]
         except Exception:
             key_phrases = ["이 주제", "관련 내용"]
@@ -680,49 +1085,87 @@ class ContentOptimizer:
         if not filtered_key_phrases:
             filtered_key_phrases = ["이 점", "이 부분", "해당 내용"]
 
-        expansion_text = ""
+        counter = self.morpheme_analyzer.get_counter(all_target_morphemes_dict) if all_target_morphemes_dict else None
+
+        # 후보 문장(템플릿 x 핵심어)별 글자수/형태소 카운트는 캐시된 값을 쓰고,
+        # 과다 형태소를 늘리는 후보는 루프 전에 한 번만 걸러냅니다.
+        over_represented_keys = []
+        if counter is not None and current_morpheme_counts:
+            for key_index, (morpheme_type, morpheme) in enumerate(counter.keys):
+                type_max = self.morpheme_analyzer.target_max_base_count if morpheme_type == 'base' else self.morpheme_analyzer.target_max_compound_count
+                if current_morpheme_counts.get(morpheme, {}).get('count', 0) >= type_max:
+                    over_represented_keys.append(key_index)
+
+        candidates = []
+        for phrase in filtered_key_phrases:
+            for template in EXPANSION_TEMPLATES:
+                sentence_to_add = template.format(phrase=phrase)
+                chars, vector = _sentence_footprint(counter, sentence_to_add)
+                if vector is not None and any(vector[i] > 0 for i in over_represented_keys):
+                    continue
+                candidates.append((sentence_to_add, chars))
+
+        if not candidates:
+            return paragraph, 0
+
+        pieces = []
         added_len = 0
-        templates = [
-            " 이에 더해, {phrase}에 대한 심층적인 이해가 필요합니다.",
-            " 또한 {phrase}의 중요성을 강조하고 싶습니다.",
-            " {phrase}와 관련하여 추가적인 정보를 제공하자면 다음과 같습니다.",
-            " 실제로 {phrase}는 많은 영향을 미칩니다.",
-            " 그리고 {phrase}에 대한 고려도 중요합니다."
-        ]
         while added_len < chars_to_add:
-            chosen_phrase = random.choice(filtered_key_phrases)
-            sentence_to_add = random.choice(templates).format(phrase=chosen_phrase)
-            
-            contains_over_represented_in_new_sentence = False
-            if all_target_morphemes_dict and current_morpheme_counts:
-                temp_analysis = self.morpheme_analyzer.analyze(sentence_to_add, "", all_target_morphemes_dict['all_list'])
-                for morpheme in all_target_morphemes_dict['all_list']:
-                    morpheme_info_in_new_sentence = temp_analysis['morpheme_analysis']['counts'].get(morpheme, {})
-                    count_in_new_sentence = morpheme_info_in_new_sentence.get('count', 0)
-                    morpheme_type = morpheme_info_in_new_sentence.get('type')
-
-                    if count_in_new_sentence > 0:
-                        current_global_count = current_morpheme_counts.get(morpheme, {}).get('count', 0)
-                        
-                        if morpheme_type == 'base' and current_global_count >= self.morpheme_analyzer.target_max_base_count:
-                            contains_over_represented_in_new_sentence = True
-                            break
-                        elif morpheme_type == 'compound' and current_global_count >= self.morpheme_analyzer.target_max_compound_count:
-                            contains_over_represented_in_new_sentence = True
-                            break
-            
-            if not contains_over_represented_in_new_sentence:
-                expansion_text += sentence_to_add
-                added_len += len(sentence_to_add.replace(" ", ""))
-            
-            if len(expansion_text) > chars_to_add * 1.5 : break
+            sentence_to_add, chars = random.choice(candidates)
+            pieces.append(sentence_to_add)
+            added_len += chars
+
+        return paragraph + "".join(pieces), added_len
+
+    def _request_sentence_reductions(self, sentences, morpheme_to_reduce):
+        """
+        문장 목록의 축소 결과를 입력 순서대로 반환합니다. (답을 받지 못한 문장은 원문)
+        일괄 모드에서는 batch_reduction_max_sentences개씩 묶어서 한 번에 요청합니다.
+        """
+        # 이전에 같은 (문장, 형태소)로 받은 수정 결과는 API를 호출하지 않고 재사용합니다.
+        results = self.rewrite_memo.get_many(sentences, morpheme_to_reduce)
+        pending_ids = [i for i in range(len(sentences)) if i not in results]
+        pending = [sentences[i] for i in pending_ids]
+
+        if pending and self.budget.is_exhausted():
+            # 예산을 다 쓴 뒤에는 캐시에 없는 문장은 그대로 둡니다.
+            results.update((i, sentences[i]) for i in pending_ids)
+            pending = []
+
+        if pending:
+            if not self.batch_sentence_reduction:
+                fetched = self._ask_llm_for_sentence_reductions_concurrently(pending, morpheme_to_reduce)
+            else:
+                # 묶음이 여러 개면 묶음 단위로도 동시에 요청합니다.
+                step = self.batch_reduction_max_sentences
+                chunks = [pending[i:i + step] for i in range(0, len(pending), step)]
+                chunk_results = run_concurrently(
+                    lambda chunk: self._ask_llm_for_batch_sentence_reduction(chunk, morpheme_to_reduce),
+                    chunks
+                )
+                fetched = [result for chunk_result in chunk_results for result in chunk_result]
+            # "변경 없음" 답변도 저장해야 같은 문장을 다시 묻지 않습니다. API 오류(None)만 제외합니다.
+            self.rewrite_memo.put_many(
+                [(sentence, rewritten) for sentence, rewritten in zip(pending, fetched) if rewritten is not None],
+                morpheme_to_reduce
+            )
+            results.update(
+                (i, sentence if rewritten is None else rewritten)
+                for i, sentence, rewritten in zip(pending_ids, pending, fetched)
+            )
 
-        return paragraph + expansion_text
+        return [results[i] for i in range(len(sentences))]
 
     def _reduce_paragraph(self, paragraph, chars_to_remove, all_target_morphemes_dict, current_morpheme_counts):
         if chars_to_remove <= 0: return paragraph
 
-        sentences = re.split(r'(?<=[.!?])\s+', paragraph.strip())
+        # 문단 전체를 한 번만 스캔해 문장별 목표 형태소 출현 정보를 색인합니다. (문장마다 재분석하지 않음)
+        occurrence_index = None
+        if all_target_morphemes_dict and current_morpheme_counts:
+            occurrence_index = self.morpheme_analyzer.build_occurrence_index(paragraph.strip(), all_target_morphemes_dict)
+            sentences = occurrence_index.sentences
+        else:
+            sentences = re.split(r'(?<=[.!?])\s+', paragraph.strip())
         if len(sentences) <= 1:
             words = paragraph.split()
             reduced_len = 0
@@ -737,13 +1180,8 @@ class ContentOptimizer:
             if any(conj in s for conj in ["하지만", "그러나", "따라서", "결론적으로"]):
                 score -= 50
             
-            if all_target_morphemes_dict and current_morpheme_counts:
-                temp_analysis = self.morpheme_analyzer.analyze(s, "", all_target_morphemes_dict['all_list'])
-                for morpheme in all_target_morphemes_dict['all_list']:
-                    morpheme_info_in_sentence = temp_analysis['morpheme_analysis']['counts'].get(morpheme, {})
-                    count_in_sentence = morpheme_info_in_sentence.get('count', 0)
-                    morpheme_type = morpheme_info_in_sentence.get('type')
-
+            if occurrence_index is not None:
+                for (morpheme_type, morpheme), count_in_sentence in occurrence_index.sentence_counts(i).items():
                     if count_in_sentence > 0:
                         current_global_count = current_morpheme_counts.get(morpheme, {}).get('count', 0)
                         
@@ -818,20 +1256,17 @@ class ContentOptimizer:
         final_sentences = [new_sentences[i] for i in range(len(new_sentences)) if i not in removed_indices]
         return " ".join(final_sentences)
 
-    def _enforce_exact_target_morpheme_count(self, content, keyword, custom_morphemes, current_morpheme_counts, target_morphemes_dict):
+    def _enforce_exact_target_morpheme_count(self, document, current_morpheme_counts, target_morphemes_dict):
         """
-        '목표' 형태소 출현 횟수를 목표 범위 내로 조정 (MorphemeAnalyzer 사용)
+        '목표' 형태소 출현 횟수를 목표 범위 내로 조정 (BlogDocument를 직접 수정)
         target_morphemes_dict now contains 'base' and 'compound' lists.
         """
-        adjusted_content = content
-        
         base_morphemes = target_morphemes_dict['base']
         compound_morphemes = target_morphemes_dict['compound']
-        all_target_morphemes_list = target_morphemes_dict['all_list']
 
         # Adjust base morphemes first
         for morpheme in base_morphemes:
-            current_count_for_morpheme = self.morpheme_analyzer._count_substring(morpheme, adjusted_content)
+            current_count_for_morpheme = document.count('base', morpheme)
             
             target_min = self.morpheme_analyzer.target_min_base_count
             target_max = self.morpheme_analyzer.target_max_base_count
@@ -839,20 +1274,15 @@ class ContentOptimizer:
             if current_count_for_morpheme > target_max:
                 target_count = (target_min + target_max) // 2
                 logger.info(f"핵심 기본 형태소 '{morpheme}' 과다: {current_count_for_morpheme}회 -> 목표 {target_count}회로 줄임")
-                adjusted_content = self._reduce_morpheme_to_target(
-                    adjusted_content, 
-                    morpheme, 
-                    target_count, 
-                    target_morphemes_dict # Pass the full dict
-                )
+                self._reduce_morpheme_in_document(document.body, morpheme, 'base', target_count)
             elif current_count_for_morpheme < target_min:
                 shortage = target_min - current_count_for_morpheme
                 logger.info(f"핵심 기본 형태소 '{morpheme}' 부족: {current_count_for_morpheme}회 -> {target_min}회로 늘림 (추가량: {shortage}회)")
-                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage)
+                self._add_morpheme_to_document(document, morpheme, shortage)
 
         # Adjust compound morphemes next
         for morpheme in compound_morphemes:
-            current_count_for_morpheme = self.morpheme_analyzer._count_exact_word(morpheme, adjusted_content)
+            current_count_for_morpheme = document.count('compound', morpheme)
             
             target_min = self.morpheme_analyzer.target_min_compound_count
             target_max = self.morpheme_analyzer.target_max_compound_count
@@ -860,38 +1290,21 @@ class ContentOptimizer:
             if current_count_for_morpheme > target_max:
                 target_count = (target_min + target_max) // 2
                 logger.info(f"복합 키워드/구문 '{morpheme}' 과다: {current_count_for_morpheme}회 -> 목표 {target_count}회로 줄임")
-                adjusted_content = self._reduce_morpheme_to_target(
-                    adjusted_content, 
-                    morpheme, 
-                    target_count, 
-                    target_morphemes_dict # Pass the full dict
-                )
+                self._reduce_morpheme_in_document(document.body, morpheme, 'compound', target_count)
             elif current_count_for_morpheme < target_min:
                 shortage = target_min - current_count_for_morpheme
                 logger.info(f"복합 키워드/구문 '{morpheme}' 부족: {current_count_for_morpheme}회 -> {target_min}회로 늘림 (추가량: {shortage}회)")
-                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage)
-        
-        return adjusted_content
+                self._add_morpheme_to_document(document, morpheme, shortage)
 
     def _add_morpheme_naturally(self, content, morpheme, count_to_add):
         return self._add_morpheme_strategically(content, morpheme, count_to_add)
 
     def separate_content_and_refs(self, content):
-        refs_pattern = r"(## 참고자료[\s\S]*)"
-        refs_match = re.search(refs_pattern, content, re.MULTILINE)
-        
-        if refs_match:
-            refs_section = refs_match.group(1)
-            content_without_refs = content[:refs_match.start()].strip()
-            return {
-                'content_without_refs': content_without_refs,
-                'refs_section': refs_section
-            }
-        else:
-            return {
-                'content_without_refs': content.strip(),
-                'refs_section': None
-            }
+        content_without_refs, refs_section = split_refs(content)
+        return {
+            'content_without_refs': content_without_refs,
+            'refs_section': refs_section
+        }
     
     def _create_seo_optimization_prompt(self, content, keyword, custom_morphemes, analysis_result):
         char_count = analysis_result['char_count']
@@ -930,38 +1343,16 @@ class ContentOptimizer:
         
         morpheme_text = "\n".join(morpheme_issues) if morpheme_issues else "모든 목표 형태소가 적정 범위 내에 있습니다."
         
-        return f"""
-        이 블로그 콘텐츠를 SEO와 가독성 측면에서 최적화해주세요. 아래 요구사항을 충족하면서 사용자 경험을 개선해야 합니다:
-
-        1️⃣ 글자수 요구사항: {target_min_chars}-{target_max_chars}자 (공백 제외)
-        {char_count_direction}
+        # 카운팅 방식/SEO 전략/출력 지침은 SEO_OPTIMIZATION_PREFIX로 보냅니다.
+        return f"""글자수 요구사항: {target_min_chars}-{target_max_chars}자 (공백 제외)
+{char_count_direction}
 
-        2️⃣ 키워드 및 주요 형태소 최적화:
-        {morpheme_text}
+키워드 및 주요 형태소 최적화:
+{morpheme_text}
 
-        3️⃣ 키워드 및 형태소 카운팅 방식:
-           - 핵심 기본 형태소 (예: '엔진', '오일', '종류'): 문장 내에서 부분적으로 포함되어도 카운트됩니다. (예: '엔진오일종류'에서 '엔진' 1회, '오일' 1회, '종류' 1회)
-           - 복합 키워드 및 구문 (예: '엔진오일', '엔진오일종류'): 정확히 해당 구문이 일치해야 카운트됩니다.
-
-        4️⃣ SEO 최적화 전략:
-        • 첫 번째 문단에 핵심 키워드 자연스럽게 포함
-        • 주요 소제목에 키워드 관련 문구 포함
-        • 짧고 간결한 문단 사용 (2-3문장 권장)
-        • 핵심 키워드의 자연스러운 분포
-        • 명확한 문단 구분과 소제목 활용
-        • 모바일 친화적인 짧은 문장 사용
-
-        5️⃣ 사용자 경험 개선:
-        • 글머리 기호나 번호 매기기로 내용 구조화
-        • 핵심 정보를 먼저 제시하는 역피라미드 구조
-        • 전문 용어는 적절한 설명과 함께 사용
-        • 직관적이고 명확한 표현 사용
-
-        원본 콘텐츠:
-        {content}
-
-        최적화된 내용만 제공해 주세요. 설명이나 메모는 포함하지 마세요.
-        """
+원본 콘텐츠:
+{content}
+"""
     
     def _create_seo_readability_prompt(self, content, keyword, custom_morphemes, analysis_result):
         base_morphemes = analysis_result['morpheme_analysis']['target_morphemes']['base']
@@ -980,38 +1371,13 @@ class ContentOptimizer:
 
         morpheme_instruction_text = " 및 ".join(morpheme_instructions)
 
-        return f"""
-        이 블로그 콘텐츠를 사용자 친화적이고 SEO에 최적화된 형태로 개선해주세요. 최신 SEO 트렌드에 맞춰 다음 요소들에 집중하세요:
-
-        1️⃣ 가독성 최적화:
-        • 긴 문단을 2-3문장의 짧은 문단으로 분리
-        • 복잡한 문장을 간결하게 재구성
-        • 핵심 정보는 굵은 글씨나 강조 표시 활용
-        • 명확한 소제목으로 콘텐츠 구조화
-        • 모바일에서 읽기 쉬운 형식 적용
-
-        2️⃣ 키워드 및 주요 형태소 최적화:
-        • 주요 키워드 '{keyword}'와 다음 형태소들이 {morpheme_instruction_text} 출현하도록 조정해주세요.
-        • 키워드 변형을 자연스럽게 배치
-        • 키워드 스터핑(과도한 반복) 방지
-
-        3️⃣ 구조적 최적화:
-        • 주요 소제목(H2, H3)에 키워드 포함
-        • 첫 문단에 핵심 키워드와 주제 명확히 제시
-        • 글머리 기호와 번호 매기기로 내용 구조화
-        • 시각적 여백과 분리를 통한 정보 구분
-
-        4️⃣ 콘텐츠 품질 향상:
-        • 전문적이고 신뢰할 수 있는 톤 유지
-        • 불필요한 반복 제거
-        • 핵심 가치와 중요 정보 강조
-        • 행동 유도 문구(CTA) 적절히 배치
-
-        원본 콘텐츠:
-        {content}
-
-        최적화된 콘텐츠만 제공해 주세요. 설명이나 메모는 포함하지 마세요.
-        """
+        # 가독성/구조/품질 지침은 SEO_READABILITY_PREFIX로 보냅니다.
+        return f"""키워드 및 주요 형태소 최적화:
+• 주요 키워드 '{keyword}'와 다음 형태소들이 {morpheme_instruction_text} 출현하도록 조정해주세요.
+
+원본 콘텐츠:
+{content}
+"""
 
     def _create_ultra_seo_prompt(self, content, keyword, custom_morphemes, analysis_result):
         target_min_chars = self.morpheme_analyzer.target_min_chars
@@ -1039,41 +1405,16 @@ class ContentOptimizer:
             "counts": analysis_result['morpheme_analysis']['counts']
         }
 
-        return f"""
-        이 블로그 글을 완전한 최적화 기준에 맞추어 재구성해 주세요. 최고의 SEO 성능을 위한 명확한 지침을 따라주세요:
+        # 카운팅 방식/구조/모바일 지침은 ULTRA_SEO_PREFIX로 보냅니다.
+        return f"""절대적인 글자수 요구사항:
+• 최종 글자수(공백 제외): {target_min_chars}-{target_max_chars}자 사이여야 함
+• 현재 글자수: {analysis_result['char_count']}자
 
-        1️⃣ 절대적인 글자수 요구사항: 
-        • 최종 글자수(공백 제외): {target_min_chars}-{target_max_chars}자 사이여야 함
-        • 현재 글자수: {analysis_result['char_count']}자
+엄격한 목표 형태소 출현 빈도:
+• 주요 키워드 '{keyword}'와 이와 관련된 주요 형태소들({morpheme_instruction_text})은 반드시 지정된 범위 내로 출현해야 합니다.
+• 현재 목표 형태소 분석 결과:
+{json.dumps(morpheme_analysis_for_prompt, ensure_ascii=False, indent=2)}
 
-        2️⃣ 엄격한 목표 형태소 출현 빈도:
-        • 주요 키워드 '{keyword}'와 이와 관련된 주요 형태소들({morpheme_instruction_text})은 반드시 지정된 범위 내로 출현해야 합니다.
-        • 현재 목표 형태소 분석 결과:
-        {json.dumps(morpheme_analysis_for_prompt, ensure_ascii=False, indent=2)}
-
-        3️⃣ 키워드 및 형태소 카운팅 방식:
-           - 핵심 기본 형태소 (예: '엔진', '오일', '종류'): 문장 내에서 부분적으로 포함되어도 카운트됩니다. (예: '엔진오일종류'에서 '엔진' 1회, '오일' 1회, '종류' 1회)
-           - 복합 키워드 및 구문 (예: '엔진오일', '엔진오일종류'): 정확히 해당 구문이 일치해야 카운트됩니다.
-
-        4️⃣ 구조 최적화 (정확히 적용):
-        • 첫 문단에 반드시 키워드와 그 변형어 포함
-        • 모든 H2/H3 제목에 키워드 관련 용어 포함
-        • 2-3문장 단위로 문단 분리
-        • 중요 정보는 글머리 기호로 강조
-        • 숫자는 리스트로 표시
-
-        5️⃣ 모바일 최적화:
-        • 4-5줄 이내의 짧은 문단
-        • 복잡한 문장 단순화
-        • 모바일에서 빠르게 스캔 가능한 형식
-
-        6️⃣ 핵심 콘텐츠 구조:
-        • 서론: 핵심 키워드로 시작, 독자 니즈 언급
-        • 본론: 문제점과 해결책 제시
-        • 결론: 핵심 키워드로 정리, 행동 유도
-
-        원본 콘텐츠:
-        {content}
-
-        최적화된 콘텐츠만 제공해 주세요. 설명이나 메모는 포함하지 마세요.
-        """
+원본 콘텐츠:
+{content}
+"""
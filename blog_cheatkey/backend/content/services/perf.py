@@ -0,0 +1,79 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class PerfRecorder:
+    """
+    작업 하나의 단계별 소요 시간과 호출 횟수를 모으는 가벼운 기록기
+
+    사용 예:
+        perf = PerfRecorder('optimize')
+        with perf.stage('enforce_seo'):
+            ...
+        perf.incr('llm_calls')
+        blog_content.meta_data['perf'] = perf.to_dict()
+
+    - 같은 이름의 단계가 여러 번 실행되면 횟수와 시간을 누적합니다.
+    - 단계는 중첩될 수 있으며, 바깥 단계 시간에는 안쪽 단계 시간이 포함됩니다.
+    - 동시에 실행되는 API 요청 스레드에서도 쓸 수 있도록 기록은 잠금으로 보호합니다.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.monotonic()
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, stage_name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_time(stage_name, time.monotonic() - started)
+
+    def add_time(self, stage_name, seconds):
+        with self._lock:
+            stage = self.stages.setdefault(stage_name, {'calls': 0, 'seconds': 0.0})
+            stage['calls'] += 1
+            stage['seconds'] += seconds
+
+    def incr(self, counter_name, amount=1):
+        with self._lock:
+            self.counters[counter_name] = self.counters.get(counter_name, 0) + amount
+
+    def update(self, counters):
+        """{이름: 값} 카운터를 한 번에 더합니다. (토크나이저/분석기 통계 등)"""
+        for counter_name, amount in counters.items():
+            if amount:
+                self.incr(counter_name, amount)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'total_seconds': round(time.monotonic() - self.started_at, 3),
+                'stages': {
+                    stage_name: {'calls': stage['calls'], 'seconds': round(stage['seconds'], 3)}
+                    for stage_name, stage in self.stages.items()
+                },
+                'counters': dict(self.counters),
+            }
+
+    def log(self, **context):
+        """
+        집계 결과를 구조화된 로그 레코드 하나로 남깁니다.
+        (메시지는 JSON, LogRecord에는 extra로 perf/컨텍스트 필드를 함께 담음)
+        """
+        data = self.to_dict()
+        payload = {'job': self.name, **context, **data}
+        logger.info(
+            f"perf {json.dumps(payload, ensure_ascii=False, default=str)}",
+            extra={'perf': data, 'perf_job': self.name, 'perf_context': context}
+        )
+        return data
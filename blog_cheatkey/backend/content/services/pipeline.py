@@ -0,0 +1,288 @@
+import logging
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_CACHE_TIMEOUT = 3600 * 6
+
+
+def pipeline_cache_key(job_id):
+    return f"content_pipeline_{job_id}"
+
+
+def get_pipeline_status(job_id):
+    return cache.get(pipeline_cache_key(job_id))
+
+
+class PipelineStage:
+    """파이프라인 단계 하나 (run(context)의 반환값이 단계 결과로 저장됨)"""
+
+    def __init__(self, name, run, depends_on=(), label=None):
+        self.name = name
+        self.run = run
+        self.depends_on = tuple(depends_on)
+        self.label = label or name
+
+
+class ContentPipeline:
+    """
+    키워드 분석 → 자료 수집 → 생성 → 최적화/제목/요약/이미지를 하나의 작업으로 실행하는 DAG 실행기
+
+        intent ───────────────┐
+        subtopics → research ─┴→ generate ─┬→ optimize
+                                           ├→ titles
+                                           ├→ summary
+                                           └→ images (선택)
+
+    - 선행 단계가 모두 끝난 단계는 바로 스레드 풀에서 실행되므로, 서로 의존하지 않는 단계는 겹쳐서 실행됩니다.
+      (초안이 저장되면 최적화와 제목/요약/이미지 생성이 동시에 시작됨 - 제목/요약은 최적화 전 초안 기준)
+    - 단계가 실패하면 그 단계에 의존하는 단계는 'skipped'로 표시하고 나머지 단계는 계속 실행합니다.
+    - 진행 상태는 단계가 시작/종료될 때마다 캐시(content_pipeline_<job_id>)에 기록합니다.
+    """
+
+    def __init__(self, keyword_id, user_id, options=None, job_id=None):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.keyword_id = keyword_id
+        self.user_id = user_id
+        self.options = options or {}
+        self.max_workers = getattr(settings, 'PIPELINE_MAX_WORKERS', 4)
+        self.context = {'keyword_id': keyword_id, 'user_id': user_id, 'options': self.options}
+        self.stages = self._build_stages()
+        self._lock = threading.Lock()
+        self.state = {
+            'job_id': self.job_id,
+            'keyword_id': keyword_id,
+            'user_id': user_id,
+            'status': 'pending',
+            'progress': 0,
+            'content_id': None,
+            'stages': {
+                stage.name: {
+                    'label': stage.label,
+                    'status': 'pending',
+                    'depends_on': list(stage.depends_on),
+                }
+                for stage in self.stages.values()
+            },
+        }
+
+    def _build_stages(self):
+        stages = [
+            PipelineStage('intent', self._run_intent, label='키워드 분석'),
+            PipelineStage('subtopics', self._run_subtopics, label='소제목 추천'),
+            PipelineStage('research', self._run_research, depends_on=['subtopics'], label='연구 자료 수집'),
+            PipelineStage('generate', self._run_generate, depends_on=['intent', 'research'], label='콘텐츠 생성'),
+            PipelineStage('optimize', self._run_optimize, depends_on=['generate'], label='SEO 최적화'),
+            PipelineStage('titles', self._run_titles, depends_on=['generate'], label='제목 생성'),
+            PipelineStage('summary', self._run_summary, depends_on=['generate'], label='요약 생성'),
+        ]
+        if self.options.get('images'):
+            stages.append(PipelineStage('images', self._run_images, depends_on=['generate'], label='이미지 생성'))
+        return {stage.name: stage for stage in stages}
+
+    # ---- 실행 ----
+
+    def start(self):
+        """상태를 기록하고 백그라운드 스레드에서 파이프라인을 실행합니다. job_id를 반환합니다."""
+        self._save()
+        thread = threading.Thread(target=self.run)
+        thread.daemon = True
+        thread.start()
+        return self.job_id
+
+    def run(self):
+        started = time.monotonic()
+        self._update(status='running')
+        logger.info(f"파이프라인 시작: job_id={self.job_id}, keyword_id={self.keyword_id}, 단계={list(self.stages)}")
+
+        pending = dict(self.stages)
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    dependency_states = [self.state['stages'][dep]['status'] for dep in stage.depends_on]
+                    if any(state in ('failed', 'skipped') for state in dependency_states):
+                        del pending[name]
+                        self._update_stage(name, status='skipped', error='선행 단계 실패')
+                    elif all(state == 'completed' for state in dependency_states):
+                        del pending[name]
+                        self._update_stage(name, status='running', started_at=time.time())
+                        running[executor.submit(self._run_stage, stage)] = name
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+        finally:
+            executor.shutdown(wait=True)
+
+        stage_states = [stage['status'] for stage in self.state['stages'].values()]
+        if all(state == 'completed' for state in stage_states):
+            final_status = 'completed'
+        elif self.state['stages']['generate']['status'] == 'completed':
+            final_status = 'partial' # 콘텐츠는 만들어졌지만 일부 후속 단계 실패
+        else:
+            final_status = 'failed'
+        self._update(status=final_status, elapsed_seconds=round(time.monotonic() - started, 2))
+        logger.info(f"파이프라인 종료: job_id={self.job_id}, 상태={final_status}, 소요 {time.monotonic() - started:.1f}초")
+
+    def _run_stage(self, stage):
+        started = time.monotonic()
+        try:
+            result = stage.run(self.context)
+        except Exception as e:
+            logger.error(f"파이프라인 단계 '{stage.name}' 실패 (job_id={self.job_id}): {e}")
+            logger.error(traceback.format_exc())
+            self._update_stage(stage.name, status='failed', error=str(e), seconds=round(time.monotonic() - started, 2))
+            return
+        self._update_stage(stage.name, status='completed', result=result, seconds=round(time.monotonic() - started, 2))
+
+    # ---- 상태 ----
+
+    def _update(self, **fields):
+        with self._lock:
+            self.state.update(fields)
+            self._save()
+
+    def _update_stage(self, name, **fields):
+        with self._lock:
+            self.state['stages'][name].update(fields)
+            finished = sum(1 for stage in self.state['stages'].values() if stage['status'] in ('completed', 'failed', 'skipped'))
+            self.state['progress'] = int(finished * 100 / len(self.state['stages']))
+            self._save()
+
+    def _save(self):
+        cache.set(pipeline_cache_key(self.job_id), self.state, timeout=PIPELINE_CACHE_TIMEOUT)
+
+    # ---- 단계 ----
+
+    def _keyword(self):
+        from backend.key_word.models import Keyword
+        return Keyword.objects.get(id=self.keyword_id)
+
+    def _run_intent(self, context):
+        from backend.key_word.services.analyzer import KeywordAnalyzer
+
+        keyword = self._keyword()
+        if keyword.main_intent:
+            return {'skipped': True, 'reason': '이미 분석된 키워드'}
+        analysis_result = KeywordAnalyzer().analyze_keyword(keyword.keyword)
+        keyword.main_intent = analysis_result.get('main_intent', '')
+        keyword.info_needed = analysis_result.get('info_needed', [])
+        keyword.pain_points = analysis_result.get('pain_points', [])
+        # 같은 키워드 행을 다른 단계가 수정할 수 있으므로 분석 필드만 저장
+        keyword.save(update_fields=['main_intent', 'info_needed', 'pain_points', 'updated_at'])
+        return {'main_intent': keyword.main_intent}
+
+    def _run_subtopics(self, context):
+        from backend.key_word.models import Subtopic
+        from backend.key_word.services.analyzer import KeywordAnalyzer
+
+        keyword = self._keyword()
+        existing = list(keyword.subtopics.order_by('order').values_list('title', flat=True))
+        if existing:
+            return {'subtopics': existing, 'skipped': True}
+        subtopics = KeywordAnalyzer().suggest_subtopics(keyword.keyword) or []
+        Subtopic.objects.bulk_create([
+            Subtopic(keyword=keyword, title=title, order=i) for i, title in enumerate(subtopics)
+        ])
+        return {'subtopics': subtopics}
+
+    def _run_research(self, context):
+        from backend.research.models import ResearchSource
+        from backend.research.services.collector import ResearchCollector
+
+        keyword = self._keyword()
+        if not context['options'].get('refresh_research') and ResearchSource.objects.filter(keyword=keyword).exists():
+            return {'skipped': True, 'reason': '수집된 자료 재사용'}
+        collected = ResearchCollector().collect_and_save(keyword.pk)
+        if not collected:
+            # 자료 없이도 생성은 가능하므로 실패로 처리하지 않습니다.
+            return {'collected': False}
+        return {'collected': True, 'sources': ResearchSource.objects.filter(keyword=keyword).count()}
+
+    def _run_generate(self, context):
+        from .generator import ContentGenerator
+        from .generation_stream import GenerationStream
+
+        options = context['options']
+        # 기존 /status/, /generate-stream/ 엔드포인트로도 생성 단계를 볼 수 있도록 같은 키를 사용합니다.
+        status_key = f"content_generation_{self.keyword_id}_{self.user_id}"
+        cache.set(status_key, {"status": "running", "progress": 50, "message": "AI가 콘텐츠 작성 중..."}, timeout=3600)
+        stream = GenerationStream(self.keyword_id, self.user_id) if getattr(settings, 'CONTENT_STREAMING', True) else None
+        try:
+            content_id = ContentGenerator().generate_content(
+                keyword_id=self.keyword_id,
+                user_id=self.user_id,
+                target_audience=options.get('target_audience'),
+                business_info=options.get('business_info'),
+                custom_morphemes=options.get('custom_morphemes'),
+                stream=stream,
+                candidates=options.get('candidates')
+            )
+        finally:
+            if stream:
+                stream.finish()
+        if not content_id:
+            cache.set(status_key, {"status": "failed", "error": "콘텐츠 생성에 실패했습니다."}, timeout=3600)
+            raise RuntimeError("콘텐츠 생성에 실패했습니다.")
+        cache.set(status_key, {
+            "status": "completed", "progress": 100, "content_id": content_id,
+            "message": "콘텐츠가 성공적으로 생성되었습니다."
+        }, timeout=3600)
+
+        context['content_id'] = content_id
+        self._update(content_id=content_id)
+        return {'content_id': content_id}
+
+    def _run_optimize(self, context):
+        from .optimizer import ContentOptimizer
+        from .job_budget import JobBudget
+
+        # 예산 사용량을 단계 상태에 반영 (LLM 호출마다)
+        budget = JobBudget.from_settings(on_update=lambda b: self._update_stage('optimize', budget=b.to_dict()))
+        try:
+            result = ContentOptimizer().optimize_existing_content_v3(
+                context['content_id'],
+                custom_morphemes=context['options'].get('custom_morphemes') or None,
+                budget=budget
+            )
+        finally:
+            budget.close()
+        if not result.get('success'):
+            raise RuntimeError(result.get('message', '콘텐츠 최적화에 실패했습니다.'))
+        return result
+
+    def _run_titles(self, context):
+        from backend.title.services.generator import TitleGenerator
+
+        titles = TitleGenerator(use_openai=False).generate_titles(context['content_id'])
+        if not titles:
+            raise RuntimeError("제목 생성에 실패했습니다.")
+        return {title_type: len(suggestions) for title_type, suggestions in titles.items()}
+
+    def _run_summary(self, context):
+        from backend.title.services.summarizer import ContentSummarizer
+
+        summary_type = context['options'].get('summary_type', 'vrew')
+        summary = ContentSummarizer().create_summary(context['content_id'], summary_type)
+        if summary is None:
+            raise RuntimeError("요약 생성에 실패했습니다.")
+        return {'summary_type': summary_type, 'summary': summary}
+
+    def _run_images(self, context):
+        from backend.core.services.image_generator import ImageGenerator
+
+        images = ImageGenerator().generate_images_for_content(context['content_id'])
+        if images is None:
+            raise RuntimeError("이미지 생성에 실패했습니다.")
+        return {'images': len(images)}
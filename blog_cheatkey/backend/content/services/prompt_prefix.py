@@ -0,0 +1,311 @@
+import datetime
+import hashlib
+import logging
+import threading
+import time
+
+import google.generativeai as genai
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PromptPrefix:
+    """
+    요청마다 바뀌지 않는 지시문 (프롬프트 앞부분)
+
+    키워드, 형태소 횟수, 원문처럼 요청마다 달라지는 내용은 넣지 않습니다.
+    내용을 바꾸면 version을 올려서 제공자 쪽 캐시와 로그에서 이전 지시문과 구분합니다.
+    """
+
+    def __init__(self, name, version, text):
+        self.name = name
+        self.version = version
+        self.text = text.strip()
+        self.cache_key = f"{name}-{version}-{hashlib.sha1(self.text.encode('utf-8')).hexdigest()[:12]}"
+
+
+GENERATION_PREFIX = PromptPrefix('generate', 'v1', """
+당신은 SEO 블로그 게시물을 쓰는 전문 블로그 작가입니다. 요청 끝의 '이번 글 정보'(키워드, 업체명, 페르소나, 타겟 독자, 소제목, 최적화 목표, 참고 자료)에 맞춰 아래 지침대로 블로그 게시물을 작성해 주세요.
+
+## 최종 목표: 독자가 글을 끝까지 읽고, 제시된 해결책에 만족하며, 이번 글 정보의 업체를 신뢰하게 만드는 것
+
+---
+
+### **블로그 게시물 작성 필수 지침**
+
+1.  **페르소나 및 타겟 독자:**
+    -   이번 글 정보의 작성자 페르소나, 타겟 독자, 글의 목적, 어조와 스타일을 그대로 따르세요.
+
+2.  **[필수] 서론 작성 가이드 (전문성 어필, 공감, 강력한 유도):**
+    -   **공감 형성:** 독자가 키워드 관련 문제로 겪는 '구체적인 불편함'과 '답답한 감정'을 정확히 짚어내며 깊은 공감대를 형성하세요. (예: "혹시 '키워드' 문제 때문에 밤잠 설치고 계신가요? 수많은 정보를 찾아봤지만, 결국 시간만 낭비한 것 같아 허탈하신가요?")
+    -   **전문성 어필 및 신뢰 구축:** "(업체명)는 이 분야의 전문가로서 수많은 고객들의 문제를 해결해왔습니다. 그 경험과 노하우를 바탕으로, 여러분의 시간을 아껴줄 가장 효과적인 방법만을 알려드리겠습니다." 와 같이 저희의 전문성을 드러내 독자가 글을 신뢰하게 만드세요.
+    -   **해결책 약속:** 이 글이 단순 정보 나열이 아닌, 문제를 '해결'할 '검증된 방법'과 '실용적인 팁'을 제공한다는 점을 명확히 약속하세요.
+    -   **독서 유도:** "이 글을 단 5분만 투자해서 끝까지 읽으신다면, 더 이상 헤매지 않고 문제를 해결할 명확한 청사진을 얻게 될 것입니다." 와 같이, 글을 놓치면 손해라는 인식을 주어 끝까지 읽도록 강력하게 유도하세요.
+
+3.  **본문 작성 가이드:**
+    -   이번 글 정보의 소제목 목록을 모두 사용하여 본문을 구성하세요. 소제목은 `###` 마크다운을 사용하세요. (소제목이 없으면 자유롭게 본론 구성)
+    -   각 소제목 아래에는 최소 2-3개의 문단을 작성하여 내용을 풍부하게 만드세요.
+    -   독자의 이해를 돕기 위해, 전문 용어는 쉽게 풀어서 설명하고, 필요한 경우 실제 예시를 들어주세요.
+    -   이번 글 정보의 참고 자료(뉴스, 학술, 일반, 통계)를 본문 내용에 자연스럽게 인용하여 글의 신뢰도를 높여주세요. 통계 자료가 있으면 최소 1개 이상 반드시 인용해야 하고, 없으면 일반적인 경향이나 중요성을 언급해주세요.
+
+4.  **참고 자료 인용 지침:**
+    -   본문에서 [1], [2]와 같은 인용번호 표시는 절대 사용하지 마세요. 대신 "X 보고서에 따르면" 또는 "Y 연구 결과에 의하면" 등 출처 이름을 직접 언급하는 방식으로 인용하세요. 본문에 URL을 포함하지 마세요.
+
+5.  **최적화 요구사항:**
+    ⚠️ 중요: 다음 최적화 조건을 반드시 준수해야 합니다.
+
+    1. 글자수 조건: 이번 글 정보의 글자수 범위를 정확히 지키세요. (공백 제외, 참고자료 섹션 제외)
+    - 내용을 간결하게 유지하거나 필요시 확장하여 이 범위에 맞추기
+
+    2. 키워드 및 주요 형태소 출현 횟수 조건:
+    - 이번 글 정보의 목표 형태소를 각각 지정된 범위 이내로 자연스럽게 사용하세요.
+    - 핵심 기본 형태소는 다른 단어 안에 포함되어도 카운트됩니다. (예: '엔진오일종류'에서 '엔진', '오일', '종류' 각각 카운트)
+    - 복합 키워드 및 구문은 정확히 일치할 때만 카운트됩니다. (예: '엔진오일', '엔진오일종류')
+    - 중요: Ctrl+F로 검색했을 때 모든 키워드와 형태소가 각각 지정된 범위 내에 있어야 합니다!
+
+    3. 키워드 최적화 방법:
+    - 지시어 활용: "(키워드)는" → "이것은" 등
+    - 자연스러운 생략: 문맥상 이해 가능한 경우 생략
+    - 동의어/유사어 대체: 과다 사용된 단어를 적절한 동의어로 대체 (단, 목표 형태소는 유지)
+
+    ✓ 최종 검증: 생성 완료 후, 모든 목표 키워드/형태소가 **각각** 지정된 범위 내에 있는지, 글자수가 맞는지 **반드시** 재확인하세요. **최대 횟수를 단 1회라도 초과해서는 안 됩니다. 차라리 최소 횟수보다 약간 부족한 것이 낫습니다.** 이 규칙은 절대적입니다.
+
+6.  **[필수] 결론 작성 가이드 (신뢰 구축 및 행동 유도):**
+    -   본문의 핵심 내용을 단순히 요약하는 것을 넘어, 독자가 '이제 무엇을 해야 할지' 명확히 알 수 있도록 행동 지침을 제시하며 마무리합니다.
+    -   "오늘 알려드린 방법을 당장 적용해보세요." 와 같이, 독자가 실천으로 옮기도록 자신감을 불어넣고 격려해주세요.
+    -   **가장 중요:** "만약 알려드린 방법으로도 문제가 해결되지 않거나, 상황이 급박하여 전문가의 즉각적인 조치가 필요하다면, 한순간도 주저하지 말고 저희에게 연락 주세요. 신속하게 도와드리겠습니다." 라는 문구를 **반드시 포함**하여, 독자가 막막할 때 기댈 수 있는 든든한 전문가라는 인식을 심어주세요.
+    -   독자와의 상호작용을 유도하는 질문을 던지세요. (예: "'키워드'에 대해 더 궁금한 점이 있다면 댓글로 알려주세요.")
+
+7.  **참고 자료 섹션:**
+    -   글의 마지막에는 `## 참고자료` 라는 제목으로 섹션을 만들고, 본문 작성에 활용한 모든 참고 자료의 출처를 명확하게 밝혀주세요. (이 섹션은 글자수 카운트에서 제외됩니다.)
+""")
+
+VERIFICATION_PREFIX = PromptPrefix('verify', 'v1', """
+당신은 SEO 블로그 콘텐츠 편집자입니다. 요청 끝의 '최적화 목표'를 모두 충족하도록 '원본 콘텐츠'를 수정해주세요.
+
+========== 키워드 및 형태소 카운팅 방식 ==========
+- 핵심 기본 형태소 (예: '엔진', '오일', '종류'): 문장 내에서 부분적으로 포함되어도 카운트됩니다. (예: '엔진오일종류'에서 '엔진' 1회, '오일' 1회, '종류' 1회)
+- 복합 키워드 및 구문 (예: '엔진오일', '엔진오일종류'): 정확히 해당 구문이 일치해야 카운트됩니다.
+
+========== 최적화 전략 ==========
+1. 과다 사용된 목표 형태소 감소 방법:
+   - 동의어/유사어 대체: (단, 대체어는 목표 형태소가 아니어야 하며, 해당 형태소의 카운팅 방식(부분/정확)을 고려하여 대체)
+   - 지시어 사용: "이것", "그것", "해당 내용" 등으로 대체
+   - 자연스러운 생략: 문맥상 이해 가능한 경우 생략
+   - 다른 표현으로 문장 재구성: 같은 의미를 다른 방식으로 표현
+   - 해당 형태소가 포함된 문장 전체를 문맥상 자연스럽게 삭제하거나, 형태소만 제거하여 문장을 간결하게 만드세요.
+
+2. 부족한 목표 형태소 증가 방법:
+   - 구체적인 예시나 사례 추가: 해당 목표 형태소가 포함된 예시 추가
+   - 설명 확장: 핵심 개념에 대한 추가 설명 제공 (목표 형태소 사용)
+   - 실용적인 팁이나 조언 추가: 목표 형태소가 포함된 팁 제시
+   - 기존 문장 분리 또는 확장: 한 문장을 두 개로 나누거나 확장하여 목표 형태소 사용 기회 증가
+
+========== 중요 지침 ==========
+1. 콘텐츠의 핵심 메시지와 전문성은 유지하세요.
+2. 모든 소제목과 주요 섹션을 유지하세요.
+3. 자연스러운 문체와 흐름을 유지하세요.
+4. 모든 통계 자료 인용과 출처 표시를 유지하세요.
+5. 조정 후에는 반드시 최적화 목표에 언급된 각 목표 형태소가 지정된 범위 내에서 사용되었는지, 글자수가 맞는지 확인하세요.
+6. 결과물만 제시하고 추가 설명은 하지 마세요.
+""")
+
+# 키워드/형태소 카운팅 방식 (최적화 프롬프트 3종 공통)
+_COUNTING_RULES = """
+키워드 및 형태소 카운팅 방식:
+   - 핵심 기본 형태소 (예: '엔진', '오일', '종류'): 문장 내에서 부분적으로 포함되어도 카운트됩니다. (예: '엔진오일종류'에서 '엔진' 1회, '오일' 1회, '종류' 1회)
+   - 복합 키워드 및 구문 (예: '엔진오일', '엔진오일종류'): 정확히 해당 구문이 일치해야 카운트됩니다.
+"""
+
+SEO_OPTIMIZATION_PREFIX = PromptPrefix('optimize-seo', 'v1', """
+요청 끝의 블로그 콘텐츠를 SEO와 가독성 측면에서 최적화해주세요. 요청에 주어진 글자수와 키워드/형태소 요구사항을 충족하면서 사용자 경험을 개선해야 합니다.
+""" + _COUNTING_RULES + """
+SEO 최적화 전략:
+• 첫 번째 문단에 핵심 키워드 자연스럽게 포함
+• 주요 소제목에 키워드 관련 문구 포함
+• 짧고 간결한 문단 사용 (2-3문장 권장)
+• 핵심 키워드의 자연스러운 분포
+• 명확한 문단 구분과 소제목 활용
+• 모바일 친화적인 짧은 문장 사용
+
+사용자 경험 개선:
+• 글머리 기호나 번호 매기기로 내용 구조화
+• 핵심 정보를 먼저 제시하는 역피라미드 구조
+• 전문 용어는 적절한 설명과 함께 사용
+• 직관적이고 명확한 표현 사용
+
+최적화된 내용만 제공해 주세요. 설명이나 메모는 포함하지 마세요.
+""")
+
+SEO_READABILITY_PREFIX = PromptPrefix('optimize-readability', 'v1', """
+요청 끝의 블로그 콘텐츠를 사용자 친화적이고 SEO에 최적화된 형태로 개선해주세요. 최신 SEO 트렌드에 맞춰 다음 요소들에 집중하세요:
+
+가독성 최적화:
+• 긴 문단을 2-3문장의 짧은 문단으로 분리
+• 복잡한 문장을 간결하게 재구성
+• 핵심 정보는 굵은 글씨나 강조 표시 활용
+• 명확한 소제목으로 콘텐츠 구조화
+• 모바일에서 읽기 쉬운 형식 적용
+
+키워드 및 주요 형태소 최적화:
+• 요청에 주어진 키워드와 형태소가 지정된 횟수만큼 출현하도록 조정
+• 키워드 변형을 자연스럽게 배치
+• 키워드 스터핑(과도한 반복) 방지
+
+구조적 최적화:
+• 주요 소제목(H2, H3)에 키워드 포함
+• 첫 문단에 핵심 키워드와 주제 명확히 제시
+• 글머리 기호와 번호 매기기로 내용 구조화
+• 시각적 여백과 분리를 통한 정보 구분
+
+콘텐츠 품질 향상:
+• 전문적이고 신뢰할 수 있는 톤 유지
+• 불필요한 반복 제거
+• 핵심 가치와 중요 정보 강조
+• 행동 유도 문구(CTA) 적절히 배치
+
+최적화된 콘텐츠만 제공해 주세요. 설명이나 메모는 포함하지 마세요.
+""")
+
+ULTRA_SEO_PREFIX = PromptPrefix('optimize-ultra', 'v1', """
+요청 끝의 블로그 글을 완전한 최적화 기준에 맞추어 재구성해 주세요. 최고의 SEO 성능을 위한 명확한 지침을 따라주세요.
+요청에 주어진 글자수 범위와 목표 형태소 출현 빈도는 절대적인 요구사항입니다.
+""" + _COUNTING_RULES + """
+구조 최적화 (정확히 적용):
+• 첫 문단에 반드시 키워드와 그 변형어 포함
+• 모든 H2/H3 제목에 키워드 관련 용어 포함
+• 2-3문장 단위로 문단 분리
+• 중요 정보는 글머리 기호로 강조
+• 숫자는 리스트로 표시
+
+모바일 최적화:
+• 4-5줄 이내의 짧은 문단
+• 복잡한 문장 단순화
+• 모바일에서 빠르게 스캔 가능한 형식
+
+핵심 콘텐츠 구조:
+• 서론: 핵심 키워드로 시작, 독자 니즈 언급
+• 본론: 문제점과 해결책 제시
+• 결론: 핵심 키워드로 정리, 행동 유도
+
+최적화된 콘텐츠만 제공해 주세요. 설명이나 메모는 포함하지 마세요.
+""")
+
+
+def prompt_cache_enabled():
+    return getattr(settings, 'PROMPT_CACHE_ENABLED', True)
+
+
+def anthropic_system_blocks(prefix):
+    """
+    Claude messages API의 system 블록 (cache_control로 지시문을 프롬프트 캐시에 저장)
+    같은 지시문으로 5분 안에 다시 호출하면 캐시된 입력 토큰으로 처리됩니다.
+    """
+    block = {"type": "text", "text": prefix.text}
+    if prompt_cache_enabled():
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+
+_gemini_models = {}
+_gemini_models_lock = threading.Lock()
+# 지시문별 생성 잠금 (같은 지시문의 컨텍스트 캐시를 여러 스레드가 동시에 만들지 않도록)
+_gemini_model_locks = {}
+# 모델의 최소 캐시 토큰 수보다 짧아 컨텍스트 캐시를 만들 수 없는 지시문 (다시 시도하지 않음)
+_gemini_uncacheable = set()
+# 그 밖의 이유로 캐시 생성에 실패하면 이 간격 동안은 system_instruction 모델을 사용합니다.
+GEMINI_CACHE_RETRY_SECONDS = 600
+
+
+def get_gemini_model(model_name, prefix):
+    """
+    지시문(prefix)을 앞에 둔 Gemini 모델을 반환합니다. (워커 프로세스 안에서 재사용)
+
+    - 컨텍스트 캐시(CachedContent)를 만들 수 있으면 캐시된 지시문을 사용하는 모델을 반환합니다.
+      다른 워커가 만든 같은 지시문의 캐시가 있으면 새로 만들지 않고 재사용하며, 만료 전에 TTL을 연장합니다.
+    - 지시문이 모델의 최소 캐시 토큰 수보다 짧거나 캐시 API를 쓸 수 없으면 system_instruction으로 보냅니다.
+      (요청 앞부분이 항상 같으므로 Gemini 2.5의 암묵적 캐시 대상이 됨)
+    """
+    key = (model_name, prefix.cache_key)
+    with _gemini_models_lock:
+        entry = _gemini_models.get(key)
+        if entry and entry['refresh_at'] > time.monotonic():
+            return entry['model']
+        key_lock = _gemini_model_locks.setdefault(key, threading.Lock())
+
+    # 한 스레드만 캐시를 만들거나 연장하고, 나머지 스레드는 기다렸다가 그 결과를 사용합니다.
+    with key_lock:
+        with _gemini_models_lock:
+            entry = _gemini_models.get(key)
+        if entry and entry['refresh_at'] > time.monotonic():
+            return entry['model']
+        entry = _build_gemini_entry(model_name, prefix, entry)
+        with _gemini_models_lock:
+            _gemini_models[key] = entry
+        return entry['model']
+
+
+def _build_gemini_entry(model_name, prefix, previous):
+    key = (model_name, prefix.cache_key)
+    ttl_seconds = getattr(settings, 'GEMINI_CONTEXT_CACHE_TTL_SECONDS', 3600)
+    now = time.monotonic()
+    refresh_at = float('inf') # system_instruction 모델은 다시 만들 필요가 없음
+
+    if prompt_cache_enabled() and ttl_seconds > 0 and key not in _gemini_uncacheable:
+        ttl = datetime.timedelta(seconds=ttl_seconds)
+        # 만료 전에 연장해서 만료된 캐시로 요청하지 않도록 합니다. (TTL이 짧으면 절반이 지났을 때 연장)
+        refresh_after = ttl_seconds - min(60, ttl_seconds / 2)
+        try:
+            from google.generativeai import caching
+
+            cached_content = previous.get('cached_content') if previous else None
+            if cached_content is not None:
+                try:
+                    cached_content.update(ttl=ttl)
+                    return {**previous, 'refresh_at': now + refresh_after}
+                except Exception as e:
+                    logger.info(f"Gemini 컨텍스트 캐시 연장 실패, 다시 만듭니다 ({prefix.cache_key}): {e}")
+
+            cached_content = _find_cached_content(caching, model_name, prefix.cache_key)
+            if cached_content is not None:
+                cached_content.update(ttl=ttl)
+                logger.info(f"Gemini 컨텍스트 캐시 재사용: {prefix.cache_key}")
+            else:
+                cached_content = caching.CachedContent.create(
+                    model=f"models/{model_name}",
+                    display_name=prefix.cache_key,
+                    system_instruction=prefix.text,
+                    ttl=ttl
+                )
+                logger.info(f"Gemini 컨텍스트 캐시 생성: {prefix.cache_key}")
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+            return {'model': model, 'cached_content': cached_content, 'refresh_at': now + refresh_after}
+        except Exception as e:
+            if _is_too_small_error(e):
+                _gemini_uncacheable.add(key)
+                logger.info(f"지시문이 Gemini 최소 캐시 크기보다 작아 system_instruction으로 보냅니다 ({prefix.cache_key})")
+            else:
+                refresh_at = now + GEMINI_CACHE_RETRY_SECONDS
+                logger.info(f"Gemini 컨텍스트 캐시를 만들 수 없어 system_instruction으로 보냅니다 ({prefix.cache_key}): {e}")
+
+    model = genai.GenerativeModel(model_name, system_instruction=prefix.text)
+    return {'model': model, 'cached_content': None, 'refresh_at': refresh_at}
+
+
+def _find_cached_content(caching, model_name, display_name):
+    """같은 지시문으로 만들어져 아직 만료되지 않은 컨텍스트 캐시를 찾습니다. (다른 워커가 만든 캐시 재사용)"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for cached_content in caching.CachedContent.list():
+        if (
+            cached_content.display_name == display_name
+            and cached_content.model == f"models/{model_name}"
+            and cached_content.expire_time > now + datetime.timedelta(seconds=30)
+        ):
+            return cached_content
+    return None
+
+
+def _is_too_small_error(error):
+    message = str(error).lower()
+    return 'too small' in message or 'min_total_token_count' in message
@@ -0,0 +1,55 @@
+import logging
+from urllib.parse import urlparse
+
+from research.models import ResearchSource, StatisticData
+
+logger = logging.getLogger(__name__)
+
+RESEARCH_SOURCE_TYPES = ('news', 'academic', 'general')
+MAX_ITEMS_PER_TYPE = 5
+
+
+def _source_name(source):
+    return source.author or urlparse(source.url).netloc
+
+
+def load_research_bundle(keyword, max_items=MAX_ITEMS_PER_TYPE):
+    """
+    키워드의 연구 자료를 콘텐츠 생성용 형식({'news', 'academic', 'general', 'statistics'})으로 불러옵니다.
+
+    - 자료는 유형과 관계없이 한 번에 조회해 파이썬에서 유형별 최신 max_items개를 고릅니다.
+    - 통계는 출처를 select_related로 함께 조회합니다. (통계마다 출처를 다시 조회하지 않음)
+    쿼리는 모두 2번입니다.
+    """
+    bundle = {source_type: [] for source_type in RESEARCH_SOURCE_TYPES}
+    bundle['statistics'] = []
+
+    sources = ResearchSource.objects.filter(
+        keyword=keyword,
+        source_type__in=RESEARCH_SOURCE_TYPES
+    ).only('source_type', 'title', 'url', 'snippet', 'author', 'published_date').order_by('-published_date')
+    for source in sources:
+        items = bundle[source.source_type]
+        if len(items) < max_items:
+            items.append({
+                'title': source.title, 'url': source.url, 'snippet': source.snippet,
+                'date': source.published_date.isoformat() if source.published_date else '',
+                'source': _source_name(source)
+            })
+
+    statistics = StatisticData.objects.filter(
+        source__keyword=keyword
+    ).select_related('source').order_by('-source__published_date')[:max_items]
+    for stat in statistics:
+        bundle['statistics'].append({
+            'value': stat.value, 'context': stat.context, 'pattern_type': stat.pattern_type,
+            'source_url': stat.source.url, 'source_title': stat.source.title,
+            'source': _source_name(stat.source),
+            'date': stat.source.published_date.isoformat() if stat.source.published_date else ''
+        })
+
+    logger.debug(
+        f"연구 자료 로드: keyword_id={getattr(keyword, 'pk', keyword)}, "
+        + ", ".join(f"{name}={len(items)}" for name, items in bundle.items())
+    )
+    return bundle
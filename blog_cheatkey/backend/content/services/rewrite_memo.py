@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class RewriteMemo:
+    """
+    LLM 문장 수정 결과를 DB(SentenceRewriteMemo)에 보관하는 내용 주소 기반 캐시
+
+    - 키: sha256(문장, 형태소, 모델, 프롬프트 버전)
+    - 같은 글을 다시 최적화하거나 같은 키워드로 재생성할 때 이미 받은 수정 결과를 재사용합니다.
+    - 저장 건수가 REWRITE_MEMO_MAX_ENTRIES를 넘으면 가장 오래 사용되지 않은 항목부터 삭제합니다.
+    - DB 오류가 나도 최적화는 계속되도록 캐시 조회/저장 실패는 로그만 남깁니다.
+    """
+
+    EVICTION_CHECK_INTERVAL = 200  # 저장 N건마다 크기 확인
+
+    def __init__(self, model_name, prompt_version):
+        self.model_name = model_name
+        self.prompt_version = prompt_version
+        self.max_entries = getattr(settings, 'REWRITE_MEMO_MAX_ENTRIES', 50000)
+        self._lock = threading.Lock()
+        self._writes_since_check = 0
+        self.hits = 0
+        self.misses = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def make_key(self, sentence, morpheme):
+        raw = '\x1f'.join([sentence, morpheme, self.model_name, self.prompt_version])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get_many(self, sentences, morpheme):
+        """
+        캐시된 수정 결과를 {문장 위치: 수정 결과}로 반환합니다.
+        """
+        from backend.content.models import SentenceRewriteMemo
+
+        keys = [self.make_key(sentence, morpheme) for sentence in sentences]
+        found = {}
+        try:
+            rows = dict(SentenceRewriteMemo.objects.filter(key__in=set(keys)).values_list('key', 'rewritten'))
+            if rows:
+                SentenceRewriteMemo.objects.filter(key__in=rows.keys()).update(
+                    hits=F('hits') + 1, last_used_at=timezone.now()
+                )
+        except Exception as e:
+            logger.warning(f"문장 수정 캐시 조회 실패: {e}")
+            rows = {}
+
+        for i, key in enumerate(keys):
+            if key in rows:
+                found[i] = rows[key]
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(sentences) - len(found)
+        return found
+
+    def put_many(self, pairs, morpheme):
+        """
+        (원문 문장, 수정 결과) 목록을 저장합니다.
+        """
+        from backend.content.models import SentenceRewriteMemo
+
+        entries = {}
+        for sentence, rewritten in pairs:
+            key = self.make_key(sentence, morpheme)
+            entries[key] = SentenceRewriteMemo(
+                key=key,
+                morpheme=morpheme[:100],
+                sentence=sentence,
+                rewritten=rewritten,
+                model_name=self.model_name,
+                prompt_version=self.prompt_version,
+            )
+        if not entries:
+            return
+        try:
+            SentenceRewriteMemo.objects.bulk_create(entries.values(), ignore_conflicts=True)
+        except Exception as e:
+            logger.warning(f"문장 수정 캐시 저장 실패: {e}")
+            return
+
+        with self._lock:
+            self._writes_since_check += len(entries)
+            should_evict = self._writes_since_check >= self.EVICTION_CHECK_INTERVAL
+            if should_evict:
+                self._writes_since_check = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """최대 건수를 넘는 항목을 오래 사용되지 않은 순서로 삭제합니다."""
+        from backend.content.models import SentenceRewriteMemo
+
+        try:
+            overflow = SentenceRewriteMemo.objects.count() - self.max_entries
+            if overflow > 0:
+                stale_ids = list(
+                    SentenceRewriteMemo.objects.order_by('last_used_at').values_list('id', flat=True)[:overflow]
+                )
+                SentenceRewriteMemo.objects.filter(id__in=stale_ids).delete()
+                logger.info(f"문장 수정 캐시 {len(stale_ids)}건 정리")
+        except Exception as e:
+            logger.warning(f"문장 수정 캐시 정리 실패: {e}")
@@ -3,12 +3,51 @@ import json
 import logging
 import time
 import traceback
-from konlpy.tag import Okt
 from anthropic import Anthropic
 from django.conf import settings
+from .tokenizer import get_tokenizer
+from .llm_executor import get_limiter
 
 logger = logging.getLogger(__name__)
 
+def default_substitutions(target_term, tokenizer):
+    """
+    API 없이 쓸 수 있는 기본 대체어(지시어) 목록. 명사면 명사형, 아니면 부사형 지시어를 반환합니다.
+    """
+    # 키워드/형태소가 명사인지 확인
+    is_noun = False
+    try:
+        pos_tagged = tokenizer.pos(target_term)
+        is_noun = any(tag.startswith('N') for _, tag in pos_tagged)
+    except:
+        is_noun = True  # 확인할 수 없으면 명사로 취급
+    
+    return _default_substitution_list(is_noun)
+
+
+def default_substitutions_many(target_terms, tokenizer):
+    """
+    여러 형태소의 기본 대체어 목록을 {형태소: 대체어 목록}으로 반환합니다.
+    품사 태깅을 한 번에 요청합니다. (토크나이저 서버 사용 시 왕복 1회)
+    """
+    target_terms = list(dict.fromkeys(target_terms))
+    try:
+        tagged_list = tokenizer.call_many('pos', target_terms)
+    except Exception:
+        return {term: default_substitutions(term, tokenizer) for term in target_terms}
+    return {
+        term: _default_substitution_list(any(tag.startswith('N') for _, tag in pos_tagged))
+        for term, pos_tagged in zip(target_terms, tagged_list)
+    }
+
+
+def _default_substitution_list(is_noun):
+    if is_noun:
+        return ["이것", "이", "해당 항목", "이 주제", "그것", "해당 제품", "이 분야", "이 항목"]
+    else:
+        return ["이렇게", "이런 방식으로", "이와 같이", "그렇게", "이러한 방식으로"]
+
+
 class SubstitutionGenerator:
     """
     키워드와 형태소에 대한 대체어를 완전히 동적으로 생성하는 클래스
@@ -18,7 +57,7 @@ class SubstitutionGenerator:
         self.anthropic_api_key = settings.ANTHROPIC_API_KEY
         self.model = "claude-3-7-sonnet-20250219"
         self.client = Anthropic(api_key=self.anthropic_api_key)
-        self.okt = Okt()
+        self.okt = get_tokenizer() # 워커 공유 토크나이저
         
         # 캐시 - 키워드/형태소에 대한 대체어 목록을 저장
         self.substitution_cache = {}
@@ -75,19 +114,7 @@ class SubstitutionGenerator:
             list: 기본 대체어 목록
         """
         target_term = morpheme if morpheme else keyword
-        
-        # 키워드/형태소가 명사인지 확인
-        is_noun = False
-        try:
-            pos_tagged = self.okt.pos(target_term)
-            is_noun = any(tag.startswith('N') for _, tag in pos_tagged)
-        except:
-            is_noun = True  # 확인할 수 없으면 명사로 취급
-        
-        if is_noun:
-            return ["이것", "이", "해당 항목", "이 주제", "그것", "해당 제품", "이 분야", "이 항목"]
-        else:
-            return ["이렇게", "이런 방식으로", "이와 같이", "그렇게", "이러한 방식으로"]
+        return default_substitutions(target_term, self.okt)
     
     def _generate_dynamic_substitutions(self, keyword, morpheme=None):
         """
@@ -120,14 +147,15 @@ class SubstitutionGenerator:
         """
         
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1024,
-                temperature=0.7,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            with get_limiter('anthropic'):
+                response = self.client.messages.create(
+                    model=self.model,
+                    max_tokens=1024,
+                    temperature=0.7,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
             
             content = response.content[0].text
             
@@ -0,0 +1,128 @@
+import logging
+
+from .morpheme_counter import MorphemeCounter
+from .tokenizer import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# 키워드는 최적화 작업 동안 바뀌지 않으므로 프로세스 전역으로 재사용합니다.
+_target_set_cache = LRUCache(max_size=256)
+_counter_cache = LRUCache(max_size=256)
+
+
+def get_counter(base_morphemes, compound_morphemes):
+    """
+    목표 형태소 집합에 대한 MorphemeCounter를 반환합니다. (집합별로 1회만 컴파일)
+    """
+    cache_key = (tuple(base_morphemes), tuple(compound_morphemes))
+    counter = _counter_cache.get(cache_key)
+    if counter is None:
+        counter = MorphemeCounter(base_morphemes, compound_morphemes)
+        _counter_cache.set(cache_key, counter)
+    return counter
+
+
+def get_target_set(keyword, custom_morphemes, tokenizer):
+    """
+    (키워드, 사용자 지정 형태소 집합)에 대한 TargetSet을 반환합니다.
+    키워드 분해(Okt.morphs)에 실패한 결과는 캐시하지 않고 다음 호출에서 다시 시도합니다.
+    """
+    cache_key = (keyword, frozenset(custom_morphemes or ()))
+    target_set = _target_set_cache.get(cache_key)
+    if target_set is not None:
+        return target_set
+
+    try:
+        base_morphemes_from_keyword = [m for m in tokenizer.morphs(keyword) if len(m) >= 2]
+    except Exception as e:
+        logger.error(f"Okt morphs error for keyword '{keyword}': {e}")
+        return TargetSet(keyword, custom_morphemes, [])
+
+    target_set = TargetSet(keyword, custom_morphemes, base_morphemes_from_keyword)
+    _target_set_cache.set(cache_key, target_set)
+    return target_set
+
+
+def get_target_sets(keywords, custom_morphemes, tokenizer):
+    """
+    여러 키워드의 TargetSet을 {키워드: TargetSet}으로 반환합니다.
+    캐시에 없는 키워드의 분해(Okt.morphs)는 한 번에 요청합니다. (토크나이저 서버 사용 시 왕복 1회)
+    """
+    keywords = list(dict.fromkeys(keywords))
+    target_sets = {}
+    missing = []
+    for keyword in keywords:
+        target_set = _target_set_cache.get((keyword, frozenset(custom_morphemes or ())))
+        if target_set is not None:
+            target_sets[keyword] = target_set
+        else:
+            missing.append(keyword)
+    if not missing:
+        return target_sets
+
+    try:
+        morphs_list = tokenizer.call_many('morphs', missing)
+    except Exception as e:
+        logger.error(f"Okt morphs error for keywords {missing}: {e}")
+        # 키워드별로 다시 시도 (실패한 키워드는 get_target_set의 규칙대로 캐시하지 않음)
+        target_sets.update((keyword, get_target_set(keyword, custom_morphemes, tokenizer)) for keyword in missing)
+        return target_sets
+
+    for keyword, morphs in zip(missing, morphs_list):
+        target_set = TargetSet(keyword, custom_morphemes, [m for m in morphs if len(m) >= 2])
+        _target_set_cache.set((keyword, frozenset(custom_morphemes or ())), target_set)
+        target_sets[keyword] = target_set
+    return target_sets
+
+
+class TargetSet:
+    """
+    키워드 하나(+사용자 지정 형태소)에 대한 목표 형태소 집합
+
+    - 키워드 분해 결과(기본 형태소), 복합 형태소 목록, 컴파일된 MorphemeCounter를 보관합니다.
+    - 목록은 변경하지 않는 값으로 취급합니다. (analyze() 결과에는 복사본을 넣습니다)
+    """
+
+    def __init__(self, keyword, custom_morphemes, base_morphemes_from_keyword):
+        self.keyword = keyword
+        self.custom_morphemes = tuple(custom_morphemes or ())
+
+        # 사용자 지정 형태소 중 단일 단어 형태를 기본 형태소에 추가
+        base_morphemes = list(set(base_morphemes_from_keyword))
+        for cm in self.custom_morphemes:
+            if ' ' not in cm and cm not in base_morphemes: # 공백 없는 단어만
+                base_morphemes.append(cm)
+        base_morphemes.sort() # For consistent order
+
+        # 전체 키워드는 항상 복합 형태소
+        compound_morphemes = [keyword]
+
+        # 기본 형태소들의 조합으로 복합 형태소 생성 (예: 엔진 + 오일 -> 엔진오일)
+        # 현재는 간단히 Okt.morphs 결과의 연속된 두 단어를 조합합니다.
+        if len(base_morphemes_from_keyword) > 1:
+            for i in range(len(base_morphemes_from_keyword) - 1):
+                combo = base_morphemes_from_keyword[i] + base_morphemes_from_keyword[i+1]
+                if combo not in compound_morphemes and len(combo) > 2:
+                    compound_morphemes.append(combo)
+
+        # 사용자 지정 형태소 중 여러 단어 형태를 복합 형태소에 추가
+        for cm in self.custom_morphemes:
+            if ' ' in cm and cm not in compound_morphemes: # 공백 있는 구문만
+                compound_morphemes.append(cm)
+        compound_morphemes = sorted(set(compound_morphemes))
+
+        self.base = tuple(base_morphemes)
+        self.compound = tuple(compound_morphemes)
+        self.counter = get_counter(self.base, self.compound)
+
+    @property
+    def all_list(self):
+        return list(self.base) + list(self.compound)
+
+    def as_dict(self):
+        """analyze() 결과의 target_morphemes 형식"""
+        return {
+            'base': list(self.base),
+            'compound': list(self.compound),
+            'all_list': self.all_list
+        }
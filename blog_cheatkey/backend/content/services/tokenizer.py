@@ -0,0 +1,371 @@
+import functools
+import json
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class SharedTokenizer:
+    """
+    프로세스(워커) 전역에서 공유하는 KoNLPy Okt 토크나이저
+
+    - Okt(JVM 연결, 사전 로딩)는 워커당 한 번만 생성합니다.
+    - 백그라운드 작업 스레드에서 동시에 호출해도 안전하도록 호출을 하나의 게이트(lock)로 직렬화합니다.
+    - 호출 횟수/소요 시간/대기 시간을 누적해 작업 시간 중 토크나이저 비중을 확인할 수 있습니다.
+    """
+
+    METHODS = ('morphs', 'nouns', 'pos')
+
+    def __init__(self):
+        self._okt = None
+        self._init_lock = threading.Lock()
+        self._call_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = self._empty_stats()
+        self.warmed_up = False
+
+    def _empty_stats(self):
+        return {
+            'calls': 0,
+            'seconds': 0.0,
+            'wait_seconds': 0.0,
+            'max_seconds': 0.0,
+            'errors': 0,
+            'by_method': {method: 0 for method in self.METHODS},
+        }
+
+    def _get_okt(self):
+        if self._okt is None:
+            with self._init_lock:
+                if self._okt is None:
+                    from konlpy.tag import Okt
+                    started = time.monotonic()
+                    self._okt = Okt()
+                    logger.info(f"Okt 토크나이저 초기화 완료: {time.monotonic() - started:.2f}초")
+        return self._okt
+
+    def warm_up(self):
+        """JVM 연결과 사전 로딩을 미리 수행합니다. (워커 시작 시 1회)"""
+        if self.warmed_up:
+            return
+        try:
+            started = time.monotonic()
+            self.morphs("형태소 분석기 준비")
+            self.warmed_up = True
+            logger.info(f"Okt 토크나이저 워밍업 완료: {time.monotonic() - started:.2f}초")
+        except Exception as e:
+            logger.error(f"Okt 토크나이저 워밍업 실패: {e}")
+
+    def morphs(self, phrase, norm=False, stem=False):
+        return self._call('morphs', phrase, norm=norm, stem=stem)
+
+    def nouns(self, phrase):
+        return self._call('nouns', phrase)
+
+    def pos(self, phrase, norm=False, stem=False, join=False):
+        return self._call('pos', phrase, norm=norm, stem=stem, join=join)
+
+    def call_many(self, method, phrases, **kwargs):
+        """여러 문장을 한 번에 처리합니다. (원격 토크나이저와 동일한 인터페이스)"""
+        if method not in self.METHODS:
+            raise ValueError(f"지원하지 않는 토크나이저 메서드: {method}")
+        return [self._call(method, phrase, **kwargs) for phrase in phrases]
+
+    def _call(self, method, phrase, **kwargs):
+        okt = self._get_okt()
+        requested = time.monotonic()
+        failed = False
+        with self._call_lock:
+            started = time.monotonic()
+            try:
+                return getattr(okt, method)(phrase, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                finished = time.monotonic()
+                self._record(method, started - requested, finished - started, failed)
+
+    def _record(self, method, wait_seconds, seconds, failed):
+        with self._stats_lock:
+            targets = [self._stats] + list(getattr(self._local, 'trackers', []))
+            for stats in targets:
+                stats['calls'] += 1
+                stats['seconds'] += seconds
+                stats['wait_seconds'] += wait_seconds
+                stats['max_seconds'] = max(stats['max_seconds'], seconds)
+                stats['by_method'][method] += 1
+                if failed:
+                    stats['errors'] += 1
+
+    def get_stats(self):
+        """워커 시작 이후 누적된 토크나이저 호출 통계"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['by_method'] = dict(self._stats['by_method'])
+        stats['warmed_up'] = self.warmed_up
+        return stats
+
+    @contextmanager
+    def track(self):
+        """
+        현재 스레드(작업)에서 발생한 토크나이저 호출만 따로 집계합니다.
+
+        사용 예:
+            with get_tokenizer().track() as okt_stats:
+                ...
+            logger.info(okt_stats['seconds'])
+        """
+        stats = self._empty_stats()
+        trackers = getattr(self._local, 'trackers', None)
+        if trackers is None:
+            trackers = self._local.trackers = []
+        trackers.append(stats)
+        try:
+            yield stats
+        finally:
+            trackers.remove(stats)
+
+    def bind_tracking(self, func):
+        """
+        현재 스레드에서 진행 중인 track() 집계를 func를 실행하는 다른 스레드에도 적용하는 래퍼를 반환합니다.
+        (작업이 스레드 풀로 나눠 실행하는 호출도 작업의 집계에 포함하기 위해 사용)
+        프로세스 풀에서 실행되는 호출은 집계되지 않습니다.
+        """
+        bound = list(getattr(self._local, 'trackers', []))
+        if not bound:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trackers = getattr(self._local, 'trackers', None)
+            if trackers is None:
+                trackers = self._local.trackers = []
+            trackers.extend(bound)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                for stats in bound:
+                    trackers.remove(stats)
+        return wrapper
+
+
+class LRUCache:
+    """스레드 안전한 간단한 LRU 캐시"""
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+
+class TokenizerServerError(Exception):
+    """토크나이저 서버가 요청을 처리하지 못하고 {'error': ...}로 응답한 경우 (연결 자체는 정상)"""
+
+
+def _cache_key(method, phrase, kwargs):
+    return (method, phrase, tuple(sorted(kwargs.items())))
+
+
+def _restore_result(method, result, kwargs):
+    # JSON 전송 과정에서 튜플이 리스트로 바뀌므로 Okt 반환 형식으로 되돌립니다.
+    if method == 'pos' and not kwargs.get('join'):
+        return [tuple(item) for item in result]
+    return result
+
+
+class RemoteTokenizer:
+    """
+    Unix 소켓으로 토크나이저 서버(run_tokenizer_server)에 형태소 분석을 요청하는 클라이언트
+
+    - SharedTokenizer와 같은 morphs/nouns/pos 인터페이스를 제공하므로 호출부를 바꿀 필요가 없습니다.
+    - 여러 문장은 call_many()로 한 번의 왕복에 묶어서 보내고, 결과는 워커 내 LRU 캐시에 보관합니다.
+    - 서버에 연결할 수 없으면 워커 내 SharedTokenizer로 대체하고, 일정 시간 후 다시 연결을 시도합니다.
+    """
+
+    METHODS = SharedTokenizer.METHODS
+    RETRY_INTERVAL = 30  # 서버 연결 실패 후 재시도까지 대기 시간 (초)
+
+    def __init__(self, socket_path, timeout=10, cache_size=4096):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.cache = LRUCache(cache_size)
+        self._local = threading.local()
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
+        self._unavailable_until = 0
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'phrases': 0, 'seconds': 0.0, 'fallbacks': 0}
+        self.warmed_up = False
+
+    def warm_up(self):
+        """서버 연결만 확인합니다. (JVM은 서버 프로세스에만 로딩)"""
+        try:
+            self._request({'method': 'ping'})
+            self.warmed_up = True
+            logger.info(f"토크나이저 서버 연결 확인: {self.socket_path}")
+        except (OSError, ValueError, TokenizerServerError) as e:
+            logger.warning(f"토크나이저 서버에 연결할 수 없습니다 ({self.socket_path}): {e}")
+
+    def morphs(self, phrase, norm=False, stem=False):
+        return self.call_many('morphs', [phrase], norm=norm, stem=stem)[0]
+
+    def nouns(self, phrase):
+        return self.call_many('nouns', [phrase])[0]
+
+    def pos(self, phrase, norm=False, stem=False, join=False):
+        return self.call_many('pos', [phrase], norm=norm, stem=stem, join=join)[0]
+
+    def call_many(self, method, phrases, **kwargs):
+        if method not in self.METHODS:
+            raise ValueError(f"지원하지 않는 토크나이저 메서드: {method}")
+
+        results = [None] * len(phrases)
+        missing = OrderedDict()  # 캐시에 없는 문장 -> 결과를 채울 위치 목록 (중복 문장은 한 번만 요청)
+        for i, phrase in enumerate(phrases):
+            cached = self.cache.get(_cache_key(method, phrase, kwargs))
+            if cached is not None:
+                results[i] = list(cached) # 호출한 쪽이 결과를 수정해도 캐시가 바뀌지 않도록 복사본 반환
+            else:
+                missing.setdefault(phrase, []).append(i)
+
+        if missing:
+            fetched = self._fetch(method, list(missing), kwargs)
+            for (phrase, positions), result in zip(missing.items(), fetched):
+                self.cache.set(_cache_key(method, phrase, kwargs), result)
+                for i in positions:
+                    results[i] = list(result)
+        return results
+
+    def _fetch(self, method, phrases, kwargs):
+        if time.monotonic() >= self._unavailable_until:
+            started = time.monotonic()
+            try:
+                response = self._request({'method': method, 'phrases': phrases, 'kwargs': kwargs})
+                with self._stats_lock:
+                    self._stats['requests'] += 1
+                    self._stats['phrases'] += len(phrases)
+                    self._stats['seconds'] += time.monotonic() - started
+                return [_restore_result(method, result, kwargs) for result in response['results']]
+            except (OSError, ValueError, KeyError) as e:
+                self._unavailable_until = time.monotonic() + self.RETRY_INTERVAL
+                logger.warning(f"토크나이저 서버 요청 실패, 워커 내 토크나이저로 대체합니다: {e}")
+
+        with self._stats_lock:
+            self._stats['fallbacks'] += 1
+        return self._get_fallback().call_many(method, phrases, **kwargs)
+
+    def _get_fallback(self):
+        if self._fallback is None:
+            with self._fallback_lock:
+                if self._fallback is None:
+                    self._fallback = SharedTokenizer()
+        return self._fallback
+
+    def _request(self, payload):
+        # 스레드마다 연결 하나를 유지합니다. (요청/응답은 줄 단위 JSON)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            conn = self._local.conn = (sock, sock.makefile('rb'))
+
+        sock, reader = conn
+        try:
+            sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+            line = reader.readline()
+            if not line:
+                raise ConnectionError("토크나이저 서버가 연결을 종료했습니다.")
+            response = json.loads(line)
+        except (OSError, ValueError):
+            self._close_connection()
+            raise
+
+        if 'error' in response:
+            # 요청 하나의 처리 오류이므로 서버를 사용 불가로 표시하지 않고 호출한 쪽으로 전달합니다.
+            raise TokenizerServerError(response['error'])
+        return response
+
+    def _close_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['cache_hits'] = self.cache.hits
+        stats['cache_misses'] = self.cache.misses
+        stats['warmed_up'] = self.warmed_up
+        if self._fallback is not None:
+            stats['fallback'] = self._fallback.get_stats()
+        return stats
+
+    @contextmanager
+    def track(self):
+        """원격 호출 시간은 서버에서 집계되므로 워커 내 대체 토크나이저 호출만 집계합니다."""
+        with self._get_fallback().track() as stats:
+            yield stats
+
+    def bind_tracking(self, func):
+        return self._get_fallback().bind_tracking(func)
+
+
+_shared_tokenizer = None
+_shared_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """
+    워커 프로세스 전역 토크나이저를 반환합니다.
+    settings.TOKENIZER_SOCKET 이 설정되어 있으면 토크나이저 서버 클라이언트를 사용합니다.
+    """
+    global _shared_tokenizer
+    if _shared_tokenizer is None:
+        with _shared_tokenizer_lock:
+            if _shared_tokenizer is None:
+                from django.conf import settings
+                socket_path = getattr(settings, 'TOKENIZER_SOCKET', '')
+                if socket_path:
+                    _shared_tokenizer = RemoteTokenizer(socket_path)
+                else:
+                    _shared_tokenizer = SharedTokenizer()
+    return _shared_tokenizer
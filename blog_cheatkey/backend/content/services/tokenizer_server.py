@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import socketserver
+
+from .tokenizer import SharedTokenizer, LRUCache, _cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class _TokenizerRequestHandler(socketserver.StreamRequestHandler):
+    """
+    줄 단위 JSON 요청을 처리합니다.
+
+    요청: {"method": "morphs", "phrases": ["...", ...], "kwargs": {"stem": false}}
+    응답: {"results": [[...], ...]} 또는 {"error": "..."}
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = self.server.process(request)
+            except Exception as e:
+                logger.error(f"토크나이저 요청 처리 오류: {e}")
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class TokenizerServer(socketserver.ThreadingUnixStreamServer):
+    """
+    모든 gunicorn 워커가 공유하는 형태소 분석 서버 (Unix 소켓)
+
+    - JVM/Okt는 이 프로세스에만 로딩되므로 워커마다 수백 MB씩 쓰던 메모리를 절약합니다.
+    - 요청은 여러 문장을 묶어서 받을 수 있고, 결과는 LRU 캐시에 보관해 워커 간에 재사용합니다.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, cache_size=20000):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # 이전 실행에서 남은 소켓 파일 정리
+        self.socket_path = socket_path
+        self.tokenizer = SharedTokenizer()
+        self.cache = LRUCache(cache_size)
+        super().__init__(socket_path, _TokenizerRequestHandler)
+        os.chmod(socket_path, 0o660)
+
+    def process(self, request):
+        method = request.get('method')
+        if method == 'ping':
+            return {'results': []}
+        if method == 'stats':
+            stats = self.tokenizer.get_stats()
+            stats['cache_hits'] = self.cache.hits
+            stats['cache_misses'] = self.cache.misses
+            return {'results': [], 'stats': stats}
+        if method not in SharedTokenizer.METHODS:
+            return {'error': f"지원하지 않는 토크나이저 메서드: {method}"}
+
+        kwargs = request.get('kwargs') or {}
+        results = []
+        for phrase in request.get('phrases', []):
+            key = _cache_key(method, phrase, kwargs)
+            result = self.cache.get(key)
+            if result is None:
+                result = getattr(self.tokenizer, method)(phrase, **kwargs)
+                self.cache.set(key, result)
+            results.append(result)
+        return {'results': results}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
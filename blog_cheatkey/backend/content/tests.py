@@ -1,3 +1,975 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .services import prompt_prefix
+from .services.analysis_store import save_content_with_analysis
+from .services.batch import BatchGeneration
+from .services.blog_document import BlogDocument
+from .services.constraint_solver import ConstraintSolver
+from .services.generator import ContentGenerator
+from .services.incremental_analysis import IncrementalAnalysis
+from .services.job_budget import BudgetExceeded, JobBudget
+from .services.morpheme_analyzer import MorphemeAnalyzer
+from .services.morpheme_counter import MorphemeCounter, exact_word_pattern
+from .services.optimizer import ContentOptimizer, get_cached_optimization, optimization_fingerprint
+from .services.perf import PerfRecorder
+from .services.pipeline import ContentPipeline, PipelineStage
+from .services.rewrite_memo import RewriteMemo
+from .services.tokenizer import RemoteTokenizer, SharedTokenizer, TokenizerServerError
+
+
+def regex_counts(base_morphemes, compound_morphemes, text):
+    """MorphemeCounter 도입 전의 형태소별 정규식 카운트"""
+    return {
+        'base': {m: len(re.findall(re.escape(m), text)) for m in base_morphemes},
+        'compound': {m: len(re.findall(exact_word_pattern(m), text)) for m in compound_morphemes},
+    }
+
+
+class FakeTokenizer:
+    """공백 기준으로 나누는 테스트용 토크나이저 (Okt 대신 사용)"""
+
+    def morphs(self, phrase, **kwargs):
+        return phrase.split()
+
+    def pos(self, phrase, **kwargs):
+        return [(word, 'Noun') for word in phrase.split()]
+
+    def call_many(self, method, phrases, **kwargs):
+        return [getattr(self, method)(phrase, **kwargs) for phrase in phrases]
+
+
+def make_solver(counter, substitutes=None, char_range=(0, 10 ** 6)):
+    key_ranges = {}
+    for kind, morpheme in counter.keys:
+        key_ranges[(kind, morpheme)] = (17, 20) if kind == 'base' else (0, 15)
+    return ConstraintSolver(
+        counter, key_ranges, char_range,
+        substitutions_for=(lambda morpheme: substitutes) if substitutes else None
+    )
+
+
+class MorphemeCounterTests(SimpleTestCase):
+    BASE = ['엔진', '오일', '교체', '진오', 'oil', '아아']
+    COMPOUND = ['엔진오일', '엔진오일 교체', '오일교체', 'oil', 'engine oil', '아아']
+    WORDS = ['엔진', '오일', '엔진오일', '교체', '엔진오일교체', '진오일', 'oil', 'oils', 'engine', '을', '의', '은', '아아아', '아']
+    SEPARATORS = [' ', '', '. ', ', ', '\n', '\n\n', '(', ')', '_', '1']
+
+    def test_matches_regex_counts(self):
+        counter = MorphemeCounter(self.BASE, self.COMPOUND)
+        rng = random.Random(1)
+        for _ in range(300):
+            text = ''.join(rng.choice(self.WORDS) + rng.choice(self.SEPARATORS) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(counter.count(text), regex_counts(self.BASE, self.COMPOUND, text), text)
+
+    def test_occurrences_agree_with_counts(self):
+        counter = MorphemeCounter(self.BASE, self.COMPOUND)
+        text = "엔진오일 교체 시기. 엔진오일교체와 oil, engine oil 점검"
+        positions = counter.occurrences(text)
+        self.assertEqual([len(spans) for spans in positions], counter.count_vector(text))
+        for (kind, morpheme), spans in zip(counter.keys, positions):
+            for start, end in spans:
+                self.assertEqual(text[start:end], morpheme)
+
+
+class IncrementalAnalysisTests(SimpleTestCase):
+    SENTENCES = [
+        "엔진오일 교체 방법을 알아봅시다.", "오일은 중요합니다!", "엔진 점검도 필요합니다?",
+        "엔진오일 교체 주기는 얼마일까요.", "정비소에 방문하세요.", "",
+    ]
+
+    def setUp(self):
+        self.counter = MorphemeCounter(['교체', '엔진', '오일'], ['엔진오일', '엔진오일 교체'])
+        self.rng = random.Random(7)
+
+    def make_text(self, count):
+        parts = []
+        for _ in range(count):
+            parts.append(self.rng.choice(self.SENTENCES[:-1]))
+            parts.append(self.rng.choice([' ', '\n', '\n\n', '  ']))
+        return ''.join(parts).strip()
+
+    def assert_matches_full_recount(self, document):
+        text = document.text
+        self.assertEqual(document.counts, self.counter.count(text))
+        self.assertEqual(document.char_count, len(text.replace(' ', '')))
+        self.assertEqual(document.text_length, len(text))
+
+    def test_replace_sentence_matches_full_recount(self):
+        document = IncrementalAnalysis(self.make_text(30), self.counter)
+        for _ in range(60):
+            if not len(document):
+                break
+            index = self.rng.randrange(len(document))
+            document.replace_sentence(index, self.rng.choice(self.SENTENCES))
+            self.assert_matches_full_recount(document)
+
+    def test_replace_span_matches_full_recount(self):
+        document = IncrementalAnalysis(self.make_text(30), self.counter)
+        for _ in range(60):
+            length = document.text_length
+            start = self.rng.randrange(length + 1)
+            end = min(length, start + self.rng.randrange(40))
+            new_text = self.rng.choice(self.SENTENCES + [' ', '엔진', '오일 교체 ', '\n\n'])
+            expected = document.text[:start] + new_text + document.text[end:]
+            document.replace_span(start, end, new_text)
+            self.assertEqual(document.text, expected)
+            self.assert_matches_full_recount(document)
+
+    def test_replace_span_joins_sentences(self):
+        # 구분 공백을 지우면 앞뒤 문장이 합쳐져 새 복합 형태소가 생길 수 있습니다.
+        document = IncrementalAnalysis("정비할 엔진. 오일 교체 안내. 끝.", self.counter)
+        start = document.text.index('. 오일')
+        document.replace_span(start, start + 2, '')
+        self.assertEqual(document.text, "정비할 엔진오일 교체 안내. 끝.")
+        self.assertEqual(document.count('compound', '엔진오일 교체'), 1)
+        self.assert_matches_full_recount(document)
+
+    def test_restore_snapshot(self):
+        document = IncrementalAnalysis(self.make_text(10), self.counter)
+        original = document.text
+        snapshot = document.snapshot()
+        document.replace_sentence(0, '')
+        document.replace_span(0, 5, '엔진오일')
+        document.restore(snapshot)
+        self.assertEqual(document.text, original)
+        self.assert_matches_full_recount(document)
+
+
+TOKENIZER_SERVER_SCRIPT = '''
+import sys
+from backend.content.services.tokenizer_server import TokenizerServer
+
+
+class StubOkt:
+    def morphs(self, phrase, **kwargs):
+        if phrase == '오류':
+            raise ValueError('분석 실패')
+        return phrase.split()
+
+    def nouns(self, phrase):
+        return phrase.split()
+
+    def pos(self, phrase, **kwargs):
+        return [(word, 'Noun') for word in phrase.split()]
+
+
+server = TokenizerServer(sys.argv[1])
+server.tokenizer._okt = StubOkt()
+server.serve_forever()
+'''
+
+
+class LocalOkt:
+    """서버 대신 사용된 워커 내 토크나이저인지 구분할 수 있도록 결과 앞에 'local'을 붙입니다."""
+
+    def morphs(self, phrase, **kwargs):
+        return ['local', phrase]
+
+
+class RemoteTokenizerTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, 'tokenizer.sock')
+        self.server = None
+        self.start_server()
+        self.client = RemoteTokenizer(self.socket_path, timeout=5)
+        self.client._fallback = SharedTokenizer()
+        self.client._fallback._okt = LocalOkt()
+
+    def tearDown(self):
+        self.client._close_connection()
+        self.stop_server()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def start_server(self):
+        self.server = subprocess.Popen(
+            [sys.executable, '-c', TOKENIZER_SERVER_SCRIPT, self.socket_path],
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        )
+        # 이전 서버가 남긴 소켓 파일이 있을 수 있으므로 실제로 연결될 때까지 기다립니다.
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                if sock.connect_ex(self.socket_path) == 0:
+                    return
+            time.sleep(0.02)
+        self.fail("토크나이저 서버가 시작되지 않았습니다.")
+
+    def stop_server(self):
+        if self.server is not None:
+            self.server.kill()
+            self.server.wait()
+            self.server = None
+
+    def test_line_delimited_json_protocol(self):
+        def request(payload):
+            sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+            return json.loads(reader.readline())
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(self.socket_path)
+            reader = sock.makefile('rb')
+            self.assertEqual(request({'method': 'morphs', 'phrases': ['엔진 오일', '교체']}), {'results': [['엔진', '오일'], ['교체']]})
+            self.assertIn('error', request({'method': 'unknown'}))
+            self.assertIn('error', request({'method': 'morphs', 'phrases': ['오류']}))
+            # 오류 응답 뒤에도 같은 연결을 계속 사용할 수 있습니다.
+            self.assertEqual(request({'method': 'ping'}), {'results': []})
+
+    def test_client_batches_and_restores_results(self):
+        self.assertEqual(self.client.call_many('morphs', ['엔진 오일', '교체 방법', '엔진 오일']), [
+            ['엔진', '오일'], ['교체', '방법'], ['엔진', '오일'],
+        ])
+        self.assertEqual(self.client.pos('엔진 오일'), [('엔진', 'Noun'), ('오일', 'Noun')])
+        stats = self.client.get_stats()
+        self.assertEqual((stats['requests'], stats['phrases'], stats['fallbacks']), (2, 3, 0))
+
+    def test_server_error_is_raised_per_request(self):
+        with self.assertRaises(TokenizerServerError):
+            self.client.morphs('오류')
+        # 요청 하나의 오류로 서버를 사용 불가로 표시하지 않습니다.
+        self.assertEqual(self.client.morphs('엔진 점검'), ['엔진', '점검'])
+        self.assertEqual(self.client.get_stats()['fallbacks'], 0)
+
+    def test_falls_back_when_server_dies(self):
+        self.assertEqual(self.client.morphs('엔진 오일'), ['엔진', '오일'])
+        self.stop_server()
+
+        self.assertEqual(self.client.morphs('교체 방법'), ['local', '교체 방법'])
+        self.assertEqual(self.client.get_stats()['fallbacks'], 1)
+        self.assertGreater(self.client._unavailable_until, time.monotonic())
+
+    def test_reconnects_after_retry_interval(self):
+        self.stop_server()
+        self.assertEqual(self.client.morphs('엔진 오일'), ['local', '엔진 오일'])
+        self.start_server()
+
+        # RETRY_INTERVAL 동안은 서버가 다시 떠도 연결을 시도하지 않습니다.
+        self.assertEqual(self.client.morphs('교체 방법'), ['local', '교체 방법'])
+        self.client._unavailable_until = time.monotonic() - 1
+        self.assertEqual(self.client.morphs('엔진 점검'), ['엔진', '점검'])
+        self.assertEqual(self.client.get_stats()['fallbacks'], 2)
+
+
+class AnalyzeManyTests(SimpleTestCase):
+    FILLER = "가나다라마바사아자차. " * 160  # 공백 제외 1760자
+
+    def setUp(self):
+        self.analyzer = MorphemeAnalyzer()
+        self.analyzer.okt = FakeTokenizer()
+
+    def test_ranks_best_candidate_first(self):
+        morphemes_only = "엔진과 오일 " * 18
+        texts = ["엔진 점검.", morphemes_only, morphemes_only + self.FILLER, "엔진 점검."]
+        ranked = self.analyzer.analyze_many(texts, '엔진 오일', use_pool=False)
+
+        self.assertEqual([item['index'] for item in ranked], [2, 1, 0, 3])
+        self.assertTrue(ranked[0]['analysis']['is_fully_optimized'])
+        self.assertTrue(ranked[1]['analysis']['is_valid_morphemes'])
+        for better, worse in zip(ranked, ranked[1:]):
+            self.assertFalse(self.analyzer.is_better_optimization(worse['analysis'], better['analysis']))
+
+    def test_matches_single_analysis(self):
+        texts = ["엔진오일 교체 방법. " * 5, "오일 점검"]
+        ranked = self.analyzer.analyze_many(texts, '엔진 오일', use_pool=False)
+        for item in ranked:
+            expected = self.analyzer.analyze(texts[item['index']], '엔진 오일')
+            self.assertEqual(item['analysis'], expected)
+
+
+def make_optimizer():
+    """API 클라이언트를 만들지 않는 테스트용 ContentOptimizer (필요한 속성은 테스트에서 설정)"""
+    optimizer = ContentOptimizer.__new__(ContentOptimizer)
+    optimizer.perf = PerfRecorder('test')
+    return optimizer
+
+
+class BatchReductionParserTests(SimpleTestCase):
+    def setUp(self):
+        self.optimizer = make_optimizer()
+
+    def parse(self, text, count=3):
+        return self.optimizer._parse_batch_reduction_response(text, count)
+
+    def test_parses_id_array(self):
+        text = '[{"id": 0, "sentence": " 수정된 문장. "}, {"id": 1, "sentence": ""}, {"id": 2, "sentence": "원문."}]'
+        self.assertEqual(self.parse(text), {0: '수정된 문장.', 1: '', 2: '원문.'})
+
+    def test_parses_fenced_json_with_surrounding_text(self):
+        text = '결과입니다.\n```json\n[{"id": 1, "sentence": "두 번째"}, {"id": 0, "sentence": "첫 번째"}]\n```'
+        self.assertEqual(self.parse(text, 2), {0: '첫 번째', 1: '두 번째'})
+
+    def test_plain_string_array_uses_position(self):
+        self.assertEqual(self.parse('["가", "나"]', 2), {0: '가', 1: '나'})
+
+    def test_skips_missing_out_of_range_and_invalid_entries(self):
+        text = json.dumps([
+            {"id": 0, "sentence": "유지"},
+            {"id": 3, "sentence": "범위 밖"},
+            {"id": -1, "sentence": "음수"},
+            {"id": "1", "sentence": "문자열 id"},
+            {"id": 2, "sentence": None},
+            {"id": 2},
+            "세 번째 항목은 id 없는 문자열",
+        ], ensure_ascii=False)
+        # 누락/잘못된 항목은 빠지고, 호출한 쪽에서 해당 문장만 다시 요청합니다.
+        self.assertEqual(self.parse(text), {0: '유지'})
+
+    def test_malformed_responses_return_none(self):
+        self.assertIsNone(self.parse('문장을 수정할 수 없습니다.'))
+        self.assertIsNone(self.parse('[{"id": 0, "sentence": "닫히지 않음"'))
+        self.assertIsNone(self.parse('[{"id": 0, "sentence": "따옴표 누락}]'))
+
+    def test_batch_request_retries_only_missing_sentences(self):
+        response = type('Response', (), {'text': '[{"id": 0, "sentence": "가."}, {"id": 2, "sentence": ""}]'})()
+        self.optimizer._generate_with_gemini = lambda prompt, **kwargs: response
+        retried = []
+
+        def reduce_individually(sentences, morpheme):
+            retried.extend(sentences)
+            return [f"{sentence}!" for sentence in sentences]
+
+        self.optimizer._ask_llm_for_sentence_reductions_concurrently = reduce_individually
+        result = self.optimizer._ask_llm_for_batch_sentence_reduction(['엔진 A.', '엔진 B.', '엔진 C.'], '엔진')
+
+        self.assertEqual(result, ['가.', '엔진 B.!', ''])
+        self.assertEqual(retried, ['엔진 B.'])
+
+
+class ConstraintSolverTests(SimpleTestCase):
+    def setUp(self):
+        self.counter = MorphemeCounter(['교체', '엔진', '오일'], ['엔진오일', '엔진오일 교체'])
+
+    def test_does_not_substitute_inside_larger_word(self):
+        # 기본 형태소 '엔진'이 '엔진오일'의 일부로만 나오면 치환하지 않고 문장 삭제로 줄여야 합니다.
+        text = "엔진오일 교체 방법을 알아봅시다. " * 22
+        result = make_solver(self.counter, ['이것']).solve(text.strip())
+
+        self.assertNotIn('이것', result.text)
+        self.assertFalse([op for op in result.operations if op['op'] == 'substitute'])
+        counts = self.counter.count(result.text)
+        self.assertLessEqual(counts['base']['엔진'], 20)
+
+    def test_substitutes_standalone_occurrence(self):
+        solver = make_solver(self.counter, ['이것'])
+        key_id = self.counter.key_index[('base', '엔진')]
+
+        self.assertEqual(solver._substitute_once("엔진오일과 엔진 상태", key_id, '이것'), "엔진오일과 이것 상태")
+        self.assertEqual(solver._substitute_once("(엔진) 점검", key_id, '이것'), "(이것) 점검")
+        self.assertIsNone(solver._substitute_once("엔진오일 교체", key_id, '이것'))
+        self.assertIsNone(solver._substitute_once("엔진을 점검", key_id, '이것'))
+
+
+    def test_optimizer_solver_does_not_call_llm_for_substitutions(self):
+        optimizer = make_optimizer()
+        optimizer.morpheme_analyzer = MorphemeAnalyzer()
+        optimizer.morpheme_analyzer.okt = FakeTokenizer()
+        optimizer.substitution_generator = mock.Mock()
+        target_set = optimizer.morpheme_analyzer.get_target_set('엔진 오일', None)
+        document = BlogDocument("엔진 점검은 중요합니다. " * 25, target_set.counter)
+
+        optimizer._solve_targets_locally(document, '엔진 오일', None)
+
+        optimizer.substitution_generator.get_substitutions.assert_not_called()
+        self.assertLessEqual(document.count('base', '엔진'), 20)
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("조건이 충족되지 않았습니다.")
+        time.sleep(0.01)
+
+
+class GateLimiter:
+    """첫 요청만 바로 통과시키고, hold=True이면 나머지는 release가 열릴 때까지 대기시키는 테스트용 제한기"""
+
+    def __init__(self, hold):
+        self.hold = hold
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+        self.entered = 0
+        self.exited = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.entered += 1
+            first = self.entered == 1
+        if self.hold and not first:
+            self.release.wait(5)
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.exited += 1
+        return False
+
+
+class FakeGeminiModel:
+    """
+    호출을 기록하는 테스트용 Gemini 모델
+    첫 호출은 wait_for_calls개의 호출이 시작될 때까지 기다렸다가 바로 응답하고, 나머지 호출은 gate가 열릴 때까지 대기합니다.
+    """
+
+    def __init__(self, text, wait_for_calls=1):
+        self.text = text
+        self.wait_for_calls = wait_for_calls
+        self.gate = threading.Event()
+        self._changed = threading.Condition()
+        self.calls = 0
+        self.finished = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        with self._changed:
+            self.calls += 1
+            first = self.calls == 1
+            self._changed.notify_all()
+            if first:
+                self._changed.wait_for(lambda: self.calls >= self.wait_for_calls, timeout=5)
+        if not first:
+            self.gate.wait(5)
+        usage = type('Usage', (), {'total_token_count': 100, 'cached_content_token_count': 0})()
+        with self._changed:
+            self.finished += 1
+        return type('Response', (), {'text': self.text, 'usage_metadata': usage})()
+
+
+class SpeculativeStrategyTests(SimpleTestCase):
+    OPTIMIZED = "엔진과 오일 " * 18 + "가나다라마바사아자차. " * 160
+
+    def run_strategies(self, model, limiter):
+        optimizer = make_optimizer()
+        optimizer.model_name = 'gemini-test'
+        optimizer.budget = JobBudget()
+        optimizer.morpheme_analyzer = MorphemeAnalyzer()
+        optimizer.morpheme_analyzer.okt = FakeTokenizer()
+        original = "엔진 점검."
+        analysis = optimizer.morpheme_analyzer.analyze(original, '엔진 오일')
+        optimizer_module = sys.modules[ContentOptimizer.__module__]
+        with mock.patch.object(optimizer_module, 'get_gemini_model', lambda name, prefix: model), \
+                mock.patch.object(optimizer_module, 'get_limiter', lambda provider: limiter):
+            content, best_analysis, _ = optimizer._run_speculative_prompt_strategies(original, '엔진 오일', None, analysis)
+        self.assertEqual(content, self.OPTIMIZED)
+        self.assertTrue(best_analysis['is_fully_optimized'])
+        return optimizer
+
+    def test_queued_requests_are_skipped_after_success(self):
+        model = FakeGeminiModel(self.OPTIMIZED)
+        limiter = GateLimiter(hold=True)
+        optimizer = self.run_strategies(model, limiter)
+
+        # 제한기를 기다리던 요청은 성공 뒤에 대기열에서 나와도 API를 호출하지 않습니다.
+        limiter.release.set()
+        wait_until(lambda: limiter.exited == 3)
+        self.assertEqual(model.calls, 1)
+        counters = optimizer.perf.to_dict()['counters']
+        self.assertEqual(counters['llm_calls'], 1)
+        self.assertNotIn('llm_abandoned_calls', counters)
+        self.assertEqual(optimizer.budget.llm_calls, 1)
+
+    def test_abandoned_requests_are_counted_once_and_late_usage_dropped(self):
+        model = FakeGeminiModel(self.OPTIMIZED, wait_for_calls=3)
+        optimizer = self.run_strategies(model, GateLimiter(hold=False))
+
+        counters = optimizer.perf.to_dict()['counters']
+        self.assertEqual((counters['llm_calls'], counters['llm_abandoned_calls'], counters['llm_tokens']), (3, 2, 100))
+        self.assertEqual((optimizer.budget.llm_calls, optimizer.budget.tokens), (3, 100))
+
+        # 작업이 끝난 뒤 도착한 응답은 예산/perf를 바꾸지 않습니다.
+        model.gate.set()
+        wait_until(lambda: model.finished == 3)
+        time.sleep(0.05)
+        self.assertEqual(optimizer.perf.to_dict()['counters'], counters)
+        self.assertEqual((optimizer.budget.llm_calls, optimizer.budget.tokens), (3, 100))
+
+
+class RewriteMemoTests(SimpleTestCase):
+    def test_key_depends_on_every_input(self):
+        memo = RewriteMemo('gemini-2.5-pro', 'reduce-v1')
+        key = memo.make_key('엔진오일을 교체합니다.', '엔진')
+        self.assertEqual(key, RewriteMemo('gemini-2.5-pro', 'reduce-v1').make_key('엔진오일을 교체합니다.', '엔진'))
+        self.assertEqual(len(key), 64)
+        self.assertNotEqual(key, memo.make_key('엔진오일을 교체합니다!', '엔진'))
+        self.assertNotEqual(key, memo.make_key('엔진오일을 교체합니다.', '오일'))
+        self.assertNotEqual(key, RewriteMemo('gemini-2.5-flash', 'reduce-v1').make_key('엔진오일을 교체합니다.', '엔진'))
+        self.assertNotEqual(key, RewriteMemo('gemini-2.5-pro', 'reduce-v2').make_key('엔진오일을 교체합니다.', '엔진'))
+
+    def test_key_separates_fields(self):
+        memo = RewriteMemo('gemini-2.5-pro', 'reduce-v1')
+        self.assertNotEqual(memo.make_key('엔진오일', '교체'), memo.make_key('엔진', '오일교체'))
+
+
+class SentenceReductionMemoTests(SimpleTestCase):
+    def test_stores_unchanged_answers_but_not_errors(self):
+        optimizer = make_optimizer()
+        optimizer.budget = JobBudget()
+        optimizer.batch_sentence_reduction = False
+        optimizer.rewrite_memo = mock.Mock()
+        optimizer.rewrite_memo.get_many.return_value = {1: '캐시된 결과.'}
+        # 문장별 요청: 수정 / 변경 없음 / API 오류(None)
+        optimizer._ask_llm_for_sentence_reductions_concurrently = mock.Mock(return_value=['수정.', '그대로.', None])
+
+        result = optimizer._request_sentence_reductions(['엔진 수정.', '캐시.', '그대로.', '오류.'], '엔진')
+
+        self.assertEqual(result, ['수정.', '캐시된 결과.', '그대로.', '오류.'])
+        optimizer._ask_llm_for_sentence_reductions_concurrently.assert_called_once_with(['엔진 수정.', '그대로.', '오류.'], '엔진')
+        optimizer.rewrite_memo.put_many.assert_called_once_with([('엔진 수정.', '수정.'), ('그대로.', '그대로.')], '엔진')
+
+
+def make_cached_content(content, custom_morphemes=None, cached_content=None):
+    """cached_content(기본값은 content) 기준으로 최적화 결과가 저장된 테스트용 BlogContent"""
+    fingerprint = optimization_fingerprint(cached_content or content, '엔진오일', custom_morphemes)
+    return mock.Mock(
+        content=content,
+        keyword=mock.Mock(keyword='엔진오일'),
+        meta_data={'optimization_cache': {'output_hash': fingerprint, 'result': {'success': True, 'char_count': 10}}}
+    )
+
+
+class OptimizationCacheTests(SimpleTestCase):
+    def test_returns_cached_result_for_same_input(self):
+        blog_content = make_cached_content('엔진오일 교체 주기.', ['교체', '주기'])
+
+        result = get_cached_optimization(blog_content, ['주기', '교체', '교체'])
+
+        self.assertEqual(result, {'success': True, 'char_count': 10, 'cached': True})
+        self.assertNotIn('cached', blog_content.meta_data['optimization_cache']['result'])
+
+    def test_changed_content_misses(self):
+        blog_content = make_cached_content('엔진오일 교체 주기!', cached_content='엔진오일 교체 주기.')
+        self.assertIsNone(get_cached_optimization(blog_content))
+
+    def test_changed_custom_morphemes_miss(self):
+        blog_content = make_cached_content('엔진오일 교체 주기.', ['교체'])
+        self.assertIsNone(get_cached_optimization(blog_content, ['교체', '주기']))
+        self.assertIsNone(get_cached_optimization(blog_content))
+
+    def test_missing_cache_misses(self):
+        blog_content = make_cached_content('엔진오일 교체 주기.')
+        blog_content.meta_data = None
+        self.assertIsNone(get_cached_optimization(blog_content))
+
+    def run_optimizer(self, force):
+        class FakeBlogContent:
+            DoesNotExist = type('DoesNotExist', (Exception,), {})
+            objects = mock.Mock()
+
+        FakeBlogContent.objects.get.return_value = make_cached_content('엔진오일 교체 주기.')
+        optimizer = make_optimizer()
+        optimizer.morpheme_analyzer = mock.Mock()
+        # 캐시를 건너뛰면 첫 분석에서 멈추도록 해서 최적화가 실제로 시작됐는지만 확인
+        optimizer.morpheme_analyzer.analyze.side_effect = RuntimeError('분석 시작')
+        optimizer.rewrite_memo = mock.Mock()
+        module = sys.modules[ContentOptimizer.__module__]
+        with mock.patch.object(module, 'BlogContent', FakeBlogContent), \
+                mock.patch.object(module, 'get_cached_optimization', return_value={'cached': True}) as cached:
+            result = optimizer.optimize_existing_content_v3(1, force=force)
+        return result, cached, optimizer.morpheme_analyzer.analyze
+
+    def test_optimizer_returns_cached_result(self):
+        result, cached, analyze = self.run_optimizer(force=False)
+        self.assertEqual(result, {'cached': True})
+        cached.assert_called_once()
+        analyze.assert_not_called()
+
+    def test_force_bypasses_cache(self):
+        result, cached, analyze = self.run_optimizer(force=True)
+        cached.assert_not_called()
+        analyze.assert_called_once()
+        self.assertFalse(result['success'])
+        self.assertIn('분석 시작', result['message'])
+
+
+class JobBudgetTests(SimpleTestCase):
+    def response(self, tokens):
+        return type('Response', (), {'usage_metadata': type('Usage', (), {'total_token_count': tokens})()})()
+
+    def test_llm_call_limit(self):
+        budget = JobBudget(max_llm_calls=2)
+        budget.charge_llm_call()
+        budget.check()
+        budget.charge_llm_call()
+        self.assertEqual(budget.exhausted_reason(), 'llm_calls')
+        with self.assertRaises(BudgetExceeded):
+            budget.check()
+
+    def test_token_limit(self):
+        budget = JobBudget(max_tokens=100)
+        self.assertEqual(budget.charge_llm_call(self.response(60)), 60)
+        self.assertFalse(budget.is_exhausted())
+        budget.charge_llm_call(self.response(40))
+        self.assertEqual(budget.exhausted_reason(), 'tokens')
+        self.assertEqual(budget.to_dict()['used']['tokens'], 100)
+
+    def test_wall_time_limit(self):
+        budget = JobBudget(max_seconds=5)
+        budget.started_at -= 10
+        self.assertEqual(budget.remaining_seconds(), 0.0)
+        self.assertEqual(budget.exhausted_reason(), 'wall_time')
+
+    def test_zero_limits_are_unlimited(self):
+        budget = JobBudget(max_seconds=0, max_llm_calls=0, max_tokens=0)
+        for _ in range(10):
+            budget.charge_llm_call(self.response(1000))
+        self.assertIsNone(budget.remaining_seconds())
+        self.assertFalse(budget.is_exhausted())
+
+    def test_close_stops_updates(self):
+        updates = []
+        budget = JobBudget(on_update=lambda b: updates.append(b.llm_calls))
+        budget.charge_llm_call()
+        budget.close()
+        budget.charge_llm_call()
+        self.assertEqual(updates, [1])
+
+
+class SaveContentWithAnalysisTests(TestCase):
+    def setUp(self):
+        # 테스트 실행 경로(content / backend.content)와 관계없이 등록된 모델을 사용
+        self.BlogContent = apps.get_model('content', 'BlogContent')
+        self.MorphemeAnalysis = apps.get_model('content', 'MorphemeAnalysis')
+        user = get_user_model().objects.create_user(username='writer', password='password')
+        keyword = apps.get_model('key_word', 'Keyword').objects.create(user=user, keyword='엔진오일')
+        self.blog_content = self.BlogContent.objects.create(user=user, keyword=keyword, title='제목', content='원문')
+        self.kept = self.MorphemeAnalysis.objects.create(
+            content=self.blog_content, morpheme='엔진', count=3, is_valid=False, morpheme_type='base'
+        )
+        self.MorphemeAnalysis.objects.create(
+            content=self.blog_content, morpheme='교체', count=1, is_valid=False, morpheme_type='base'
+        )
+
+    def analysis(self, counts):
+        return {'morpheme_analysis': {'counts': counts}}
+
+    def stored_rows(self):
+        return {
+            row.morpheme: (row.count, row.is_valid, row.morpheme_type)
+            for row in self.MorphemeAnalysis.objects.filter(content=self.blog_content)
+        }
+
+    def test_upserts_rows_and_deletes_stale_ones(self):
+        save_content_with_analysis(self.blog_content, self.analysis({
+            '엔진': {'count': 18, 'is_valid': True, 'type': 'base'},
+            '엔진오일': {'count': 5, 'is_valid': True, 'type': 'compound'},
+        }))
+
+        self.assertEqual(self.stored_rows(), {
+            '엔진': (18, True, 'base'),
+            '엔진오일': (5, True, 'compound'),
+        })
+        # 기존 행은 지우고 다시 만들지 않고 그대로 갱신
+        self.assertTrue(self.MorphemeAnalysis.objects.filter(pk=self.kept.pk, count=18).exists())
+
+    def test_empty_analysis_deletes_all_rows(self):
+        save_content_with_analysis(self.blog_content, self.analysis({}))
+        self.assertEqual(self.stored_rows(), {})
+
+    def test_update_fields_keeps_concurrent_changes(self):
+        # 다른 작업(제목 생성)이 같은 행의 제목을 먼저 바꾼 상황
+        self.BlogContent.objects.filter(pk=self.blog_content.pk).update(title='새 제목')
+        self.blog_content.content = '최적화된 본문'
+        self.blog_content.char_count = 6
+
+        save_content_with_analysis(
+            self.blog_content,
+            self.analysis({'엔진': {'count': 18, 'is_valid': True, 'type': 'base'}}),
+            update_fields=['content', 'char_count', 'updated_at']
+        )
+
+        saved = self.BlogContent.objects.get(pk=self.blog_content.pk)
+        self.assertEqual((saved.title, saved.content, saved.char_count), ('새 제목', '최적화된 본문', 6))
+        self.assertEqual(self.stored_rows(), {'엔진': (18, True, 'base')})
+
+
+def make_cached_content_entry(display_name, model_name='gemini-test', expires_in=3600):
+    """caching.CachedContent.list()가 돌려주는 컨텍스트 캐시 항목"""
+    expire_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=expires_in)
+    return mock.Mock(display_name=display_name, model=f'models/{model_name}', expire_time=expire_time)
+
+
+@override_settings(PROMPT_CACHE_ENABLED=True, GEMINI_CONTEXT_CACHE_TTL_SECONDS=3600)
+class GeminiPromptPrefixTests(SimpleTestCase):
+    def setUp(self):
+        self.prefix = prompt_prefix.PromptPrefix('test', 'v1', '지시문')
+        self.caching = mock.Mock()
+        self.caching.CachedContent.list.return_value = []
+        self.genai = mock.Mock()
+        # 워커 단위 모델/캐시 상태를 테스트마다 비우고, 캐시 API는 가짜 caching 모듈로 대체
+        for patcher in (
+            mock.patch.object(prompt_prefix, '_gemini_models', {}),
+            mock.patch.object(prompt_prefix, '_gemini_model_locks', {}),
+            mock.patch.object(prompt_prefix, '_gemini_uncacheable', set()),
+            mock.patch.object(prompt_prefix, 'genai', self.genai),
+            mock.patch.dict(sys.modules, {'google.generativeai.caching': self.caching}),
+            mock.patch('google.generativeai.caching', self.caching, create=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_model(self):
+        return prompt_prefix.get_gemini_model('gemini-test', self.prefix)
+
+    def test_creates_cache_once_and_reuses_model(self):
+        model = self.get_model()
+
+        self.assertIs(model, self.genai.GenerativeModel.from_cached_content.return_value)
+        self.assertIs(self.get_model(), model)
+        self.caching.CachedContent.create.assert_called_once_with(
+            model='models/gemini-test',
+            display_name=self.prefix.cache_key,
+            system_instruction='지시문',
+            ttl=datetime.timedelta(seconds=3600)
+        )
+        self.genai.GenerativeModel.from_cached_content.assert_called_once_with(
+            cached_content=self.caching.CachedContent.create.return_value
+        )
+
+    def test_reuses_cache_created_by_another_worker(self):
+        shared = make_cached_content_entry(self.prefix.cache_key)
+        self.caching.CachedContent.list.return_value = [
+            make_cached_content_entry(self.prefix.cache_key, expires_in=10), # 곧 만료
+            make_cached_content_entry(self.prefix.cache_key, model_name='gemini-other'),
+            make_cached_content_entry('다른 지시문'),
+            shared,
+        ]
+
+        self.get_model()
+
+        self.caching.CachedContent.create.assert_not_called()
+        shared.update.assert_called_once_with(ttl=datetime.timedelta(seconds=3600))
+        self.genai.GenerativeModel.from_cached_content.assert_called_once_with(cached_content=shared)
+
+    def test_extends_cache_before_expiry(self):
+        model = self.get_model()
+        entry = prompt_prefix._gemini_models[('gemini-test', self.prefix.cache_key)]
+        entry['refresh_at'] = 0 # 연장 시점이 지난 것으로 설정
+
+        self.assertIs(self.get_model(), model)
+        created = self.caching.CachedContent.create.return_value
+        created.update.assert_called_once_with(ttl=datetime.timedelta(seconds=3600))
+        self.caching.CachedContent.create.assert_called_once()
+        self.assertGreater(prompt_prefix._gemini_models[('gemini-test', self.prefix.cache_key)]['refresh_at'], 0)
+
+    def test_recreates_cache_when_extension_fails(self):
+        self.get_model()
+        entry = prompt_prefix._gemini_models[('gemini-test', self.prefix.cache_key)]
+        entry['refresh_at'] = 0
+        self.caching.CachedContent.create.return_value.update.side_effect = RuntimeError('not found')
+
+        self.get_model()
+
+        self.assertEqual(self.caching.CachedContent.create.call_count, 2)
+
+    def test_too_small_prefix_uses_system_instruction_without_retrying(self):
+        self.caching.CachedContent.create.side_effect = RuntimeError(
+            'Cached content is too small. total_token_count=100, min_total_token_count=4096'
+        )
+
+        model = self.get_model()
+
+        self.assertIs(model, self.genai.GenerativeModel.return_value)
+        self.genai.GenerativeModel.assert_called_once_with('gemini-test', system_instruction='지시문')
+        # 작은 지시문은 다시 만들어도 캐시를 시도하지 않음
+        prompt_prefix._gemini_models.clear()
+        self.get_model()
+        self.caching.CachedContent.create.assert_called_once()
+
+    def test_other_cache_errors_retry_later(self):
+        self.caching.CachedContent.create.side_effect = RuntimeError('permission denied')
+
+        model = self.get_model()
+
+        self.assertIs(model, self.genai.GenerativeModel.return_value)
+        entry = prompt_prefix._gemini_models[('gemini-test', self.prefix.cache_key)]
+        self.assertNotEqual(entry['refresh_at'], float('inf'))
+        entry['refresh_at'] = 0
+        self.get_model()
+        self.assertEqual(self.caching.CachedContent.create.call_count, 2)
+
+    @override_settings(PROMPT_CACHE_ENABLED=False)
+    def test_disabled_prompt_cache_skips_context_cache(self):
+        self.assertIs(self.get_model(), self.genai.GenerativeModel.return_value)
+        self.caching.CachedContent.list.assert_not_called()
+        self.caching.CachedContent.create.assert_not_called()
+
+    def test_anthropic_system_blocks(self):
+        self.assertEqual(prompt_prefix.anthropic_system_blocks(self.prefix), [
+            {'type': 'text', 'text': '지시문', 'cache_control': {'type': 'ephemeral'}}
+        ])
+        with override_settings(PROMPT_CACHE_ENABLED=False):
+            self.assertEqual(prompt_prefix.anthropic_system_blocks(self.prefix), [{'type': 'text', 'text': '지시문'}])
+
+
+class StubPipeline(ContentPipeline):
+    """단계 결과를 미리 정해 둔 테스트용 파이프라인 (failing에 있는 단계는 예외 발생)"""
+
+    GRAPH = [
+        ('intent', []), ('subtopics', []), ('research', ['subtopics']),
+        ('generate', ['intent', 'research']), ('optimize', ['generate']), ('titles', ['generate']),
+    ]
+
+    def __init__(self, failing, **kwargs):
+        self.failing = set(failing)
+        super().__init__(keyword_id=1, user_id=1, **kwargs)
+
+    def _build_stages(self):
+        return {
+            name: PipelineStage(name, self._stub_run(name), depends_on=depends_on)
+            for name, depends_on in self.GRAPH
+        }
+
+    def _stub_run(self, name):
+        def run(context):
+            if name in self.failing:
+                raise RuntimeError(f"{name} 실패")
+            return {'stage': name}
+        return run
+
+
+class ContentPipelineTests(SimpleTestCase):
+    def stage_states(self, pipeline):
+        return {name: stage['status'] for name, stage in pipeline.state['stages'].items()}
+
+    def test_failure_skips_dependent_stages(self):
+        pipeline = StubPipeline(failing=['research'])
+        pipeline.run()
+        self.assertEqual(self.stage_states(pipeline), {
+            'intent': 'completed', 'subtopics': 'completed', 'research': 'failed',
+            'generate': 'skipped', 'optimize': 'skipped', 'titles': 'skipped',
+        })
+        self.assertEqual(pipeline.state['status'], 'failed')
+        self.assertEqual(pipeline.state['progress'], 100)
+
+    def test_failed_follow_up_stage_is_partial(self):
+        pipeline = StubPipeline(failing=['optimize'])
+        pipeline.run()
+        states = self.stage_states(pipeline)
+        self.assertEqual(states['optimize'], 'failed')
+        self.assertEqual(states['titles'], 'completed')
+        self.assertEqual(pipeline.state['status'], 'partial')
+
+    def test_all_stages_completed(self):
+        pipeline = StubPipeline(failing=[])
+        pipeline.run()
+        self.assertEqual(set(self.stage_states(pipeline).values()), {'completed'})
+        self.assertEqual(pipeline.state['status'], 'completed')
+
+
+class BatchGenerationTests(SimpleTestCase):
+    def test_summary_math(self):
+        batch = BatchGeneration([1, 2, 3, 2], user_id=1)
+        self.assertEqual(batch.keyword_ids, [1, 2, 3])
+        batch._started = time.monotonic() - 120
+
+        batch._update_item(1, status='completed', seconds=10.0, llm_calls=2, llm_tokens=100)
+        batch._update_item(2, status='failed', seconds=20.0, error='실패')
+        batch._update_item(3, status='running')
+
+        summary = batch.state['summary']
+        self.assertEqual((summary['total'], summary['completed'], summary['failed'], summary['running']), (3, 1, 1, 1))
+        self.assertEqual(summary['avg_item_seconds'], 15.0)
+        self.assertAlmostEqual(summary['items_per_minute'], 0.5, places=2)
+        self.assertGreaterEqual(summary['elapsed_seconds'], 120)
+        self.assertEqual((summary['llm_calls'], summary['llm_tokens']), (2, 100))
+        self.assertEqual(batch.state['progress'], 66)
+
+    def test_empty_batch(self):
+        batch = BatchGeneration([], user_id=1)
+        batch._refresh_summary()
+        self.assertEqual(batch.state['progress'], 100)
+        self.assertEqual(batch.state['summary']['items_per_minute'], 0.0)
+
+
+def make_generator(drafts):
+    """
+    API 클라이언트 없이 초안 응답을 정해 둔 테스트용 ContentGenerator
+    drafts: {temperature: 초안 텍스트 또는 발생시킬 예외}
+    """
+    generator = ContentGenerator.__new__(ContentGenerator)
+    generator.perf = PerfRecorder('test')
+    generator.morpheme_analyzer = MorphemeAnalyzer()
+    generator.morpheme_analyzer.okt = FakeTokenizer()
+    generator.max_retries = 1
+    generator.retry_delay = 0
+
+    def create_message(prompt, temperature, stage, stream=None, prefix=None):
+        draft = drafts[temperature]
+        if isinstance(draft, Exception):
+            raise draft
+        return mock.Mock(content=[mock.Mock(text=draft)])
+
+    generator._create_message = mock.Mock(side_effect=create_message)
+    return generator
+
+
+class CandidateGenerationTests(SimpleTestCase):
+    OPTIMIZED = "엔진과 오일 " * 18 + "가나다라마바사아자차. " * 160
+
+    def test_keeps_successful_drafts_in_request_order(self):
+        generator = make_generator({0.7: '첫 초안', 0.9: RuntimeError('overloaded'), 0.5: '셋째 초안'})
+        stream = mock.Mock()
+
+        drafts = generator._generate_candidates('프롬프트', 3, stream)
+
+        self.assertEqual(drafts, [(0.7, '첫 초안'), (0.5, '셋째 초안')])
+        # 스트리밍 버퍼에는 첫 번째 초안만 기록
+        streams = {call.kwargs['temperature']: call.kwargs['stream'] for call in generator._create_message.call_args_list}
+        self.assertEqual(streams, {0.7: stream, 0.9: None, 0.5: None})
+
+    def test_raises_first_error_when_all_drafts_fail(self):
+        first_error = RuntimeError('첫 번째 오류')
+        generator = make_generator({0.7: first_error, 0.9: ValueError('두 번째 오류')})
+
+        with self.assertRaises(RuntimeError) as cm:
+            generator._generate_candidates('프롬프트', 2)
+        self.assertIs(cm.exception, first_error)
+
+    def test_generate_content_saves_best_draft_and_candidate_summary(self):
+        generator = make_generator({0.7: '엔진 점검.', 0.9: RuntimeError('overloaded'), 0.5: self.OPTIMIZED})
+        generator._create_optimized_content_prompt = mock.Mock(return_value='프롬프트')
+        generator._add_references = lambda content, research_data: content
+        generator._format_for_mobile = lambda content: content
+        generator._extract_references = lambda content: []
+        module = sys.modules[ContentGenerator.__module__]
+        blog_content_class = mock.Mock()
+        blog_content_class.objects.filter.return_value.order_by.return_value.first.return_value = None
+        blog_content_class.return_value.id = 7
+
+        with mock.patch.object(module, 'Keyword') as keyword_class, \
+                mock.patch.object(module, 'User'), \
+                mock.patch.object(module, 'BlogContent', blog_content_class), \
+                mock.patch.object(module, 'load_research_bundle', return_value={}), \
+                mock.patch.object(module, 'save_content_with_analysis') as save:
+            keyword_class.objects.get.return_value.keyword = '엔진 오일'
+            content_id = generator.generate_content(1, 1, subtopics_list=[], candidates=3)
+
+        self.assertEqual(content_id, 7)
+        fields = blog_content_class.call_args.kwargs
+        self.assertEqual(fields['content'], self.OPTIMIZED)
+        self.assertTrue(fields['is_optimized'])
+        summary = fields['meta_data']['candidates']
+        self.assertEqual(
+            [(item['temperature'], item['selected'], item['is_fully_optimized']) for item in summary],
+            [(0.5, True, True), (0.7, False, False)]
+        )
+        self.assertGreater(summary[1]['invalid_morphemes'], 0)
+        # 충족한 초안이 있으므로 검증 재작성(llm.verify)은 요청하지 않음
+        self.assertEqual(generator._create_message.call_count, 3)
+        self.assertEqual(save.call_args.args[1]['char_count'], fields['char_count'])
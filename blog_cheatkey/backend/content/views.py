@@ -1,18 +1,87 @@
 import threading
 import json
 import logging
+import time
+from django.conf import settings
 from django.core.cache import cache
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import BlogContent, MorphemeAnalysis
+from rest_framework.renderers import JSONRenderer
+from .models import BlogContent
 from backend.key_word.models import Keyword
 from .serializers import BlogContentSerializer, MorphemeAnalysisSerializer
+from .renderers import EventStreamRenderer
 from .services.generator import ContentGenerator
+from .services.optimizer import ContentOptimizer, get_cached_optimization
+from .services.job_budget import JobBudget
+from .services.optimization_plan import get_optimization_planner
+from .services.tokenizer import get_tokenizer
+from .services.generation_stream import GenerationStream
+from .services.pipeline import ContentPipeline, get_pipeline_status
+from .services.batch import BatchGeneration, BATCH_MODES, get_batch_status
 
 logger = logging.getLogger(__name__)
 
+# generate-stream(SSE) 폴링 간격, 최대 유지 시간, keep-alive 주석 간격 (초)
+GENERATION_STREAM_POLL_SECONDS = 0.25
+GENERATION_STREAM_MAX_SECONDS = 900
+GENERATION_STREAM_KEEPALIVE_SECONDS = 15
+
+# 워커 프로세스에서 동시에 열려 있는 생성 진행 스트림 수 제한 (스트림 하나가 요청 스레드 하나를 점유함)
+_generation_stream_slots = threading.BoundedSemaphore(max(1, getattr(settings, 'GENERATION_STREAM_MAX_CONNECTIONS', 2)))
+
+
+def generation_stream_unavailable_reason(request):
+    """
+    이 워커에서 SSE 스트림을 열 수 없는 이유를 반환합니다. (열 수 있으면 None)
+
+    - 동기(sync) 워커: 스트림이 최대 GENERATION_STREAM_MAX_SECONDS 동안 워커 전체를 점유하므로 열지 않습니다.
+    - 여러 프로세스 + 프로세스별 캐시(LocMemCache): 생성 스레드와 다른 워커에 연결되면 진행 상태를 볼 수 없습니다.
+    """
+    if not request.META.get('wsgi.multithread', False):
+        return "스레드 워커(gthread 등)에서만 스트림을 지원합니다."
+    if request.META.get('wsgi.multiprocess', False) and 'locmem' in settings.CACHES['default']['BACKEND'].lower():
+        return "여러 워커 프로세스에서는 공유 캐시(CACHE_BACKEND) 설정이 필요합니다."
+    return None
+
+
+class GenerationStreamSlot:
+    """
+    스트림 이벤트 이터레이터를 감싸 응답이 닫힐 때(정상 종료/연결 끊김) 스트림 슬롯을 반환합니다.
+    Django는 응답을 닫을 때 close()를 호출하므로, 이벤트를 하나도 보내기 전에 연결이 끊겨도 슬롯이 반환됩니다.
+    """
+
+    def __init__(self, events):
+        self._events = events
+        self._released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._events)
+
+    def close(self):
+        self._events.close()
+        if not self._released:
+            self._released = True
+            _generation_stream_slots.release()
+
+
+# 요청 하나에서 동시에 생성할 수 있는 초안 수 상한
+MAX_GENERATION_CANDIDATES = 5
+
+
+def parse_candidates(value):
+    """요청의 candidates 값을 1~MAX_GENERATION_CANDIDATES 범위의 정수로 변환합니다. (없거나 잘못된 값이면 None → 설정값 사용)"""
+    try:
+        return min(max(int(value), 1), MAX_GENERATION_CANDIDATES)
+    except (TypeError, ValueError):
+        return None
+
 class BlogContentViewSet(viewsets.ModelViewSet):
     serializer_class = BlogContentSerializer
     permission_classes = [IsAuthenticated]
@@ -29,6 +98,7 @@ class BlogContentViewSet(viewsets.ModelViewSet):
         target_audience = request.data.get('target_audience', {})
         business_info = request.data.get('business_info', {})
         custom_morphemes = request.data.get('custom_morphemes', [])
+        candidates = parse_candidates(request.data.get('candidates'))
         
         if not keyword_id:
             return Response({"error": "keyword_id is required"}, status=status.HTTP_400_BAD_REQUEST)
@@ -36,11 +106,14 @@ class BlogContentViewSet(viewsets.ModelViewSet):
         try:
             # 키워드 존재 확인
             keyword = Keyword.objects.get(id=keyword_id)
+
+            # 스레드가 시작되기 전에 연결한 SSE 클라이언트도 작업을 찾을 수 있도록 상태를 먼저 기록
+            cache.set(f"content_generation_{keyword_id}_{request.user.id}", {"status": "running", "progress": 0}, timeout=3600)
             
             # 백그라운드에서 콘텐츠 생성 시작
             thread = threading.Thread(
                 target=self._generate_content_in_background,
-                args=(keyword_id, request.user.id, target_audience, business_info, custom_morphemes)
+                args=(keyword_id, request.user.id, target_audience, business_info, custom_morphemes, candidates)
             )
             thread.daemon = True
             thread.start()
@@ -56,7 +129,7 @@ class BlogContentViewSet(viewsets.ModelViewSet):
             
             # 즉시 응답 반환
             return Response({
-                "message": "콘텐츠 생성이 시작되었습니다. 상태를 확인하려면 /status/ 엔드포인트를 사용하세요.",
+                "message": "콘텐츠 생성이 시작되었습니다. 상태를 확인하려면 /status/ 엔드포인트를, 작성 중인 글을 실시간으로 받으려면 /generate-stream/ 엔드포인트를 사용하세요.",
                 "keyword_id": keyword_id,
                 "temp_content_id": temp_content.id,
                 "status": "processing"
@@ -69,7 +142,7 @@ class BlogContentViewSet(viewsets.ModelViewSet):
             print(traceback.format_exc())
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    def _generate_content_in_background(self, keyword_id, user_id, target_audience, business_info, custom_morphemes):
+    def _generate_content_in_background(self, keyword_id, user_id, target_audience, business_info, custom_morphemes, candidates=None):
         """백그라운드에서 콘텐츠를 생성하는 메서드"""
         try:
             # 상태 업데이트 - 처리 중
@@ -103,14 +176,31 @@ class BlogContentViewSet(viewsets.ModelViewSet):
             # 상태 업데이트
             cache.set(cache_key, {"status": "running", "progress": 50, "message": "AI가 콘텐츠 작성 중..."}, timeout=3600)
 
+            # 작성 중인 부분 텍스트는 진행 버퍼에 기록 (generate-stream 엔드포인트에서 전달)
+            stream = GenerationStream(keyword_id, user_id) if getattr(settings, 'CONTENT_STREAMING', True) else None
+
             # 여기서 명시적으로 subtopics를 전달
-            content_id = generator.generate_content(
-                keyword_id=keyword_id,
-                user_id=user_id,
-                target_audience=target_audience,
-                business_info=business_info,
-                custom_morphemes=custom_morphemes,
-                subtopics_list=subtopics_data # Corrected this line
+            started = time.monotonic()
+            try:
+                with get_tokenizer().track() as okt_stats:
+                    content_id = generator.generate_content(
+                        keyword_id=keyword_id,
+                        user_id=user_id,
+                        target_audience=target_audience,
+                        business_info=business_info,
+                        custom_morphemes=custom_morphemes,
+                        subtopics_list=subtopics_data, # Corrected this line
+                        stream=stream,
+                        candidates=candidates
+                    )
+            finally:
+                # 완료/실패 상태보다 먼저 남은 부분 텍스트를 기록
+                if stream:
+                    stream.finish()
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"콘텐츠 생성 소요 {elapsed:.2f}초 중 형태소 분석기 {okt_stats['seconds']:.2f}초 "
+                f"(호출 {okt_stats['calls']}회, 대기 {okt_stats['wait_seconds']:.2f}초)"
             )
 
             # 상태 업데이트
@@ -236,16 +326,222 @@ class BlogContentViewSet(viewsets.ModelViewSet):
                 return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
         return Response(status_data)
+
+    @action(detail=False, methods=['get'], url_path='generate-stream', renderer_classes=[EventStreamRenderer, JSONRenderer])
+    def generate_stream(self, request):
+        """
+        콘텐츠 생성 진행 상황을 server-sent events로 전달하는 API
+
+        이벤트:
+            stage  - 새 작성 단계 시작 ({'attempt', 'stage'}), 이전 단계에서 받은 텍스트는 버림
+            delta  - 새로 작성된 텍스트 ({'attempt', 'text'})
+            status - /status/ 와 같은 형식의 진행 상태 (완료/실패 상태를 보낸 뒤 스트림 종료)
+
+        스트림이 열려 있는 동안 요청 스레드 하나를 사용하므로 최대 GENERATION_STREAM_MAX_SECONDS 동안만 유지하고,
+        워커당 GENERATION_STREAM_MAX_CONNECTIONS개까지만 엽니다. 스트림을 열 수 없으면(동기 워커, 프로세스별 캐시,
+        연결 수 초과) 503과 함께 폴링용 /status/ 주소(fallback)를 반환합니다.
+        """
+        keyword_id = request.query_params.get('keyword_id')
+
+        if not keyword_id:
+            return Response({"error": "keyword_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 프로세스별 캐시에서는 작업이 다른 워커에 있을 수 있으므로 작업 존재 여부보다 먼저 확인합니다.
+        fallback = {"fallback": f"/api/content/status/?keyword_id={keyword_id}"}
+        reason = generation_stream_unavailable_reason(request)
+        if reason:
+            return Response({"error": reason, **fallback}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        user_id = request.user.id
+        if cache.get(f"content_generation_{keyword_id}_{user_id}") is None and GenerationStream.read(keyword_id, user_id) is None:
+            return Response({"error": "진행 중인 콘텐츠 생성 작업이 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+
+        if not _generation_stream_slots.acquire(blocking=False):
+            return Response(
+                {"error": "동시에 열 수 있는 스트림 수를 초과했습니다. /status/ 로 진행 상황을 확인하세요.", **fallback},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        response = StreamingHttpResponse(
+            GenerationStreamSlot(self._generation_events(keyword_id, user_id)),
+            content_type='text/event-stream; charset=utf-8'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no' # nginx 프록시 버퍼링 해제
+        return response
+
+    def _generation_events(self, keyword_id, user_id):
+        """진행 버퍼와 상태 캐시를 주기적으로 읽어 바뀐 부분만 SSE 이벤트로 만듭니다."""
+        status_key = f"content_generation_{keyword_id}_{user_id}"
+        attempt, sent_chars, last_status = None, 0, None
+        deadline = time.monotonic() + GENERATION_STREAM_MAX_SECONDS
+        last_event_at = time.monotonic()
+
+        yield "retry: 2000\n\n"
+        while time.monotonic() < deadline:
+            events = []
+            buffer = GenerationStream.read(keyword_id, user_id)
+            if buffer and buffer['stage']:
+                if buffer['attempt'] != attempt:
+                    attempt, sent_chars = buffer['attempt'], 0
+                    events.append(('stage', {'attempt': attempt, 'stage': buffer['stage']}))
+                text = buffer['text']
+                if len(text) > sent_chars:
+                    events.append(('delta', {'attempt': attempt, 'text': text[sent_chars:]}))
+                    sent_chars = len(text)
+
+            status_data = cache.get(status_key)
+            if status_data and status_data != last_status:
+                last_status = status_data
+                events.append(('status', status_data))
+
+            for event, data in events:
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+            if events:
+                last_event_at = time.monotonic()
+            elif time.monotonic() - last_event_at >= GENERATION_STREAM_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                last_event_at = time.monotonic()
+
+            if last_status and last_status.get('status') in ('completed', 'failed'):
+                return
+            time.sleep(GENERATION_STREAM_POLL_SECONDS)
     
+    @action(detail=False, methods=['post'])
+    def pipeline(self, request):
+        """
+        키워드 분석부터 자료 수집, 생성, 최적화, 제목/요약(선택: 이미지)까지 한 번에 실행하는 API
+
+        서로 의존하지 않는 단계는 동시에 실행됩니다. 진행 상황은 /pipeline/<job_id>/ 에서 단계별로 확인합니다.
+        """
+        keyword_id = request.data.get('keyword_id')
+
+        if not keyword_id:
+            return Response({"error": "keyword_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            keyword = Keyword.objects.get(id=keyword_id, user=request.user)
+        except Keyword.DoesNotExist:
+            return Response({"error": "Invalid keyword_id"}, status=status.HTTP_404_NOT_FOUND)
+
+        options = {
+            'target_audience': request.data.get('target_audience') or None,
+            'business_info': request.data.get('business_info') or None,
+            'custom_morphemes': request.data.get('custom_morphemes') or None,
+            'summary_type': request.data.get('summary_type', 'vrew'),
+            'images': str(request.data.get('images', '')).lower() in ('1', 'true', 'yes'),
+            'refresh_research': str(request.data.get('refresh_research', '')).lower() in ('1', 'true', 'yes'),
+            'candidates': parse_candidates(request.data.get('candidates')),
+        }
+        pipeline = ContentPipeline(keyword.pk, request.user.id, options)
+        job_id = pipeline.start()
+
+        return Response({
+            "message": "콘텐츠 파이프라인이 시작되었습니다. 진행 상황은 /pipeline/<job_id>/ 엔드포인트를 사용하세요.",
+            "job_id": job_id,
+            "keyword_id": keyword.pk,
+            "stages": list(pipeline.stages),
+            "status": "processing"
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'pipeline/(?P<job_id>[0-9a-f]{32})')
+    def pipeline_status(self, request, job_id=None):
+        """파이프라인 작업의 전체/단계별 진행 상태 확인 API"""
+        status_data = get_pipeline_status(job_id)
+        if not status_data or status_data.get('user_id') != request.user.id:
+            return Response({"error": "파이프라인 작업을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status_data)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        여러 키워드의 콘텐츠를 한 번에 생성하는 대량 생성 API
+
+        keyword_ids: 키워드 ID 목록 (최대 BATCH_MAX_KEYWORDS개)
+        mode: 'generate'(기본, 콘텐츠 생성만) 또는 'pipeline'(분석~제목/요약까지 전체 단계)
+        진행 상황과 처리량은 /batch/<batch_id>/ 에서 확인합니다.
+        """
+        keyword_ids = request.data.get('keyword_ids')
+        mode = request.data.get('mode', 'generate')
+
+        if not keyword_ids or not isinstance(keyword_ids, list):
+            return Response({"error": "keyword_ids (list) is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if mode not in BATCH_MODES:
+            return Response({"error": f"mode must be one of {list(BATCH_MODES)}"}, status=status.HTTP_400_BAD_REQUEST)
+        max_keywords = getattr(settings, 'BATCH_MAX_KEYWORDS', 50)
+        if len(keyword_ids) > max_keywords:
+            return Response({"error": f"한 번에 최대 {max_keywords}개의 키워드만 요청할 수 있습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            keyword_ids = [int(keyword_id) for keyword_id in keyword_ids]
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid keyword_ids"}, status=status.HTTP_400_BAD_REQUEST)
+        owned_ids = set(Keyword.objects.filter(id__in=keyword_ids, user=request.user).values_list('id', flat=True))
+        invalid_ids = [keyword_id for keyword_id in keyword_ids if keyword_id not in owned_ids]
+        if invalid_ids:
+            return Response({"error": "Invalid keyword_ids", "invalid_ids": invalid_ids}, status=status.HTTP_404_NOT_FOUND)
+
+        options = {
+            'target_audience': request.data.get('target_audience') or None,
+            'business_info': request.data.get('business_info') or None,
+            'custom_morphemes': request.data.get('custom_morphemes') or None,
+            'summary_type': request.data.get('summary_type', 'vrew'),
+            'images': str(request.data.get('images', '')).lower() in ('1', 'true', 'yes'),
+            'refresh_research': str(request.data.get('refresh_research', '')).lower() in ('1', 'true', 'yes'),
+            'candidates': parse_candidates(request.data.get('candidates')),
+        }
+        batch = BatchGeneration(keyword_ids, request.user.id, options, mode=mode)
+        batch_id = batch.start()
+
+        return Response({
+            "message": "대량 생성이 시작되었습니다. 진행 상황은 /batch/<batch_id>/ 엔드포인트를 사용하세요.",
+            "batch_id": batch_id,
+            "mode": mode,
+            "keyword_ids": batch.keyword_ids,
+            "max_concurrent_items": batch.max_workers,
+            "status": "processing"
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'batch/(?P<batch_id>[0-9a-f]{32})')
+    def batch_status(self, request, batch_id=None):
+        """대량 생성 작업의 항목별 상태와 전체 처리량 확인 API"""
+        status_data = get_batch_status(batch_id)
+        if not status_data or status_data.get('user_id') != request.user.id:
+            return Response({"error": "대량 생성 작업을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status_data)
+
     @action(detail=True, methods=['post'])
     def optimize(self, request, pk=None):
-        """콘텐츠 최적화 API"""
+        """
+        콘텐츠 최적화 API
+
+        본문과 조건이 마지막 최적화 결과와 같으면 저장된 결과를 바로 반환합니다.
+        force=true 로 요청하면 저장된 결과를 무시하고 다시 최적화합니다.
+        """
         content = self.get_object()
-        
+        force = str(request.data.get('force', request.query_params.get('force', ''))).lower() in ('1', 'true', 'yes')
+        custom_morphemes = request.data.get('custom_morphemes') or None
+
+        if not force:
+            cached_result = get_cached_optimization(content, custom_morphemes)
+            if cached_result:
+                cache_key = f"content_optimization_{content.pk}"
+                status_data = {
+                    "status": "completed",
+                    "message": "변경 사항이 없어 이전 최적화 결과를 반환합니다.",
+                    "content_id": content.pk,
+                    "result": cached_result
+                }
+                cache.set(cache_key, status_data, timeout=3600)
+                return Response({
+                    **status_data,
+                    "data": BlogContentSerializer(content).data
+                })
+
         # 백그라운드에서 최적화 시작
         thread = threading.Thread(
             target=self._optimize_content_in_background,
-            args=(content.pk,)
+            args=(content.pk, custom_morphemes, force)
         )
         thread.daemon = True
         thread.start()
@@ -256,84 +552,51 @@ class BlogContentViewSet(viewsets.ModelViewSet):
             "status": "processing"
         })
     
-    def _optimize_content_in_background(self, content_id):
+    def _optimize_content_in_background(self, content_id, custom_morphemes=None, force=False):
         """백그라운드에서 콘텐츠를 최적화하는 메서드"""
+        cache_key = f"content_optimization_{content_id}"
         try:
             # 상태 업데이트 - 처리 중
-            cache_key = f"content_optimization_{content_id}"
             cache.set(cache_key, {"status": "running", "progress": 0}, timeout=3600)
             
-            content = BlogContent.objects.get(id=content_id)
-            
-            # 콘텐츠 생성 서비스 초기화
-            generator = ContentGenerator()
-            
-            # 형태소 분석
-            morpheme_analysis = generator.analyze_morphemes(
-                content.content, 
-                content.keyword.keyword
+            # 예산 사용량을 상태 조회 API에서 볼 수 있도록 LLM 호출마다 캐시에 반영
+            budget = JobBudget.from_settings(
+                on_update=lambda b: cache.set(
+                    cache_key, {"status": "running", "progress": 0, "budget": b.to_dict()}, timeout=3600
+                )
             )
-            
-            # 최적화 필요 여부 확인
-            if morpheme_analysis['needs_optimization']:
-                # 데이터 구성
-                data = {
-                    "keyword": content.keyword.keyword,
-                    "morphemes": [m for m in morpheme_analysis['morpheme_analysis'].keys()]
-                }
-                
-                # 최적화 프롬프트 생성
-                optimization_prompt = generator._create_optimization_prompt(content.content, data)
-                
-                # 최적화 수행 (Claude API 호출)
-                response = generator.client.messages.create(
-                    model=generator.model,
-                    max_tokens=4096,
-                    temperature=0.5,
-                    messages=[
-                        {"role": "user", "content": optimization_prompt}
-                    ]
+            optimizer = ContentOptimizer()
+            try:
+                result = optimizer.optimize_existing_content_v3(
+                    content_id,
+                    custom_morphemes=custom_morphemes,
+                    force=force,
+                    budget=budget
                 )
-                
-                optimized_content = response.content[0].text
-                
-                # 업데이트
-                content.content = optimized_content
-                content.mobile_formatted_content = generator._format_for_mobile(optimized_content)
-                content.char_count = len(optimized_content.replace(" ", ""))
-                content.is_optimized = True
-                content.save()
-                
-                # 형태소 분석 결과 업데이트
-                content.morpheme_analyses.all().delete()
-                new_analysis = generator.analyze_morphemes(optimized_content, content.keyword.keyword)
-                for morpheme, info in new_analysis.get('morpheme_analysis', {}).items():
-                    if morpheme and len(morpheme) > 1:  # 1글자 미만은 저장하지 않음
-                        MorphemeAnalysis.objects.create(
-                            content=content,
-                            morpheme=morpheme,
-                            count=info.get('count', 0),
-                            is_valid=info.get('is_valid', False)
-                        )
-                
+            finally:
+                # 예외로 끝나도 버려진 API 요청의 늦은 알림이 실패 상태를 덮어쓰지 않도록 먼저 닫습니다.
+                budget.close()
+            
+            if result.get('success'):
                 # 결과 캐싱
                 cache.set(
                     cache_key, 
                     {
                         "status": "completed", 
-                        "message": "콘텐츠가 성공적으로 최적화되었습니다.",
-                        "content_id": content_id
+                        "message": result.get('message', "콘텐츠가 성공적으로 최적화되었습니다."),
+                        "content_id": content_id,
+                        "result": result,
+                        "budget": result.get('budget')
                     }, 
                     timeout=3600
                 )
             else:
-                # 이미 최적화된 콘텐츠
                 cache.set(
                     cache_key, 
                     {
-                        "status": "completed", 
-                        "message": "이미 최적화된 콘텐츠입니다.",
-                        "content_id": content_id
+                        "status": "failed", 
+                        "error": result.get('message', "콘텐츠 최적화에 실패했습니다."),
+                        "budget": budget.to_dict()
                     }, 
                     timeout=3600
                 )
@@ -341,8 +604,8 @@ class BlogContentViewSet(viewsets.ModelViewSet):
         except Exception as e:
             # 오류 상태 저장
             import traceback
-            print(f"백그라운드 콘텐츠 최적화 오류: {str(e)}")
-            print(traceback.format_exc())
+            logger.error(f"백그라운드 콘텐츠 최적화 오류: {str(e)}")
+            logger.error(traceback.format_exc())
             
             cache.set(
                 cache_key, 
@@ -353,6 +616,25 @@ class BlogContentViewSet(viewsets.ModelViewSet):
                 timeout=3600
             )
     
+    @action(detail=True, methods=['get'], url_path='optimize-plan')
+    def optimize_plan(self, request, pk=None):
+        """
+        최적화 계획 미리보기 API (LLM 호출 없음)
+
+        현재 분석 결과, 목표 범위를 벗어난 형태소, 로컬 단계가 적용할 편집 계획을 반환합니다.
+        custom_morphemes 쿼리 파라미터(쉼표 구분)로 사용자 지정 형태소를 함께 분석할 수 있습니다.
+        """
+        content = self.get_object()
+        custom_morphemes = [m.strip() for m in request.query_params.get('custom_morphemes', '').split(',') if m.strip()]
+
+        try:
+            plan = get_optimization_planner().plan(content.content, content.keyword.keyword, custom_morphemes or None)
+        except Exception as e:
+            logger.error(f"최적화 계획 계산 오류: content_id={content.pk}, {e}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({"content_id": content.pk, **plan})
+
     @action(detail=True, methods=['get'])
     def optimize_status(self, request, pk=None):
         """콘텐츠 최적화 상태 확인 API"""
@@ -369,6 +651,7 @@ class BlogContentViewSet(viewsets.ModelViewSet):
                     "status": "completed",
                     "message": "콘텐츠가 이미 최적화되어 있습니다.",
                     "content_id": content.pk,
+                    "budget": (content.meta_data or {}).get('budget'),
                     "data": BlogContentSerializer(content).data
                 })
             else:
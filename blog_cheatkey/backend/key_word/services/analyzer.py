@@ -4,6 +4,7 @@ import json
 import re
 from django.conf import settings
 from openai import OpenAI
+from backend.content.services.llm_executor import get_limiter
 
 # from research.services.collector import ResearchCollector 제거 (순환 참조 방지)
 
@@ -69,14 +70,15 @@ class KeywordAnalyzer:
             """
             
             # API 호출
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-            )
+            with get_limiter('openai'):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.5,
+                )
             
             content = response.choices[0].message.content
             return self._parse_analysis_result(content)
@@ -118,14 +120,15 @@ class KeywordAnalyzer:
             """
             
             # API 호출
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-            )
+            with get_limiter('openai'):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                )
             
             content = response.choices[0].message.content
             return self._parse_subtopics(content)
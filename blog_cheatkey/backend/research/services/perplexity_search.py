@@ -4,6 +4,7 @@ import logging
 import requests
 from datetime import datetime, timedelta
 from django.conf import settings
+from backend.content.services.llm_executor import get_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -87,12 +88,13 @@ class PerplexitySearchService:
             }
             
             # API 호출 - 타임아웃 설정 추가 (30초)
-            response = requests.post(
-                self.base_url, 
-                json=payload, 
-                headers=headers, 
-                timeout=30  # 30초 타임아웃 설정
-            )
+            with get_limiter('perplexity'):
+                response = requests.post(
+                    self.base_url, 
+                    json=payload, 
+                    headers=headers, 
+                    timeout=30  # 30초 타임아웃 설정
+                )
             response.raise_for_status()  # 오류 발생시 예외 발생
             
             # 응답 처리
@@ -6,6 +6,7 @@ from openai import OpenAI
 from django.conf import settings
 from backend.content.models import BlogContent
 from backend.title.models import TitleSuggestion
+from backend.content.services.llm_executor import get_limiter
 import time
 
 logger = logging.getLogger(__name__)
@@ -86,7 +87,7 @@ class TitleGenerator:
                     selected_title = existing_titles.filter(selected=True).first()
                     if selected_title:
                         blog_content.title = selected_title.suggestion
-                        blog_content.save()
+                        blog_content.save(update_fields=['title', 'updated_at'])
                     
                     return titles
                 
@@ -114,8 +115,9 @@ class TitleGenerator:
                 
                 # 첫 번째 제목을 콘텐츠의 제목으로 설정
                 if titles and titles.get('general') and titles['general']:
+                    # 최적화 등 본문을 수정하는 작업과 동시에 실행될 수 있으므로 제목만 저장
                     blog_content.title = titles['general'][0]['title']
-                    blog_content.save()
+                    blog_content.save(update_fields=['title', 'updated_at'])
                 
                 return titles
                 
@@ -154,26 +156,28 @@ class TitleGenerator:
             
             # API에 따른 응답 생성
             if self.use_openai:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "당신은 상위 1%의 블로그 제목 생성 전문가입니다. SEO에 최적화되면서도 독자의 클릭을 유도하는 매력적인 제목을 생성해야 합니다."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    timeout=120  # 타임아웃 추가 (120초)
-                )
+                with get_limiter('openai'):
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": "당신은 상위 1%의 블로그 제목 생성 전문가입니다. SEO에 최적화되면서도 독자의 클릭을 유도하는 매력적인 제목을 생성해야 합니다."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.7,
+                        timeout=120  # 타임아웃 추가 (120초)
+                    )
                 
                 response_text = response.choices[0].message.content
             else:
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=1500,
-                    temperature=0.7,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
+                with get_limiter('anthropic'):
+                    response = self.client.messages.create(
+                        model=self.model,
+                        max_tokens=1500,
+                        temperature=0.7,
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ]
+                    )
                 
                 response_text = response.content[0].text
             
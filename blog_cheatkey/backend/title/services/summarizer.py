@@ -3,6 +3,7 @@ import logging
 from anthropic import Anthropic
 from django.conf import settings
 from backend.content.models import BlogContent
+from backend.content.services.llm_executor import get_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -44,14 +45,15 @@ class ContentSummarizer:
                 prompt = self._create_vrew_prompt(content, keyword)
             
             # 요약 생성
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1000,
-                temperature=0.7,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            with get_limiter('anthropic'):
+                response = self.client.messages.create(
+                    model=self.model,
+                    max_tokens=1000,
+                    temperature=0.7,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
             
             return response.content[0].text
             